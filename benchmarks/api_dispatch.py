@@ -0,0 +1,108 @@
+"""
+Benchmark of request dispatch overhead of the API.
+
+Compares the indexed store and protocol registries of `ConsteliteAPI` with
+a linear scan of the registered stores and protocols and measures the
+round trip of a `/store/get` request through the Starlite `StoreController`
+for an API with `n_stores` memory stores and `n_protocols` protocols.
+
+Usage:
+    PYTHONPATH=. python benchmarks/api_dispatch.py [n_stores] [n_protocols] [n_requests]
+"""
+import asyncio
+import sys
+import time
+from uuid import uuid4
+
+from litestar.testing import AsyncTestClient
+
+from constelite.api.starlite import StarliteAPI
+from constelite.models import StateModel, ref
+from constelite.protocol import protocol
+from constelite.store import MemoryStore
+
+
+class BenchState(StateModel):
+    name: str
+
+
+def create_protocol(idx: int):
+    async def fn(api, logger, a: int) -> int:
+        return a
+
+    fn.__name__ = f"bench_protocol_{idx}"
+    return protocol(name=f"Bench protocol {idx}")(fn)
+
+
+def timeit(fn, keys: list) -> float:
+    start = time.perf_counter()
+    for key in keys:
+        fn(key)
+    return time.perf_counter() - start
+
+
+async def time_requests(api: StarliteAPI, refs: list, n_requests: int):
+    api.generate_app()
+    request_bodies = [f'{{"ref": {r.json()}}}' for r in refs]
+    async with AsyncTestClient(app=api.app) as client:
+        start = time.perf_counter()
+        for idx in range(n_requests):
+            response = await client.post(
+                '/store/get',
+                content=request_bodies[idx % len(refs)],
+                headers={'Content-Type': 'application/json'}
+            )
+            response.raise_for_status()
+        return time.perf_counter() - start
+
+
+def main(n_stores: int = 50, n_protocols: int = 1000, n_requests: int = 500):
+    stores = [
+        MemoryStore(uid=uuid4(), name=f"Store {idx}")
+        for idx in range(n_stores)
+    ]
+    api = StarliteAPI(name="Bench API", stores=stores)
+    for idx in range(n_protocols):
+        api.add_protocol(create_protocol(idx), f"bench_protocol_{idx}")
+
+    n_lookups = 100_000
+    store_uids = [
+        stores[idx % n_stores].uid for idx in range(n_lookups)
+    ]
+    slugs = [
+        f"bench_protocol_{idx % n_protocols}" for idx in range(n_lookups)
+    ]
+
+    store_list = api.stores
+    protocol_list = api.protocols
+
+    linear_store = timeit(
+        lambda uid: next(s for s in store_list if s.uid == uid), store_uids
+    )
+    registry_store = timeit(api.get_store, store_uids)
+    linear_protocol = timeit(
+        lambda slug: next(p for p in protocol_list if p.slug == slug), slugs
+    )
+    registry_protocol = timeit(api.get_protocol, slugs)
+
+    refs = [
+        asyncio.run(store.put(ref(BenchState(name=store.name))))
+        for store in stores
+    ]
+    requests = asyncio.run(time_requests(api, refs, n_requests))
+
+    print(f"Stores: {n_stores}, protocols: {n_protocols}")
+    print(f"Store lookup, {n_lookups} calls:")
+    print(f"  linear scan: {linear_store:.3f}s")
+    print(f"  registry:    {registry_store:.3f}s")
+    print(f"Protocol lookup, {n_lookups} calls:")
+    print(f"  linear scan: {linear_protocol:.3f}s")
+    print(f"  registry:    {registry_protocol:.3f}s")
+    print(
+        f"/store/get, {n_requests} requests: {requests:.3f}s "
+        f"({1000 * requests / n_requests:.2f}ms per request)"
+    )
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,115 @@
+"""
+Benchmark of the state codecs of uid-key stores.
+
+Encodes and decodes a state with static properties, relationships and a
+`Dynamic[float]` and a `Dynamic[int]` of `n_points` points each, with
+every installed codec and with the pickled `state.dict()` and
+`resolve_model` used before codecs, and reports the size of the encoded
+state and the mean encode and decode times over `n_repeats` runs.
+
+Usage:
+    PYTHONPATH=. python benchmarks/codecs.py [n_points] [n_repeats]
+"""
+import pickle
+import sys
+import time
+from datetime import datetime, timezone
+from importlib.util import find_spec
+from typing import List, Optional
+from uuid import uuid4
+
+import numpy as np
+
+from constelite.models import (
+    StateModel, Dynamic, TimePoint, Association, StoreModel,
+    StoreRecordModel, Ref, resolve_model
+)
+from constelite.store.codecs import get_codec
+
+
+class BenchSample(StateModel):
+    name: str
+
+
+class BenchReactor(StateModel):
+    name: str
+    volume: float
+    started: datetime
+    tags: List[str]
+    samples: Optional[Association[BenchSample]]
+    temperature: Optional[Dynamic[float]]
+    stirring: Optional[Dynamic[int]]
+
+
+def make_state(n_points: int) -> BenchReactor:
+    store = StoreModel(uid=uuid4(), name="Bench store")
+    timestamps = np.arange(n_points, dtype='float64') * 60
+    return BenchReactor(
+        name="reactor",
+        volume=2.5,
+        started=datetime(2024, 1, 1, tzinfo=timezone.utc),
+        tags=["fermentation", "bench"],
+        samples=[
+            Ref[BenchSample](
+                record=StoreRecordModel(store=store, uid=str(uuid4())),
+                guid=uuid4(),
+                state_model_name="BenchSample"
+            )
+            for _ in range(20)
+        ],
+        temperature=Dynamic[float](points=[
+            TimePoint(timestamp=t, value=30 + np.sin(t / 3600))
+            for t in timestamps
+        ]),
+        stirring=Dynamic[int](points=[
+            TimePoint(timestamp=t, value=200 + int(t) % 50)
+            for t in timestamps
+        ])
+    )
+
+
+def timeit(fn, n_repeats: int) -> float:
+    start = time.perf_counter()
+    for _ in range(n_repeats):
+        fn()
+    return (time.perf_counter() - start) / n_repeats
+
+
+def main(n_points: int = 10_000, n_repeats: int = 10):
+    state = make_state(n_points)
+
+    codecs = ['pickle', 'orjson', 'msgpack']
+    if find_spec('zstandard'):
+        codecs += [f'{name}+zstd' for name in codecs]
+
+    print(f"Points per dynamic: {n_points}, repeats: {n_repeats}")
+    print(f"  {'codec':14s} {'size':>10s} {'encode':>10s} {'decode':>10s}")
+
+    data = pickle.dumps(state.dict())
+    encode = timeit(lambda: pickle.dumps(state.dict()), n_repeats)
+    decode = timeit(
+        lambda: resolve_model(values=pickle.loads(data)), n_repeats
+    )
+    print(
+        f"  {'dict + pickle':14s} {len(data):10d} "
+        f"{1000 * encode:8.2f}ms {1000 * decode:8.2f}ms"
+    )
+
+    for name in codecs:
+        try:
+            codec = get_codec(name)
+        except ImportError:
+            print(f"  {name:14s} not installed")
+            continue
+
+        data = codec.encode(state)
+        encode = timeit(lambda: codec.encode(state), n_repeats)
+        decode = timeit(lambda: codec.decode(data), n_repeats)
+        print(
+            f"  {name:14s} {len(data):10d} "
+            f"{1000 * encode:8.2f}ms {1000 * decode:8.2f}ms"
+        )
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
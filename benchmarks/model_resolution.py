@@ -0,0 +1,63 @@
+"""
+Benchmark of state model resolution by name.
+
+Compares the subclass registry lookup used by `get_auto_resolve_model` with
+a linear scan of the `StateModel` subclass tree.
+
+Usage:
+    PYTHONPATH=. python benchmarks/model_resolution.py [n_models] [n_refs]
+"""
+import sys
+import time
+
+from constelite.utils import all_subclasses
+from constelite.models import StateModel, Ref, get_auto_resolve_model
+
+
+def create_models(n_models: int) -> list[type]:
+    return [
+        type(f"BenchModel{i}", (StateModel,), {'__annotations__': {}})
+        for i in range(n_models)
+    ]
+
+
+def linear_lookup(model_name: str):
+    return next(
+        (
+            m for m in all_subclasses(StateModel)
+            if m.__name__ == model_name
+        ),
+        None
+    )
+
+
+def timeit(fn, names: list[str]) -> float:
+    start = time.perf_counter()
+    for name in names:
+        fn(name)
+    return time.perf_counter() - start
+
+
+def main(n_models: int = 300, n_refs: int = 100_000):
+    models = create_models(n_models)
+    names = [models[i % n_models].__name__ for i in range(n_refs)]
+
+    linear = timeit(linear_lookup, names)
+    registry = timeit(
+        lambda name: get_auto_resolve_model(name, StateModel),
+        names
+    )
+
+    start = time.perf_counter()
+    for name in names:
+        Ref[StateModel](state_model_name=name)
+    ref_validation = time.perf_counter() - start
+
+    print(f"Models: {n_models}, lookups: {n_refs}")
+    print(f"Linear scan:     {linear:.3f}s")
+    print(f"Registry:        {registry:.3f}s")
+    print(f"Ref validation:  {ref_validation:.3f}s ")
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
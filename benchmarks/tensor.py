@@ -0,0 +1,79 @@
+"""
+Benchmark of list- and array-backed tensors.
+
+Measures construction from a series, conversion back to a series, JSON
+encoding and peak memory of each for a tensor of `n_rows * n_cols`
+elements.
+
+Usage:
+    PYTHONPATH=. python benchmarks/tensor.py [n_rows] [n_cols]
+"""
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import pandera as pa
+
+from constelite.models import Tensor, TensorSchema
+
+
+class PlateSchema(TensorSchema):
+    pa_schema = pa.SeriesSchema(
+        'float64',
+        name='absorbance',
+        index=pa.MultiIndex([
+            pa.Index('int', name='row'),
+            pa.Index('int', name='col')
+        ])
+    )
+
+
+def measure(fn):
+    """Returns the result, time and peak traced memory of a call.
+
+    Memory is measured in a separate call, as tracing slows it down.
+    """
+    start = time.perf_counter()
+    ret = fn()
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return ret, elapsed, peak / 2**20
+
+
+def main(n_rows: int = 1000, n_cols: int = 1000):
+    series = pd.Series(
+        index=pd.MultiIndex.from_product(
+            [range(n_rows), range(n_cols)], names=['row', 'col']
+        ),
+        data=np.random.rand(n_rows * n_cols),
+        name='absorbance'
+    )
+
+    print(f"Elements: {n_rows * n_cols}")
+    for mode, as_array in (('list', False), ('array', True)):
+        tensor, from_series, from_series_mem = measure(
+            lambda: Tensor[PlateSchema].from_series(series, as_array=as_array)
+        )
+        _, to_series, to_series_mem = measure(tensor.to_series)
+        _, to_json, to_json_mem = measure(tensor.json)
+        _, validate, validate_mem = measure(
+            lambda: Tensor[PlateSchema](
+                index=tensor.index, data=tensor.data
+            )
+        )
+
+        print(f"{mode}:")
+        print(f"  from_series: {from_series:.3f}s {from_series_mem:.1f}MiB")
+        print(f"  to_series:   {to_series:.3f}s {to_series_mem:.1f}MiB")
+        print(f"  json:        {to_json:.3f}s {to_json_mem:.1f}MiB")
+        print(f"  validated:   {validate:.3f}s {validate_mem:.1f}MiB")
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
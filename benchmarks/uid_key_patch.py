@@ -0,0 +1,92 @@
+"""
+Benchmark of patching a record of a uid-key store.
+
+Patches a record with `n_rels` associations to records holding a backref
+to it, `n_patches` times, on a `PickleStore` with and without write
+batches, and reports the time and the number of record reads and writes
+per patch.
+
+Usage:
+    PYTHONPATH=. python benchmarks/uid_key_patch.py [n_rels] [n_patches]
+"""
+import asyncio
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+from uuid import uuid4
+
+from constelite.models import StateModel, Association, backref, ref
+from constelite.store import PickleStore
+
+
+class BenchChild(StateModel):
+    name: str
+    parent: backref(model="BenchParent", from_field="children")
+
+
+class BenchParent(StateModel):
+    name: str
+    counter: int
+    children: Optional[Association[BenchChild]]
+
+
+class CountingPickleStore(PickleStore):
+    reads: int = 0
+    writes: int = 0
+
+    async def get_state_by_uid(self, uid, model_type):
+        self.reads += 1
+        return await super().get_state_by_uid(uid, model_type)
+
+    async def store(self, uid, model):
+        self.writes += 1
+        return await super().store(uid, model)
+
+
+class UnbatchedPickleStore(CountingPickleStore):
+    @asynccontextmanager
+    async def write_batch(self):
+        yield
+
+
+async def time_patches(store: PickleStore, n_rels: int, n_patches: int):
+    children = [
+        await store.put(ref(BenchChild(name=f"child{idx}")))
+        for idx in range(n_rels)
+    ]
+    r_parent = await store.put(ref(BenchParent(name="parent", counter=0)))
+
+    store.reads = 0
+    store.writes = 0
+
+    start = time.perf_counter()
+    for idx in range(n_patches):
+        r_parent.state = BenchParent(
+            name="parent",
+            counter=idx,
+            children=children
+        )
+        await store.patch(r_parent)
+    return time.perf_counter() - start
+
+
+def main(n_rels: int = 20, n_patches: int = 50):
+    print(f"Relationships: {n_rels}, patches: {n_patches}")
+    for label, store_cls in (
+            ("per call", UnbatchedPickleStore),
+            ("batched", CountingPickleStore)):
+        with tempfile.TemporaryDirectory() as path:
+            store = store_cls(uid=uuid4(), name="Bench store", path=path)
+            elapsed = asyncio.run(time_patches(store, n_rels, n_patches))
+        print(
+            f"  {label:9s} {elapsed:.3f}s "
+            f"({1000 * elapsed / n_patches:.2f}ms per patch), "
+            f"{store.reads / n_patches:.0f} reads and "
+            f"{store.writes / n_patches:.0f} writes per patch"
+        )
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -11,11 +11,15 @@ from pydantic.v1 import UUID4, BaseModel
 from pydantic.v1.generics import GenericModel
 
 from constelite.models import Ref,  StateModel
-from constelite.store import BaseStore, AsyncBaseStore
+from constelite.store import BaseStore, AsyncBaseStore, CachedStore
 from constelite.guid_map import GUIDMap, AsyncGUIDMap
 from constelite.loggers.base_logger import LoggerConfig, Logger
 from constelite.protocol import Protocol, ProtocolModel, CallableProtocol, ProtocolProtocol
 from constelite.hook import HookModel, HookConfig, HookManager, HookCall
+from constelite.api.unit_of_work import UnitOfWork, current_unit_of_work
+from constelite.executor import (
+    BoundedExecutor, ExecutorConfig, ThreadExecutorMixin
+)
 from constelite.utils import log_exception, async_log_exception, discover_members
 
 from loguru import logger
@@ -30,34 +34,55 @@ class ConsteliteAPI:
         port: A port to bind to.
         stores: A list of stores that the API will handle.
         temp_store: A store to use for caching return states of the protocols.
+        protocol_executor: Executor of the synchronous protocols. The API
+            creates an executor of its own if not given, so protocols
+            don't compete with stores for threads.
+        store_executor: Executor shared by the synchronous stores and the
+            memcached stores that don't configure one of their own. The
+            default executor is used if not given.
     """
 
     def __init__(
         self,
         name: str,
         version: Optional[str] = None,
-        stores: Optional[List[BaseStore | AsyncBaseStore]] = [],
+        stores: Optional[List[BaseStore | AsyncBaseStore | CachedStore]] = [],
         temp_store: Optional[BaseStore] = None,
         dependencies: Optional[Dict[str, Any]] = {},
         guid_map: Optional[GUIDMap] = None,
         async_guid_map: Optional[AsyncGUIDMap] = None,
         loggers: Optional[List[Type[Logger]]] = None,
         hook_manager: Optional[HookManager] = None,
+        protocol_executor: Optional[ExecutorConfig] = None,
+        store_executor: Optional[ExecutorConfig] = None,
     ):
         self.name = name
         self.version = version or "0.0.1"
-        self.stores = stores or []
-        self.protocols: List[ProtocolModel] = []
-        self.hooks: List[HookModel] = []
+
+        self.protocol_executor = BoundedExecutor(
+            protocol_executor or ExecutorConfig(name='constelite-protocols')
+        )
+        self.store_executor = (
+            BoundedExecutor(store_executor)
+            if store_executor is not None else None
+        )
+
+        # Registries indexed for the lookups done on every request
+        self._stores: Dict[UUID4, BaseStore | AsyncBaseStore | CachedStore] = {}
+        self._protocols: Dict[str, ProtocolModel] = {}
+        self._hooks: Dict[str, HookModel] = {}
         self._dependencies = dependencies
 
+        for store in stores or []:
+            self.add_store(store)
+
         self.hook_manager = hook_manager
         self.hook_tasks: dict[str, asyncio.Task] = {}
         self.temp_store = None
 
         if temp_store is not None:
             self.temp_store = temp_store
-            self.stores.append(self.temp_store)
+            self.add_store(self.temp_store)
 
         self._guid_map = guid_map
         self._async_guid_map = async_guid_map
@@ -65,9 +90,41 @@ class ConsteliteAPI:
 
         self.loggers = loggers or []
 
+    @property
+    def stores(self) -> List[BaseStore | AsyncBaseStore | CachedStore]:
+        return list(self._stores.values())
+
+    @property
+    def protocols(self) -> List[ProtocolModel]:
+        return list(self._protocols.values())
+
+    @property
+    def hooks(self) -> List[HookModel]:
+        return list(self._hooks.values())
+
+    def add_store(self, store: BaseStore | AsyncBaseStore | CachedStore):
+        """Registers a store with the API.
+
+        Stores are looked up by uid, so a store with the uid of an already
+        registered store replaces it.
+        """
+        if store.uid in self._stores:
+            logger.warning(f"Replacing store {store.uid} in API")
+        self._stores[store.uid] = store
+
+        sync_store = store.store if isinstance(store, CachedStore) else store
+        if (
+            self.store_executor is not None
+            and isinstance(sync_store, ThreadExecutorMixin)
+            and sync_store.executor_config is None
+        ):
+            sync_store.set_executor(self.store_executor)
+
     def enable_guid(self):
         if self._guid_map is not None:
             for store in self.stores:
+                if isinstance(store, CachedStore):
+                    store = store.store
                 if isinstance(store, BaseStore):
                     store.set_guid_map(self._guid_map)
                 elif isinstance(store, AsyncBaseStore):
@@ -123,7 +180,11 @@ class ConsteliteAPI:
 
         if protocol_model is not None:
             protocol_model.path = path
-            self.protocols.append(protocol_model)
+            if protocol_model.slug in self._protocols:
+                # The first protocol with a slug is the one that is called
+                logger.warning(f"Protocol with slug {protocol_model.slug} is already added. Skipping {protocol_model.name}({protocol_model.path})")
+                return
+            self._protocols[protocol_model.slug] = protocol_model
             logger.info(f"Adding protocol to API: {protocol_model.name}({protocol_model.path})")
         else:
             logger.warning("Supplied protocol is invalid")        
@@ -197,8 +258,11 @@ class ConsteliteAPI:
     def add_hook(self, hook: 'Hook'):
         hook_model = hook.get_model()
 
+        if hook_model.slug in self._hooks:
+            logger.warning(f"Hook with slug {hook_model.slug} is already added. Skipping {hook_model.name}")
+            return
         logger.info(f"Adding hook to API: {hook_model.name})")
-        self.hooks.append(hook_model)
+        self._hooks[hook_model.slug] = hook_model
 
     def discover_hooks(self, root_module: ModuleType, bind_path: str = "") -> None:
         from constelite.hook import Hook
@@ -218,12 +282,7 @@ class ConsteliteAPI:
         raise NotImplementedError
 
     def get_hook(self, slug: str) -> HookModel | None:
-        hook = next(
-            (h for h in self.hooks if h.slug == slug),
-            None
-        )
-
-        return hook
+        return self._hooks.get(slug, None)
 
     async def start_persistent_hooks(self):
         if self.hook_manager is not None:
@@ -298,27 +357,29 @@ class ConsteliteAPI:
     @log_exception
     def get_store(self, uid: UUID4) -> BaseStore | AsyncBaseStore:
         """Looks up a store by its uid
+
+        Within a protocol run with a unit of work, the store is wrapped, so
+        writes made through it clear the identity map of the unit of work.
         """
-        store =  next(
-            (
-                store for store in self.stores
-                if store.uid == uid
-            ),
-            None
-        )
+        store = self._stores.get(uid, None)
 
         if store is None:
             raise ValueError(f"Store {uid} does not exist")
-        
+
+        unit_of_work = current_unit_of_work.get()
+        if unit_of_work is not None:
+            return unit_of_work.wrap_store(store)
         return store
 
     def get_protocol(self, slug: str) -> ProtocolModel | None:
-        protocol = next(
-            (p for p in self.protocols if p.slug == slug),
-            None
-        )
+        return self._protocols.get(slug, None)
+
+    @property
+    def unit_of_work(self) -> UnitOfWork | None:
+        """Unit of work of the protocol run in progress, if any.
+        """
+        return current_unit_of_work.get()
 
-        return protocol
     @async_log_exception
     async def run_protocol(self, slug: str, logger: Logger, **kwargs):
         protocol = self.get_protocol(slug=slug)
@@ -326,21 +387,51 @@ class ConsteliteAPI:
         if protocol is None:
             raise ValueError(f"Unknown protocol with slug {slug}")
         else:
+            # Protocols with `use_unit_of_work` get their own identity map
+            # and write queue. Nested runs share the unit of work of the
+            # outermost one.
+            unit_of_work = None
+            token = None
+            if (
+                protocol.use_unit_of_work
+                and current_unit_of_work.get() is None
+            ):
+                unit_of_work = UnitOfWork(api=self)
+                token = current_unit_of_work.set(unit_of_work)
             try:
-                return await async_log_exception(protocol.fn)(api=self, logger=logger, **kwargs)
+                ret = await async_log_exception(protocol.fn)(api=self, logger=logger, **kwargs)
+                if unit_of_work is not None:
+                    await unit_of_work.flush()
+                return ret
             except Exception as e:
                 await logger.error(f"Failed to run protocol {slug}")
                 raise e
+            finally:
+                if token is not None:
+                    current_unit_of_work.reset(token)
 
     def get_dependency(self, key):
         return self._dependencies.get(key, None)
 
-    async def get_state(self, ref: Ref, cache: bool = True, refresh=True) -> StateModel:
+    async def get_state(
+            self,
+            ref: Ref,
+            cache: bool = True,
+            refresh: Optional[bool] = None
+    ) -> StateModel:
         """Retrieves a state of a reference from store
 
+        Within a protocol run with a unit of work, states are loaded once
+        per record through the run's unit of work, unless `refresh` is
+        `True`.
+
         Args:
             ref: Input reference.
             cache: Assigns retrieved state to the input reference if `True`
+            refresh: Loads the state from the store even if the reference
+                or the unit of work already has one. If not given, states
+                are loaded from the store outside of a unit of work and
+                from the unit of work within one.
 
         Returns:
             A state of the reference.
@@ -349,18 +440,21 @@ class ConsteliteAPI:
             ValueError:
                 If reference store is not known
         """
-        if ref.state is not None and not refresh:
+        unit_of_work = current_unit_of_work.get()
+        if refresh is None:
+            # The state of the reference is not trusted by default, it is
+            # loaded from the store or from the unit of work
+            reuse_state = False
+            refresh = unit_of_work is None
+        else:
+            reuse_state = not refresh
+
+        if ref.state is not None and reuse_state:
             state = ref.state
         else:
             if ref.record is not None:
 
-                store = next(
-                    (
-                        store for store in self.stores
-                        if store.uid == ref.record.store.uid
-                    ),
-                    None
-                )
+                store = self._stores.get(ref.record.store.uid, None)
 
                 if store is None:
                     raise ValueError(
@@ -369,7 +463,12 @@ class ConsteliteAPI:
                         f"{ref.record.store.uid})"
                     )
 
-                state = (await store.get(ref)).state
+                if unit_of_work is not None:
+                    state = await unit_of_work.get_state(
+                        ref, refresh=refresh
+                    )
+                else:
+                    state = (await store.get(ref)).state
                 if cache is True:
                     ref.state = state
 
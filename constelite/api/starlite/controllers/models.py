@@ -1,4 +1,4 @@
-from typing import TypeVar, Generic, Optional
+from typing import TypeVar, Generic, Optional, List, Dict
 import uuid
 
 from enum import Enum
@@ -8,7 +8,7 @@ from pydantic.v1.generics import GenericModel
 
 from constelite.models import StateModel, StoreModel, Ref, resolve_model
 from constelite.loggers import LoggerConfig
-from constelite.store.queries import PropertyQuery
+from constelite.store.queries import PropertyQuery, DynamicQuery, Projection
 from constelite.graphql.utils import GraphQLQuery, GraphQLModelQuery
 
 StateModelType = TypeVar('StateModelType')
@@ -78,17 +78,35 @@ class PatchRequest(RefRequest):
 
 class GetRequest(RefRequest):
     store: Optional[StoreModel] = None
+    dynamic_queries: Optional[Dict[str, DynamicQuery]] = None
+    projection: Optional[Projection] = None
 
 
 class DeleteRequest(RefRequest):
     pass
 
 
+class BulkPutRequest(BaseModel):
+    refs: List[Ref]
+    store: StoreModel
+    _validate_state = validator(
+        'refs', each_item=True, allow_reuse=True
+    )(validate_state)
+
+
+class BulkGetRequest(BaseModel):
+    refs: List[Ref]
+    store: StoreModel
+    dynamic_queries: Optional[Dict[str, DynamicQuery]] = None
+    projection: Optional[Projection] = None
+
+
 class QueryRequest(BaseModel):
     query: Optional[PropertyQuery] = None
     model_name: str
     store: StoreModel
     include_states: Optional[bool] = False
+    projection: Optional[Projection] = None
 
 
 class GraphQLQueryRequest(BaseModel):
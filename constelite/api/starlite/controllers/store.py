@@ -9,7 +9,8 @@ from constelite.models import StateModel, Ref
 from constelite.store import AsyncBaseStore, BaseStore
 from constelite.api.starlite.controllers.models import (
     PutRequest, PatchRequest, GetRequest, DeleteRequest,
-    QueryRequest, GraphQLQueryRequest, GraphQLModelQueryRequest
+    QueryRequest, GraphQLQueryRequest, GraphQLModelQueryRequest,
+    BulkPutRequest, BulkGetRequest
 )
 
 from constelite.api.starlite.api import StarliteAPI
@@ -91,7 +92,49 @@ class StoreController(Controller):
         store = get_store_or_raise_error(api, store_uid)
 
         try:
-            return await store.get(ref)
+            return await store.get(
+                ref,
+                dynamic_queries=data.dynamic_queries,
+                projection=data.projection
+            )
+        except Exception as e:
+            raise HTTPException(
+                extra={
+                    "error_message": repr(e)
+                }
+            )
+
+    @post('/bulk_put', summary="Bulk put")
+    async def bulk_put(self, data: BulkPutRequest, api: StarliteAPI) -> list[Ref]:
+        """
+        Bulk put will attempt to put all provided references into the store
+        provided, batching creation of new records where possible.
+        """
+        store = get_store_or_raise_error(api, data.store.uid)
+
+        try:
+            return await store.bulk_put(data.refs)
+        except Exception as e:
+            raise HTTPException(
+                extra={
+                    "error_message": repr(e)
+                }
+            )
+
+    @post('/bulk_get', summary="Bulk get")
+    async def bulk_get(self, data: BulkGetRequest, api: StarliteAPI) -> list[Ref]:
+        """
+        Bulk get will try to retrieve states of all provided references
+        from the store provided in as few store round trips as possible.
+        """
+        store = get_store_or_raise_error(api, data.store.uid)
+
+        try:
+            return await store.bulk_get(
+                data.refs,
+                dynamic_queries=data.dynamic_queries,
+                projection=data.projection
+            )
         except Exception as e:
             raise HTTPException(
                 extra={
@@ -129,7 +172,8 @@ class StoreController(Controller):
             return await store.query(
                 query=data.query,
                 model_name=data.model_name,
-                include_states=data.include_states
+                include_states=data.include_states,
+                projection=data.projection
             )
         except Exception as e:
             raise HTTPException(
@@ -0,0 +1,226 @@
+from typing import (
+    Dict, List, Literal, Optional, Tuple, Any, TYPE_CHECKING
+)
+
+import asyncio
+from contextvars import ContextVar
+
+from pydantic.v1 import UUID4
+
+from constelite.models import Ref, StateModel, UID
+
+if TYPE_CHECKING:
+    from constelite.api.api import ConsteliteAPI
+
+
+WriteMethod = Literal['PUT', 'PATCH', 'DELETE']
+
+
+class UnitOfWork:
+    """
+    Identity map and write queue of a single protocol run.
+
+    States are loaded at most once per (store uid, record uid) and loads
+    of the same record that are in flight at the same time share one
+    store call, so every caller gets the same state object.
+
+    Writes are queued by `put`, `patch` and `delete` and sent by `flush`.
+    Consecutive writes of the same kind to the same store are sent as one
+    bulk call, keeping the order of the writes. `ConsteliteAPI.run_protocol`
+    flushes the queue once the protocol succeeds and drops it otherwise.
+
+    Stores returned by `ConsteliteAPI.get_store` during the run are wrapped
+    with `UnitOfWorkStore`, so writes made directly through them clear the
+    identity map. Writes through other store objects are not seen by it.
+
+    Arguments:
+        api: API to resolve the stores from.
+    """
+    def __init__(self, api: 'ConsteliteAPI'):
+        self.api = api
+        self._states: Dict[Tuple[UUID4, UID], StateModel] = {}
+        self._loading: Dict[Tuple[UUID4, UID], asyncio.Task] = {}
+        self._writes: List[Tuple[WriteMethod, Any, Ref]] = []
+
+    @staticmethod
+    def _key(ref: Ref) -> Tuple[UUID4, UID]:
+        return (ref.record.store.uid, ref.uid)
+
+    def _get_store(self, ref: Ref, store_uid: Optional[UUID4] = None):
+        if store_uid is None:
+            if ref.record is None:
+                raise ValueError(
+                    "Can't find a store of a reference without a record"
+                )
+            store_uid = ref.record.store.uid
+        store = self.api.get_store(store_uid)
+        if isinstance(store, UnitOfWorkStore):
+            store = store.wrapped
+        return store
+
+    async def _load(self, ref: Ref) -> StateModel:
+        key = self._key(ref)
+        task = asyncio.current_task()
+        try:
+            state = (await self._get_store(ref).get(ref)).state
+            # A load replaced by a refresh or a write must not overwrite
+            # the newer state
+            if self._loading.get(key, None) is task:
+                self._states[key] = state
+            return state
+        finally:
+            if self._loading.get(key, None) is task:
+                self._loading.pop(key)
+
+    def invalidate(self) -> None:
+        """Clears the identity map.
+
+        Called after writes made through the stores, as a write may change
+        states of related records too.
+        """
+        self._states.clear()
+        self._loading.clear()
+
+    def wrap_store(self, store) -> 'UnitOfWorkStore':
+        return UnitOfWorkStore(store=store, unit_of_work=self)
+
+    async def get_state(self, ref: Ref, refresh: bool = False) -> StateModel:
+        """Returns the state of a reference, loading it once per run.
+
+        Arguments:
+            ref: Reference to the record.
+            refresh: Loads the state from the store again and replaces the
+                one in the identity map.
+        """
+        key = self._key(ref)
+        if refresh:
+            self._states.pop(key, None)
+            self._loading.pop(key, None)
+        elif key in self._states:
+            return self._states[key]
+
+        task = self._loading.get(key, None)
+        if task is None:
+            task = asyncio.create_task(self._load(ref))
+            self._loading[key] = task
+
+        # A cancelled caller must not cancel the load of the others
+        return await asyncio.shield(task)
+
+    async def get_states(self, refs: List[Ref]) -> List[StateModel]:
+        """Returns states of several references.
+
+        States that are not loaded yet are fetched with one `bulk_get`
+        per store.
+        """
+        missing = {}
+        for ref in refs:
+            key = self._key(ref)
+            if key not in self._states and key not in self._loading:
+                missing.setdefault(ref.record.store.uid, {})[key] = ref
+
+        for store_uid, store_refs in missing.items():
+            store = self.api.get_store(store_uid)
+            loaded_refs = await store.bulk_get(list(store_refs.values()))
+            for key, loaded_ref in zip(store_refs.keys(), loaded_refs):
+                self._states[key] = loaded_ref.state
+
+        return [await self.get_state(ref) for ref in refs]
+
+    def put(self, ref: Ref, store_uid: Optional[UUID4] = None) -> None:
+        """Queues a put of the reference.
+
+        Once flushed, references to new records get their record and guid
+        assigned in place.
+
+        Arguments:
+            ref: Reference to be put.
+            store_uid: Uid of the store to create a new record in. Defaults
+                to the store of the reference record.
+        """
+        self._writes.append(('PUT', self._get_store(ref, store_uid), ref))
+
+    def patch(self, ref: Ref) -> None:
+        """Queues a patch of the reference.
+        """
+        self._writes.append(('PATCH', self._get_store(ref), ref))
+
+    def delete(self, ref: Ref) -> None:
+        """Queues a deletion of the reference.
+        """
+        self._writes.append(('DELETE', self._get_store(ref), ref))
+
+    async def flush(self) -> None:
+        """Sends the queued writes and clears the identity map, as the
+        writes may change states of related records too.
+        """
+        writes, self._writes = self._writes, []
+
+        batches = []
+        for method, store, ref in writes:
+            if batches and batches[-1][0] == method \
+                    and batches[-1][1] is store:
+                batches[-1][2].append(ref)
+            else:
+                batches.append((method, store, [ref]))
+
+        try:
+            for method, store, refs in batches:
+                if method == 'PUT':
+                    for ref, new_ref in zip(refs, await store.bulk_put(refs)):
+                        ref.record = new_ref.record
+                        ref.guid = new_ref.guid
+                elif method == 'PATCH':
+                    await store.bulk_patch(refs)
+                else:
+                    await store.bulk_delete(refs)
+        finally:
+            self.invalidate()
+
+
+class UnitOfWorkStore:
+    """
+    Store of a unit of work.
+
+    Passes all calls on to the wrapped store and clears the identity map
+    of the unit of work after every write, so later reads see the changes.
+
+    Arguments:
+        store: Wrapped store.
+        unit_of_work: Unit of work of the protocol run.
+    """
+    def __init__(self, store, unit_of_work: UnitOfWork):
+        self.wrapped = store
+        self.unit_of_work = unit_of_work
+
+    def __getattr__(self, name: str):
+        return getattr(self.wrapped, name)
+
+    async def _write(self, method: str, *args, **kwargs):
+        try:
+            return await getattr(self.wrapped, method)(*args, **kwargs)
+        finally:
+            self.unit_of_work.invalidate()
+
+    async def put(self, ref: Ref) -> Ref:
+        return await self._write('put', ref)
+
+    async def patch(self, ref: Ref) -> Ref:
+        return await self._write('patch', ref)
+
+    async def delete(self, ref: Ref) -> None:
+        return await self._write('delete', ref)
+
+    async def bulk_put(self, refs: List[Ref]) -> List[Ref]:
+        return await self._write('bulk_put', refs)
+
+    async def bulk_patch(self, refs: List[Ref]) -> List[Ref]:
+        return await self._write('bulk_patch', refs)
+
+    async def bulk_delete(self, refs: List[Ref]) -> None:
+        return await self._write('bulk_delete', refs)
+
+
+current_unit_of_work: ContextVar[Optional[UnitOfWork]] = ContextVar(
+    'current_unit_of_work', default=None
+)
@@ -0,0 +1,303 @@
+from typing import Any, Callable, Deque, List, Optional
+
+import asyncio
+import contextvars
+import os
+import threading
+import time
+
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from pydantic.v1 import BaseModel, Field
+
+
+class ExecutorConfig(BaseModel):
+    """
+    Configuration of a `BoundedExecutor`.
+
+    Attributes:
+        name: Prefix of the names of the worker threads.
+        max_workers: Number of worker threads. Defaults to the size of
+            the default executor of asyncio.
+        max_queue_size: Number of calls that can wait for a free worker.
+            Further callers wait for a place in the queue.
+    """
+    name: str = 'constelite'
+    max_workers: int = Field(
+        default_factory=lambda: min(32, (os.cpu_count() or 1) + 4)
+    )
+    max_queue_size: int = 256
+
+
+class ExecutorMetrics(BaseModel):
+    """
+    Counters of a `BoundedExecutor`.
+
+    Attributes:
+        submitted: Number of calls submitted.
+        started: Number of calls started by a worker.
+        completed: Number of calls finished, successfully or not.
+        throttled: Number of calls that waited for a place in the queue.
+        waiting: Number of callers currently waiting for a place in the
+            queue.
+        queue_depth: Number of calls currently queued for a worker.
+        max_queue_depth: Highest queue depth seen.
+        total_wait_time: Sum of the times between submitting a call and a
+            worker starting it, in seconds.
+        max_wait_time: Longest time between submitting a call and a worker
+            starting it, in seconds.
+    """
+    submitted: int = 0
+    started: int = 0
+    completed: int = 0
+    throttled: int = 0
+    waiting: int = 0
+    queue_depth: int = 0
+    max_queue_depth: int = 0
+    total_wait_time: float = 0.0
+    max_wait_time: float = 0.0
+
+    @property
+    def mean_wait_time(self) -> float:
+        if self.started == 0:
+            return 0.0
+        return self.total_wait_time / self.started
+
+
+class BoundedExecutor:
+    """
+    Thread pool for blocking calls made from coroutines, with a bounded
+    queue.
+
+    At most `max_workers + max_queue_size` calls are submitted at a time.
+    Once the queue is full, `run()` waits for a place in it, so a burst of
+    calls slows its callers down instead of piling up in memory.
+
+    Context variables of the caller are visible in the called function, as
+    with `asyncio.to_thread`.
+
+    Arguments:
+        config: Size, name and queue limit of the executor.
+    """
+    def __init__(self, config: Optional[ExecutorConfig] = None):
+        self.config = config or ExecutorConfig()
+        self.metrics = ExecutorMetrics()
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.config.max_workers,
+            thread_name_prefix=self.config.name
+        )
+        self._capacity = self.config.max_workers + self.config.max_queue_size
+        self._in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        # Guards the counters, which worker threads update too
+        self._lock = threading.Lock()
+
+    @property
+    def name(self) -> str:
+        return self.config.name
+
+    @staticmethod
+    def _wake(waiter: asyncio.Future) -> None:
+        if not waiter.done():
+            waiter.set_result(None)
+
+    def _wake_next(self) -> None:
+        # Called with the lock held
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.get_loop().call_soon_threadsafe(self._wake, waiter)
+                return
+
+    async def _acquire(self) -> None:
+        throttled = False
+        while True:
+            with self._lock:
+                if self._in_flight < self._capacity:
+                    self._in_flight += 1
+                    return
+
+                waiter = asyncio.get_running_loop().create_future()
+                self._waiters.append(waiter)
+                self.metrics.waiting += 1
+                if not throttled:
+                    throttled = True
+                    self.metrics.throttled += 1
+
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                with self._lock:
+                    if waiter.done() and not waiter.cancelled():
+                        # Pass the wake up on to the next caller
+                        self._wake_next()
+                raise
+            finally:
+                with self._lock:
+                    self.metrics.waiting -= 1
+                    if waiter in self._waiters:
+                        self._waiters.remove(waiter)
+
+    def _started(self, submitted_at: float) -> None:
+        wait_time = time.monotonic() - submitted_at
+        with self._lock:
+            self.metrics.started += 1
+            self.metrics.queue_depth -= 1
+            self.metrics.total_wait_time += wait_time
+            self.metrics.max_wait_time = max(
+                self.metrics.max_wait_time, wait_time
+            )
+
+    def _finished(self, future: Future) -> None:
+        # The place in the queue is only given up once the call is done,
+        # even if the caller stopped waiting for it
+        with self._lock:
+            if future.cancelled():
+                self.metrics.queue_depth -= 1
+            else:
+                self.metrics.completed += 1
+            self._in_flight -= 1
+            self._wake_next()
+
+    def _submit(self, fn: Callable, submitted_at: float) -> Future:
+        """Submits `fn()` to the pool in the context of the caller.
+
+        Called with the lock held, after a place was taken.
+        """
+        context = contextvars.copy_context()
+
+        def call():
+            self._started(submitted_at)
+            return context.run(fn)
+
+        try:
+            future = self._executor.submit(call)
+        except BaseException:
+            self._in_flight -= 1
+            self._wake_next()
+            raise
+        self.metrics.submitted += 1
+        self.metrics.queue_depth += 1
+        self.metrics.max_queue_depth = max(
+            self.metrics.max_queue_depth, self.metrics.queue_depth
+        )
+        future.add_done_callback(self._finished)
+        return future
+
+    async def run(self, fn: Callable, /, *args, **kwargs) -> Any:
+        """Runs `fn(*args, **kwargs)` in a worker thread and returns its
+        result.
+        """
+        submitted_at = time.monotonic()
+        await self._acquire()
+
+        with self._lock:
+            future = self._submit(
+                lambda: fn(*args, **kwargs), submitted_at
+            )
+
+        return await asyncio.wrap_future(future)
+
+    def map_blocking(
+            self,
+            fn: Callable[[Any], Any],
+            items,
+            limit: int) -> List[Any]:
+        """
+        Calls `fn(item)` for every item from a blocking caller, `limit`
+        calls at a time.
+
+        The calling thread processes items itself, helped by up to
+        `limit - 1` workers taken only while the executor has room. Helpers
+        that haven't started once the caller runs out of items are
+        cancelled, so a call made from a worker of the executor never
+        waits for a free worker.
+
+        Each call sees a copy of the context variables of the caller.
+
+        Returns:
+            Results, or the exceptions raised, in the order of `items`.
+        """
+        items = list(items)
+        results: List[Any] = [None] * len(items)
+        next_index = iter(range(len(items)))
+        # Guards `next_index`, which the helpers share with the caller
+        index_lock = threading.Lock()
+        context = contextvars.copy_context()
+
+        def work():
+            while True:
+                with index_lock:
+                    index = next(next_index, None)
+                if index is None:
+                    return
+                try:
+                    results[index] = context.copy().run(fn, items[index])
+                except Exception as e:
+                    results[index] = e
+
+        helpers = []
+        submitted_at = time.monotonic()
+        for _ in range(min(limit, len(items)) - 1):
+            with self._lock:
+                if self._in_flight >= self._capacity:
+                    break
+                self._in_flight += 1
+                helpers.append(self._submit(work, submitted_at))
+
+        work()
+
+        for helper in helpers:
+            if not helper.cancel():
+                helper.result()
+        return results
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+
+
+_default_executor: Optional[BoundedExecutor] = None
+_default_executor_lock = threading.Lock()
+
+
+def default_executor() -> BoundedExecutor:
+    """Returns the executor shared by everything without an executor of
+    its own.
+    """
+    global _default_executor
+    with _default_executor_lock:
+        if _default_executor is None:
+            _default_executor = BoundedExecutor()
+        return _default_executor
+
+
+
+class ThreadExecutorMixin:
+    """
+    Mixin of models running blocking calls in a `BoundedExecutor`.
+
+    Pydantic keeps private attributes in slots, so the mixin can't declare
+    them; models using it declare an `executor_config` field and a
+    `_thread_executor` private attribute.
+    """
+    executor_config: Optional[ExecutorConfig]
+    _thread_executor: Optional[BoundedExecutor]
+
+    @property
+    def thread_executor(self) -> BoundedExecutor:
+        """Executor running the blocking calls.
+
+        Created from `executor_config` on first use. Models without an
+        executor config share the default executor, unless given one with
+        `set_executor()`.
+        """
+        if self._thread_executor is None:
+            if self.executor_config is None:
+                return default_executor()
+            self._thread_executor = BoundedExecutor(self.executor_config)
+        return self._thread_executor
+
+    def set_executor(self, executor: BoundedExecutor):
+        self._thread_executor = executor
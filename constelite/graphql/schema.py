@@ -1,11 +1,13 @@
 import graphene
 from constelite.utils import all_subclasses, resolve_forward_ref
-from constelite.store.queries import PropertyQuery
+from constelite.store.queries import PropertyQuery, Projection
 from constelite.models import Relationship, StateModel, ref
 import pydantic.v1 as pydantic
 from typing import Optional, Any, Dict, Type, ForwardRef
 from aiodataloader import DataLoader
-import asyncio
+from graphql import (
+    parse, visit, Visitor, TypeInfo, TypeInfoVisitor, GraphQLError
+)
 from constelite.graphql.field_type_map import (
     convert_to_graphql_type,
     ConversionError
@@ -13,13 +15,14 @@ from constelite.graphql.field_type_map import (
 from constelite.graphql.utils import convert_model_to_query_name
 
 
-def get_dataloader(store, cls):
+def get_dataloader(store, cls, projection: Optional[Projection] = None):
     """
     Creates a dataloader for a particular store and model class.
     The dataloader function takes a list of UIDs and runs store.get for each
     Args:
         store:
         cls:
+        projection: Fields of the states to load. All fields if not given.
 
     Returns:
 
@@ -28,7 +31,7 @@ def get_dataloader(store, cls):
         refs = [
             ref(uid=uid, store=store, model=cls) for uid in uids
         ]
-        return await store.bulk_get(refs)
+        return await store.bulk_get(refs, projection=projection)
 
     return DataLoader(loading_function)
 
@@ -87,27 +90,24 @@ class GrapheneModelAttributes:
                 uids = [kwargs['uid']]
             elif 'uids' in kwargs:
                 uids = kwargs['uids']
-            elif 'guid' in kwargs:
-                uids = [
-                    await store._guid_map.get_uid(guid=kwargs['guid'],
-                                                  store=store)
-                ]
-            elif 'guids' in kwargs:
-                tasks = []
-                async with asyncio.TaskGroup() as tg:
-                    for guid in kwargs['guids']:
-                        tasks.append(
-                            tg.create_task(
-                                store._guid_map.get_uid(guid=guid, store=store)
-                            )
-                        )
-                uids = [task.result() for task in tasks]
+            elif 'guid' in kwargs or 'guids' in kwargs:
+                guids = (
+                    kwargs['guids'] if 'guids' in kwargs else [kwargs['guid']]
+                )
+                uids_by_guid = await store._guid_map.get_uids(
+                    guids=guids,
+                    store=store
+                )
+                uids = [uids_by_guid[guid] for guid in guids]
             else:
                 # It not given UIDs or GUIDs, we run a store query
                 refs = await store.query(
                     query=PropertyQuery(**kwargs),
                     include_states=True,
-                    model_name=self.cls_name
+                    model_name=self.cls_name,
+                    projection=context.get('projections', {}).get(
+                        self.cls_name
+                    )
                 )
                 # prime the dataloader with the results
                 for r in refs:
@@ -361,7 +361,52 @@ class GraphQLSchemaManager:
             self.schema = self.create_graphql_schema()
         return self.schema
 
-    def get_dataloaders(self, store):
+    def get_projections(self, query_string: str) -> Dict[str, Projection]:
+        """
+        Get the projections of the states selected in a GraphQL query.
+        Only the state fields selected anywhere in the query are loaded for
+        each StateModel subclass. Returns no projections if the query is
+        invalid, leaving the error to the query execution.
+        Args:
+            query_string:
+
+        Returns:
+            Projections by the StateModel subclass name.
+        """
+        schema = self.get_schema().graphql_schema
+
+        state_models = {
+            graphene_model.get_graphene_model_name(cls, state=True):
+                cls.__name__
+            for cls, graphene_model in self.graphene_models.items()
+        }
+        selected_fields = {
+            model_name: set() for model_name in state_models.values()
+        }
+
+        class StateFieldVisitor(Visitor):
+            def enter_field(self, node, *args):
+                parent_type = type_info.get_parent_type()
+                if parent_type is not None \
+                        and parent_type.name in state_models:
+                    selected_fields[state_models[parent_type.name]].add(
+                        node.name.value
+                    )
+
+        try:
+            document = parse(query_string)
+        except GraphQLError:
+            return {}
+
+        type_info = TypeInfo(schema)
+        visit(document, TypeInfoVisitor(type_info, StateFieldVisitor()))
+
+        return {
+            model_name: Projection(include=sorted(field_names))
+            for model_name, field_names in selected_fields.items()
+        }
+
+    def get_dataloaders(self, store, projections=None):
         """
         Get a set of dataloaders for a store.
         Should be called at the start of a GraphQL query execution, so we
@@ -369,14 +414,20 @@ class GraphQLSchemaManager:
         Creates one dataloader per StateModel subclass.
         Args:
             store:
+            projections: Projections of the loaded states by the StateModel
+                subclass name.
 
         Returns:
 
         """
+        projections = projections or {}
         dataloaders = {}
         for cls in self.graphene_models.keys():
             dataloaders[cls.__name__] = get_dataloader(
-                store=store, cls=cls)
+                store=store,
+                cls=cls,
+                projection=projections.get(cls.__name__, None)
+            )
         return dataloaders
 
 
@@ -3,10 +3,19 @@ from constelite.guid_map.sync_neo4j import NeoGUIDMap
 
 from constelite.guid_map.async_base import AsyncGUIDMap
 from constelite.guid_map.async_neo4j import AsyncNeoGUIDMap
+from constelite.guid_map.async_neo4j_driver import AsyncNeoDriverGUIDMap
+
+from constelite.guid_map.cached import (
+    CachedGUIDMap, AsyncCachedGUIDMap, GUIDCacheMetrics
+)
 
 __all__ = [
     'GUIDMap',
     'AsyncGUIDMap',
     'NeoGUIDMap',
     'AsyncNeoGUIDMap',
+    'AsyncNeoDriverGUIDMap',
+    'CachedGUIDMap',
+    'AsyncCachedGUIDMap',
+    'GUIDCacheMetrics',
 ]
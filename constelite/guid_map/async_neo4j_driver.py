@@ -0,0 +1,196 @@
+from typing import Optional, List, Dict
+
+import asyncio
+
+from uuid import uuid4
+
+from pydantic.v1 import UUID4, Field, PrivateAttr
+
+from constelite.models import UID
+from constelite.guid_map.async_base import AsyncGUIDMap
+from constelite.store import BaseStore, NeoConfig
+from constelite.store.cypher import statement, async_bootstrap_schema
+
+from neo4j import AsyncGraphDatabase, AsyncDriver, Record
+
+
+class AsyncNeoDriverGUIDMap(AsyncGUIDMap):
+    """
+    GUID map stored in Neo4j, using the async neo4j driver.
+
+    Stores entities in the same way as `AsyncNeoGUIDMap`, without running
+    blocking py2neo calls in threads. The driver keeps a pool of at most
+    `NeoConfig.max_connection_pool_size` connections.
+    """
+    config: NeoConfig
+    driver: Optional[AsyncDriver] = Field(exclude=True)
+
+    _schema_ready: bool = PrivateAttr(default=False)
+    _schema_lock: asyncio.Lock = PrivateAttr(default_factory=asyncio.Lock)
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    def __init__(self, **data):
+        super().__init__(**data)
+        self.driver = AsyncGraphDatabase.driver(
+            self.config.url,
+            auth=tuple(self.config.auth),
+            max_connection_pool_size=self.config.max_connection_pool_size
+        )
+        self._schema_ready = not self.config.bootstrap_schema
+
+    async def close(self) -> None:
+        await self.driver.close()
+
+    async def ensure_schema(self) -> None:
+        """Creates the Neo4j schema on first use, see
+        `AsyncNeofluxStore.ensure_schema`.
+        """
+        if self._schema_ready:
+            return
+        async with self._schema_lock:
+            if not self._schema_ready:
+                await async_bootstrap_schema(self.driver)
+                self._schema_ready = True
+
+    async def run(self, query: str, **parameters) -> List[Record]:
+        await self.ensure_schema()
+
+        records, _, _ = await self.driver.execute_query(
+            query,
+            parameters_=parameters
+        )
+        return records
+
+    async def evaluate(self, query: str, **parameters):
+        """Runs a statement and returns the first value of the first
+        record, if any.
+        """
+        records = await self.run(query, **parameters)
+        return records[0][0] if len(records) > 0 else None
+
+    async def get_or_create_store_node(self, store: BaseStore):
+        return await self.evaluate(
+            statement('merge_store'),
+            store_uid=str(store.uid)
+        )
+
+    async def guid_exists(self, guid: UUID4) -> bool:
+        return await self.evaluate(
+            statement('guid_exists'),
+            guid=str(guid)
+        )
+
+    async def get_guid(self, uid: UID, store: BaseStore) -> Optional[UUID4]:
+        guid = await self.evaluate(
+            statement('get_guid'),
+            store_uid=str(store.uid),
+            uid=str(uid)
+        )
+
+        if guid is not None:
+            return UUID4(guid)
+        else:
+            return None
+
+    async def get_guids(
+            self,
+            uids: List[UID],
+            store: BaseStore
+    ) -> Dict[UID, Optional[UUID4]]:
+        guids = {uid: None for uid in uids}
+        records = await self.run(
+            statement('get_guids'),
+            store_uid=str(store.uid),
+            uids=[str(uid) for uid in guids]
+        )
+
+        for record in records:
+            guids[record['uid']] = UUID4(record['guid'])
+        return guids
+
+    async def get_or_create_guids(
+            self,
+            uids: List[UID],
+            store: BaseStore
+    ) -> Dict[UID, UUID4]:
+        records = await self.run(
+            statement('get_or_create_guids'),
+            store_uid=str(store.uid),
+            records=[
+                {'uid': str(uid), 'guid': str(uuid4())}
+                for uid in dict.fromkeys(uids)
+            ]
+        )
+
+        return {record['uid']: UUID4(record['guid']) for record in records}
+
+    async def link_uid(self, uid, guid: UUID4, store: BaseStore) -> None:
+        linked_guid = await self.evaluate(
+            statement('link_uid'),
+            guid=str(guid),
+            store_uid=str(store.uid),
+            uid=str(uid)
+        )
+
+        if linked_guid is None:
+            raise ValueError(f'Could not find entity {guid} in the guid map')
+
+    async def create_guid(self, uid: UID, store: BaseStore) -> UUID4:
+        guid = str(uuid4())
+
+        await self.run(
+            statement('create_guid'),
+            guid=guid,
+            store_uid=str(store.uid),
+            uid=str(uid)
+        )
+
+        return UUID4(guid)
+
+    async def create_guids(
+            self,
+            uids: List[UID],
+            store: BaseStore
+    ) -> Dict[UID, UUID4]:
+        guids = {uid: uuid4() for uid in uids}
+
+        await self.run(
+            statement('create_guids'),
+            store_uid=str(store.uid),
+            records=[
+                {'uid': str(uid), 'guid': str(guid)}
+                for uid, guid in guids.items()
+            ]
+        )
+
+        return guids
+
+    async def get_uid(self, guid: UUID4, store: BaseStore):
+        return await self.evaluate(
+            statement('get_uid'),
+            store_uid=str(store.uid),
+            guid=str(guid)
+        )
+
+    async def get_uids(
+            self,
+            guids: List[UUID4],
+            store: BaseStore
+    ) -> Dict[UUID4, Optional[UID]]:
+        records = await self.run(
+            statement('get_uids'),
+            store_uid=str(store.uid),
+            guids=[str(guid) for guid in dict.fromkeys(guids)]
+        )
+
+        by_guid = {record['guid']: record['uid'] for record in records}
+        return {guid: by_guid.get(str(guid), None) for guid in guids}
+
+    async def delete_uid(self, uid: UID, store: "BaseStore"):
+        await self.run(
+            statement('delete_uid'),
+            store_uid=str(store.uid),
+            uid=str(uid)
+        )
@@ -0,0 +1,506 @@
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+import threading
+import time
+
+from collections import OrderedDict
+from uuid import UUID
+
+from pydantic.v1 import UUID4, BaseModel, PrivateAttr
+
+from constelite.models import UID
+from constelite.guid_map.sync_base import GUIDMap
+from constelite.guid_map.async_base import AsyncGUIDMap
+
+
+MISSING = object()
+
+
+class GUIDCacheMetrics(BaseModel):
+    """
+    Counters of a cached GUID map.
+
+    Attributes:
+        hits: Number of lookups served from the cache.
+        misses: Number of lookups sent to the wrapped map.
+        evictions: Number of entries dropped to stay within the size limit.
+    """
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+
+class GUIDCache:
+    """
+    LRU cache of the (store uid, uid) <-> guid mappings of a GUID map.
+
+    Found mappings are kept until evicted, as guids never change once
+    created. Lookups that found nothing are kept for `negative_ttl`
+    seconds only, so records linked by other processes are picked up.
+
+    UUIDs in keys are converted to strings, so a guid and its string form
+    find the same entry. All operations hold a lock, so the cache can be
+    shared by the worker threads of a store.
+    """
+    def __init__(self, max_entries: int, negative_ttl: float):
+        self.max_entries = max_entries
+        self.negative_ttl = negative_ttl
+        self.metrics = GUIDCacheMetrics()
+        self._entries: OrderedDict[
+            Hashable, Tuple[Any, Optional[float]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(key: Tuple) -> Tuple:
+        return tuple(
+            str(part) if isinstance(part, UUID) else part for part in key
+        )
+
+    def get(self, key: Tuple) -> Any:
+        """Returns a cached value or `MISSING`.
+        """
+        key = self._key(key)
+        with self._lock:
+            entry = self._entries.get(key, None)
+            if entry is not None and entry[1] is not None \
+                    and entry[1] < time.monotonic():
+                del self._entries[key]
+                entry = None
+
+            if entry is None:
+                self.metrics.misses += 1
+                return MISSING
+
+            self._entries.move_to_end(key)
+            self.metrics.hits += 1
+            return entry[0]
+
+    def set(self, key: Tuple, value: Any) -> None:
+        """Caches a value. `None` and `False` are cached for `negative_ttl`
+        seconds only.
+        """
+        with self._lock:
+            self._set(self._key(key), value)
+
+    def _set(self, key: Tuple, value: Any) -> None:
+        expires = None
+        if value is None or value is False:
+            if self.negative_ttl <= 0:
+                self._entries.pop(key, None)
+                return
+            expires = time.monotonic() + self.negative_ttl
+
+        self._entries[key] = (value, expires)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            evicted_key, (evicted_value, _) = self._entries.popitem(
+                last=False
+            )
+            self.metrics.evictions += 1
+            # Mappings are evicted in pairs, so a record is never found in
+            # one direction only
+            if evicted_value is not None and evicted_key[0] == 'guid':
+                self._pop(('uid', evicted_key[1], evicted_value))
+            elif evicted_value is not None and evicted_key[0] == 'uid':
+                self._pop(('guid', evicted_key[1], evicted_value))
+
+    def pop(self, key: Tuple) -> Any:
+        with self._lock:
+            return self._pop(key)
+
+    def _pop(self, key: Tuple) -> Any:
+        entry = self._entries.pop(self._key(key), None)
+        return entry[0] if entry is not None else None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def set_link(self, store_uid: UUID4, uid: UID, guid: UUID4) -> None:
+        with self._lock:
+            self._set(self._key(('guid', store_uid, uid)), guid)
+            self._set(self._key(('uid', store_uid, guid)), uid)
+            self._set(self._key(('exists', guid)), True)
+
+    def drop_uid(self, store_uid: UUID4, uid: UID, guid: Optional[UUID4]):
+        """Drops the mappings of a record in both directions.
+        """
+        with self._lock:
+            cached_guid = self._pop(('guid', store_uid, uid))
+            for key_guid in {guid, cached_guid} - {None}:
+                self._pop(('uid', store_uid, key_guid))
+
+    def drop_guid(self, store_uid: UUID4, guid: UUID4) -> None:
+        """Drops the mappings of an entity in the store in both directions.
+        """
+        with self._lock:
+            cached_uid = self._pop(('uid', store_uid, guid))
+            if cached_uid is not None:
+                self._pop(('guid', store_uid, cached_uid))
+
+
+def _get_by_guid(values: Dict[UUID4, Any], guid: UUID4) -> Any:
+    """Returns the value of a guid from a result of the wrapped map, which
+    may key guids as UUIDs or strings.
+    """
+    value = values.get(guid, None)
+    if value is None:
+        value = values.get(str(guid), None)
+    if value is None and isinstance(guid, str):
+        try:
+            value = values.get(UUID(guid), None)
+        except ValueError:
+            pass
+    return value
+
+
+class CachedGUIDMap(GUIDMap):
+    """
+    Caching decorator of a `GUIDMap`.
+
+    Keeps the mappings returned by the wrapped map in a `GUIDCache`, so
+    lookups of recently used records don't reach the map. `link_uid` and
+    `delete_uid` drop the affected mappings. Changes made to the map
+    other than through the decorator are seen only once their entries
+    are evicted, or after `negative_ttl` for lookups that found nothing.
+
+    Arguments:
+        guid_map: GUID map to cache.
+        max_entries: Limit of the number of cached mappings.
+        negative_ttl: Time to live of lookups that found nothing, in
+            seconds.
+    """
+    max_entries: int = 100_000
+    negative_ttl: float = 5.0
+
+    _guid_map: GUIDMap = PrivateAttr()
+    _cache: GUIDCache = PrivateAttr()
+
+    def __init__(self, guid_map: GUIDMap, **data):
+        super().__init__(**data)
+        self._guid_map = guid_map
+        self._cache = GUIDCache(
+            max_entries=self.max_entries,
+            negative_ttl=self.negative_ttl
+        )
+
+    @property
+    def guid_map(self) -> GUIDMap:
+        return self._guid_map
+
+    @property
+    def metrics(self) -> GUIDCacheMetrics:
+        return self._cache.metrics
+
+    def clear(self) -> None:
+        """Drops all cached mappings.
+        """
+        self._cache.clear()
+
+    def get_guid(self, uid: UID, store: "BaseStore") -> Optional[UUID4]:
+        guid = self._cache.get(('guid', store.uid, uid))
+        if guid is MISSING:
+            guid = self._guid_map.get_guid(uid=uid, store=store)
+            if guid is None:
+                self._cache.set(('guid', store.uid, uid), None)
+            else:
+                self._cache.set_link(store.uid, uid, guid)
+        return guid
+
+    def get_guids(
+            self,
+            uids: List[UID],
+            store: "BaseStore"
+    ) -> Dict[UID, Optional[UUID4]]:
+        guids = {
+            uid: self._cache.get(('guid', store.uid, uid)) for uid in uids
+        }
+        missing_uids = [
+            uid for uid, guid in guids.items() if guid is MISSING
+        ]
+        if missing_uids:
+            found = self._guid_map.get_guids(uids=missing_uids, store=store)
+            for uid in missing_uids:
+                guid = found.get(uid, None)
+                guids[uid] = guid
+                if guid is None:
+                    self._cache.set(('guid', store.uid, uid), None)
+                else:
+                    self._cache.set_link(store.uid, uid, guid)
+        return guids
+
+    def guid_exists(self, guid: UUID4) -> bool:
+        exists = self._cache.get(('exists', guid))
+        if exists is MISSING:
+            exists = self._guid_map.guid_exists(guid=guid)
+            self._cache.set(('exists', guid), exists)
+        return exists
+
+    def link_uid(self, uid: UID, guid: UUID4, store: "BaseStore") -> None:
+        self._cache.drop_guid(store.uid, guid)
+        self._cache.drop_uid(store.uid, uid, guid)
+        self._guid_map.link_uid(uid=uid, guid=guid, store=store)
+        self._cache.set_link(store.uid, uid, guid)
+
+    def create_guid(self, uid: UID, store: "BaseStore") -> UUID4:
+        guid = self._guid_map.create_guid(uid=uid, store=store)
+        self._cache.set_link(store.uid, uid, guid)
+        return guid
+
+    def create_guids(
+            self,
+            uids: List[UID],
+            store: "BaseStore"
+    ) -> Dict[UID, UUID4]:
+        guids = self._guid_map.create_guids(uids=uids, store=store)
+        for uid, guid in guids.items():
+            self._cache.set_link(store.uid, uid, guid)
+        return guids
+
+    def get_or_create_guids(
+            self,
+            uids: List[UID],
+            store: "BaseStore"
+    ) -> Dict[UID, UUID4]:
+        guids = {
+            uid: self._cache.get(('guid', store.uid, uid)) for uid in uids
+        }
+        # Negative entries are not trusted here, as the map may create
+        # entities for them
+        missing_uids = [
+            uid for uid, guid in guids.items()
+            if guid is None or guid is MISSING
+        ]
+        if missing_uids:
+            found = self._guid_map.get_or_create_guids(
+                uids=missing_uids,
+                store=store
+            )
+            for uid, guid in found.items():
+                guids[uid] = guid
+                self._cache.set_link(store.uid, uid, guid)
+        return guids
+
+    def get_uid(self, guid: UUID4, store: "BaseStore") -> Optional[UID]:
+        uid = self._cache.get(('uid', store.uid, guid))
+        if uid is MISSING:
+            uid = self._guid_map.get_uid(guid=guid, store=store)
+            if uid is None:
+                self._cache.set(('uid', store.uid, guid), None)
+            else:
+                self._cache.set_link(store.uid, uid, guid)
+        return uid
+
+    def get_uids(
+            self,
+            guids: List[UUID4],
+            store: "BaseStore"
+    ) -> Dict[UUID4, Optional[UID]]:
+        uids = {
+            guid: self._cache.get(('uid', store.uid, guid)) for guid in guids
+        }
+        missing_guids = [
+            guid for guid, uid in uids.items() if uid is MISSING
+        ]
+        if missing_guids:
+            found = self._guid_map.get_uids(guids=missing_guids, store=store)
+            for guid in missing_guids:
+                uid = _get_by_guid(found, guid)
+                uids[guid] = uid
+                if uid is None:
+                    self._cache.set(('uid', store.uid, guid), None)
+                else:
+                    self._cache.set_link(store.uid, uid, guid)
+        return uids
+
+    def delete_uid(self, uid: UID, store: "BaseStore") -> None:
+        try:
+            self._guid_map.delete_uid(uid=uid, store=store)
+        finally:
+            self._cache.drop_uid(store.uid, uid, None)
+
+
+class AsyncCachedGUIDMap(AsyncGUIDMap):
+    """
+    Caching decorator of an `AsyncGUIDMap`.
+
+    Keeps the mappings returned by the wrapped map in a `GUIDCache`, so
+    lookups of recently used records don't reach the map. `link_uid` and
+    `delete_uid` drop the affected mappings. Changes made to the map
+    other than through the decorator are seen only once their entries
+    are evicted, or after `negative_ttl` for lookups that found nothing.
+
+    Arguments:
+        guid_map: GUID map to cache.
+        max_entries: Limit of the number of cached mappings.
+        negative_ttl: Time to live of lookups that found nothing, in
+            seconds.
+    """
+    max_entries: int = 100_000
+    negative_ttl: float = 5.0
+
+    _guid_map: AsyncGUIDMap = PrivateAttr()
+    _cache: GUIDCache = PrivateAttr()
+
+    def __init__(self, guid_map: AsyncGUIDMap, **data):
+        super().__init__(**data)
+        self._guid_map = guid_map
+        self._cache = GUIDCache(
+            max_entries=self.max_entries,
+            negative_ttl=self.negative_ttl
+        )
+
+    @property
+    def guid_map(self) -> AsyncGUIDMap:
+        return self._guid_map
+
+    @property
+    def metrics(self) -> GUIDCacheMetrics:
+        return self._cache.metrics
+
+    def clear(self) -> None:
+        """Drops all cached mappings.
+        """
+        self._cache.clear()
+
+    async def get_guid(
+            self,
+            uid: UID,
+            store: "BaseStore"
+    ) -> Optional[UUID4]:
+        guid = self._cache.get(('guid', store.uid, uid))
+        if guid is MISSING:
+            guid = await self._guid_map.get_guid(uid=uid, store=store)
+            if guid is None:
+                self._cache.set(('guid', store.uid, uid), None)
+            else:
+                self._cache.set_link(store.uid, uid, guid)
+        return guid
+
+    async def get_guids(
+            self,
+            uids: List[UID],
+            store: "BaseStore"
+    ) -> Dict[UID, Optional[UUID4]]:
+        guids = {
+            uid: self._cache.get(('guid', store.uid, uid)) for uid in uids
+        }
+        missing_uids = [
+            uid for uid, guid in guids.items() if guid is MISSING
+        ]
+        if missing_uids:
+            found = await self._guid_map.get_guids(
+                uids=missing_uids,
+                store=store
+            )
+            for uid in missing_uids:
+                guid = found.get(uid, None)
+                guids[uid] = guid
+                if guid is None:
+                    self._cache.set(('guid', store.uid, uid), None)
+                else:
+                    self._cache.set_link(store.uid, uid, guid)
+        return guids
+
+    async def guid_exists(self, guid: UUID4) -> bool:
+        exists = self._cache.get(('exists', guid))
+        if exists is MISSING:
+            exists = await self._guid_map.guid_exists(guid=guid)
+            self._cache.set(('exists', guid), exists)
+        return exists
+
+    async def link_uid(
+            self,
+            uid: UID,
+            guid: UUID4,
+            store: "BaseStore"
+    ) -> None:
+        self._cache.drop_guid(store.uid, guid)
+        self._cache.drop_uid(store.uid, uid, guid)
+        await self._guid_map.link_uid(uid=uid, guid=guid, store=store)
+        self._cache.set_link(store.uid, uid, guid)
+
+    async def create_guid(self, uid: UID, store: "BaseStore") -> UUID4:
+        guid = await self._guid_map.create_guid(uid=uid, store=store)
+        self._cache.set_link(store.uid, uid, guid)
+        return guid
+
+    async def create_guids(
+            self,
+            uids: List[UID],
+            store: "BaseStore"
+    ) -> Dict[UID, UUID4]:
+        guids = await self._guid_map.create_guids(uids=uids, store=store)
+        for uid, guid in guids.items():
+            self._cache.set_link(store.uid, uid, guid)
+        return guids
+
+    async def get_or_create_guids(
+            self,
+            uids: List[UID],
+            store: "BaseStore"
+    ) -> Dict[UID, UUID4]:
+        guids = {
+            uid: self._cache.get(('guid', store.uid, uid)) for uid in uids
+        }
+        # Negative entries are not trusted here, as the map may create
+        # entities for them
+        missing_uids = [
+            uid for uid, guid in guids.items()
+            if guid is None or guid is MISSING
+        ]
+        if missing_uids:
+            found = await self._guid_map.get_or_create_guids(
+                uids=missing_uids,
+                store=store
+            )
+            for uid, guid in found.items():
+                guids[uid] = guid
+                self._cache.set_link(store.uid, uid, guid)
+        return guids
+
+    async def get_uid(
+            self,
+            guid: UUID4,
+            store: "BaseStore"
+    ) -> Optional[UID]:
+        uid = self._cache.get(('uid', store.uid, guid))
+        if uid is MISSING:
+            uid = await self._guid_map.get_uid(guid=guid, store=store)
+            if uid is None:
+                self._cache.set(('uid', store.uid, guid), None)
+            else:
+                self._cache.set_link(store.uid, uid, guid)
+        return uid
+
+    async def get_uids(
+            self,
+            guids: List[UUID4],
+            store: "BaseStore"
+    ) -> Dict[UUID4, Optional[UID]]:
+        uids = {
+            guid: self._cache.get(('uid', store.uid, guid)) for guid in guids
+        }
+        missing_guids = [
+            guid for guid, uid in uids.items() if uid is MISSING
+        ]
+        if missing_guids:
+            found = await self._guid_map.get_uids(
+                guids=missing_guids,
+                store=store
+            )
+            for guid in missing_guids:
+                uid = _get_by_guid(found, guid)
+                uids[guid] = uid
+                if uid is None:
+                    self._cache.set(('uid', store.uid, guid), None)
+                else:
+                    self._cache.set_link(store.uid, uid, guid)
+        return uids
+
+    async def delete_uid(self, uid: UID, store: "BaseStore") -> None:
+        try:
+            await self._guid_map.delete_uid(uid=uid, store=store)
+        finally:
+            self._cache.drop_uid(store.uid, uid, None)
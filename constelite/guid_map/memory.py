@@ -1,4 +1,6 @@
-from pydantic.v1 import UUID4
+from typing import Dict, List, Optional, Tuple
+
+from pydantic.v1 import UUID4, PrivateAttr
 
 from uuid import uuid4
 
@@ -8,17 +10,36 @@ from constelite.models import UID
 class MemoryGUID(AsyncGUIDMap):
 
     guid_map: dict[UUID4, dict[str, UUID4]] = {}
-    
+
+    # Reverse index of the map, (store uid, record uid) -> guid
+    _uid_index: Dict[Tuple[UUID4, UID], UUID4] = PrivateAttr(
+        default_factory=dict
+    )
+
+    def __init__(self, **data):
+        super().__init__(**data)
+        for guid, guid_record in self.guid_map.items():
+            for store_uid, record_uid in guid_record.items():
+                self._uid_index[(store_uid, record_uid)] = guid
+
     async def get_guid(self, uid: UID, store: "BaseStore") -> UUID4 | None:
         """Finds entity by given uid in the given store and returns its
         guid.
         """
-        for guid, guid_record in self.guid_map.items():
-            for store_uid, record_uid in guid_record.items():
-                if store_uid == store.uid and record_uid == uid:
-                    return guid
-        return None
-        
+        return self._uid_index.get((store.uid, uid), None)
+
+    async def get_guids(
+            self,
+            uids: List[UID],
+            store: "BaseStore"
+    ) -> Dict[UID, Optional[UUID4]]:
+        """Finds entities by several uids in the given store.
+        """
+        return {
+            uid: self._uid_index.get((store.uid, uid), None)
+            for uid in uids
+        }
+
     async def guid_exists(self, guid: UUID4) -> bool:
         """Checks if entity with the given guid exists in the map.
 
@@ -32,7 +53,11 @@ class MemoryGUID(AsyncGUIDMap):
         """Links store record with given uid in the given store with an
         existing entity with the given guid.
         """
+        old_uid = self.guid_map[guid].get(store.uid, None)
+        if old_uid is not None:
+            self._uid_index.pop((store.uid, old_uid), None)
         self.guid_map[guid].update({store.uid: uid})
+        self._uid_index[(store.uid, uid)] = guid
 
     async def create_guid(self, uid: UID, store: "BaseStore") -> UUID4:
         """Creates a new entity, links it with a store record with the
@@ -43,8 +68,21 @@ class MemoryGUID(AsyncGUIDMap):
         """
         new_guid = uuid4()
         self.guid_map[new_guid] = {store.uid: uid}
+        self._uid_index[(store.uid, uid)] = new_guid
         return new_guid
 
+    async def create_guids(
+            self,
+            uids: List[UID],
+            store: "BaseStore"
+    ) -> Dict[UID, UUID4]:
+        """Creates a new entity for each of the uids in the given store.
+
+        Returns:
+            GUIDs of the new entities by uid.
+        """
+        return {uid: await self.create_guid(uid, store) for uid in uids}
+
     async def get_uid(self, guid: UUID4, store: "BaseStore") -> UID:
         """Gets uid of the record that corresponds to the entity with the
         given guid in the given store.
@@ -54,13 +92,6 @@ class MemoryGUID(AsyncGUIDMap):
     async def delete_uid(self, uid: UID, store: "BaseStore") -> None:
         """Deletes store record with the given uid and store from the map.
         """
-
-        for guid, guid_record in self.guid_map.items():
-            found_guid = False
-            for store_uid, record_uid in guid_record.items():
-                if store_uid == store.uid and record_uid == uid:
-                    found_guid = True
-                    break
-            if found_guid:
-                guid_record.pop(store.uid)
-                break
\ No newline at end of file
+        guid = self._uid_index.pop((store.uid, uid), None)
+        if guid is not None:
+            self.guid_map[guid].pop(store.uid, None)
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Optional, List, Dict
 
 from pydantic.v1 import UUID4, BaseModel
 
@@ -27,6 +27,24 @@ class GUIDMap(BaseModel):
         """
         raise NotImplementedError
 
+    def get_guids(
+            self,
+            uids: List[UID],
+            store: "BaseStore"
+    ) -> Dict[UID, Optional[UUID4]]:
+        """Finds entities by several uids in the given store.
+
+        Falls back to `get_guid` per uid. Maps that can look up many uids
+        in one operation should override it.
+
+        Returns:
+            GUIDs by uid, `None` for uids without an entity.
+        """
+        return {
+            uid: self.get_guid(uid=uid, store=store)
+            for uid in uids
+        }
+
     def create_guid(self, uid: UID, store: "BaseStore") -> UUID4:
         """Creates a new entity, links it with a store record with the
         given uid in the given store.
@@ -36,12 +54,70 @@ class GUIDMap(BaseModel):
         """
         raise NotImplementedError
 
+    def create_guids(
+            self,
+            uids: List[UID],
+            store: "BaseStore"
+    ) -> Dict[UID, UUID4]:
+        """Creates a new entity for each of the uids in the given store.
+
+        Falls back to `create_guid` per uid. Maps that can create many
+        entities in one operation should override it.
+
+        Returns:
+            GUIDs of the new entities by uid.
+        """
+        return {
+            uid: self.create_guid(uid=uid, store=store)
+            for uid in uids
+        }
+
+    def get_or_create_guids(
+            self,
+            uids: List[UID],
+            store: "BaseStore"
+    ) -> Dict[UID, UUID4]:
+        """Finds entities by several uids in the given store, creating
+        new entities for the uids that are not in the map.
+
+        Falls back to `get_guids` followed by `create_guids` for the
+        missing uids.
+
+        Returns:
+            GUIDs by uid.
+        """
+        guids = self.get_guids(uids=uids, store=store)
+        missing_uids = [uid for uid, guid in guids.items() if guid is None]
+        if missing_uids:
+            guids.update(
+                self.create_guids(uids=missing_uids, store=store)
+            )
+        return guids
+
     def get_uid(self, guid: UUID4, store: "BaseStore") -> UID:
         """Gets uid of the record that corresponds to the entity with the
         given guid in the given store.
         """
         raise NotImplementedError
 
+    def get_uids(
+            self,
+            guids: List[UUID4],
+            store: "BaseStore"
+    ) -> Dict[UUID4, Optional[UID]]:
+        """Gets uids of the records that correspond to several entities in
+        the given store.
+
+        Falls back to `get_uid` per guid.
+
+        Returns:
+            Uids by guid, `None` for entities without a record in the store.
+        """
+        return {
+            guid: self.get_uid(guid=guid, store=store)
+            for guid in guids
+        }
+
     def delete_uid(self, uid: UID, store: "BaseStore") -> None:
         """Deletes store record with the given uid and store from the map.
         """
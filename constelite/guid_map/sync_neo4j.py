@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Optional, List, Dict
 
 from uuid import uuid4
 
@@ -7,13 +7,11 @@ from pydantic.v1 import UUID4, Field
 from constelite.models import UID
 from constelite.guid_map.sync_base import GUIDMap
 from constelite.store import BaseStore, NeoConfig
+from constelite.store.cypher import (
+    STORE_LABEL, ENTITY_LABEL, STORED_REL_LABEL, statement, bootstrap_schema
+)
 
-from py2neo import Graph, Node, Relationship
-
-
-STORE_LABEL = "_Store"
-ENTITY_LABEL = "_Entity"
-STORED_REL_LABEL = "_STORED_IN"
+from py2neo import Graph
 
 
 class NeoGUIDMap(GUIDMap):
@@ -26,36 +24,26 @@ class NeoGUIDMap(GUIDMap):
     def __init__(self, **data):
         super().__init__(**data)
         self.graph = Graph(self.config.url, auth=self.config.auth)
+        if self.config.bootstrap_schema:
+            bootstrap_schema(self.graph)
 
     def get_or_create_store_node(self, store: BaseStore):
-        store_uid = str(store.uid)
-
-        store_node = self.graph.nodes.match(
-            STORE_LABEL,
-            uid=store_uid
-        ).first()
-
-        if store_node is None:
-            store_node = Node(STORE_LABEL, uid=store_uid)
-            tx = self.graph.begin()
-            tx.create(store_node)
-            self.graph.commit(tx)
-
-        return store_node
+        return self.graph.run(
+            statement('merge_store'),
+            store_uid=str(store.uid)
+        ).evaluate()
 
     def guid_exists(self, guid: UUID4) -> bool:
-        entity_node = self.graph.nodes.match(
-            ENTITY_LABEL,
+        return self.graph.run(
+            statement('guid_exists'),
             guid=str(guid)
-        ).first()
-
-        return entity_node is not None
+        ).evaluate()
 
     def get_guid(self, uid: UID, store: BaseStore) -> Optional[UUID4]:
         guid = self.graph.run(
-            f"MATCH (s:{STORE_LABEL} {{uid: \"{store.uid}\"}})"
-            f"<-[r {{uid: \"{uid}\"}}]-(e:{ENTITY_LABEL})"
-            f"RETURN e.guid"
+            statement('get_guid'),
+            store_uid=str(store.uid),
+            uid=str(uid)
         ).evaluate()
 
         if guid is not None:
@@ -63,53 +51,104 @@ class NeoGUIDMap(GUIDMap):
         else:
             return None
 
+    def get_guids(
+            self,
+            uids: List[UID],
+            store: BaseStore
+    ) -> Dict[UID, Optional[UUID4]]:
+        guids = {uid: None for uid in uids}
+        records = self.graph.run(
+            statement('get_guids'),
+            store_uid=str(store.uid),
+            uids=[str(uid) for uid in guids]
+        ).data()
+
+        for record in records:
+            guids[record['uid']] = UUID4(record['guid'])
+        return guids
+
+    def get_or_create_guids(
+            self,
+            uids: List[UID],
+            store: BaseStore
+    ) -> Dict[UID, UUID4]:
+        records = self.graph.run(
+            statement('get_or_create_guids'),
+            store_uid=str(store.uid),
+            records=[
+                {'uid': str(uid), 'guid': str(uuid4())}
+                for uid in dict.fromkeys(uids)
+            ]
+        ).data()
+
+        return {record['uid']: UUID4(record['guid']) for record in records}
+
     def link_uid(self, uid, guid: UUID4, store: BaseStore) -> None:
-        store_node = self.get_or_create_store_node(store=store)
-        entity_node = self.graph.nodes.match(
-            ENTITY_LABEL,
-            guid=str(guid)
-        ).first()
+        linked_guid = self.graph.run(
+            statement('link_uid'),
+            guid=str(guid),
+            store_uid=str(store.uid),
+            uid=str(uid)
+        ).evaluate()
 
-        if entity_node is None:
+        if linked_guid is None:
             raise ValueError(f'Could not find entity {guid} in the guid map')
 
-        rel = Relationship(
-            entity_node,
-            STORED_REL_LABEL,
-            store_node,
-            uid=uid
-        )
-        tx = self.graph.begin()
-        tx.create(rel)
-        self.graph.commit(tx)
-
     def create_guid(self, uid: UID, store: BaseStore) -> UUID4:
-        store_node = self.get_or_create_store_node(store=store)
+        guid = str(uuid4())
 
-        entity_node = Node(ENTITY_LABEL, guid=str(uuid4()))
-        rel = Relationship(
-            entity_node,
-            STORED_REL_LABEL,
-            store_node,
+        self.graph.run(
+            statement('create_guid'),
+            guid=guid,
+            store_uid=str(store.uid),
             uid=str(uid)
         )
-        tx = self.graph.begin()
-        tx.create(entity_node)
-        tx.create(rel)
-        self.graph.commit(tx)
 
-        return UUID4(entity_node['guid'])
+        return UUID4(guid)
+
+    def create_guids(
+            self,
+            uids: List[UID],
+            store: BaseStore
+    ) -> Dict[UID, UUID4]:
+        guids = {uid: uuid4() for uid in uids}
+
+        self.graph.run(
+            statement('create_guids'),
+            store_uid=str(store.uid),
+            records=[
+                {'uid': str(uid), 'guid': str(guid)}
+                for uid, guid in guids.items()
+            ]
+        )
+
+        return guids
 
     def get_uid(self, guid: UUID4, store: BaseStore):
         return self.graph.run(
-            f"MATCH (s:{STORE_LABEL} {{uid: \"{store.uid}\"}})"
-            f"<-[r]-(e:{ENTITY_LABEL} {{guid: \"{str(guid)}\"}})"
-            f"RETURN r.uid"
+            statement('get_uid'),
+            store_uid=str(store.uid),
+            guid=str(guid)
         ).evaluate()
 
+    def get_uids(
+            self,
+            guids: List[UUID4],
+            store: BaseStore
+    ) -> Dict[UUID4, Optional[UID]]:
+        uids = {guid: None for guid in guids}
+        records = self.graph.run(
+            statement('get_uids'),
+            store_uid=str(store.uid),
+            guids=[str(guid) for guid in uids]
+        ).data()
+
+        by_guid = {record['guid']: record['uid'] for record in records}
+        return {guid: by_guid.get(str(guid), None) for guid in uids}
+
     def delete_uid(self, uid: UID, store: "BaseStore"):
         self.graph.run(
-            f"MATCH (s:{STORE_LABEL} {{uid: \"{store.uid}\"}})"
-            f"<-[r {{uid: \"{uid}\"}}]-(e:{ENTITY_LABEL})"
-            f"DELETE r"
+            statement('delete_uid'),
+            store_uid=str(store.uid),
+            uid=str(uid)
         )
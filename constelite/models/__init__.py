@@ -18,7 +18,7 @@ from constelite.models.relationships import (
 )
 
 from constelite.models.inspector import (
-    StateInspector, RelInspector, StaticTypes
+    StateInspector, RelInspector, StaticTypes, InspectionPlan
 )
 
 from constelite.models.resolve import get_auto_resolve_model, resolve_model
@@ -48,5 +48,6 @@ __all__ = [
     'backref',
     'StateInspector',
     'RelInspector',
+    'InspectionPlan',
     'StaticTypes'
 ]
@@ -1,9 +1,16 @@
 from typing import Optional, Type
 from pydantic.v1 import BaseModel, root_validator, Extra
 
+from constelite.utils import subclass_registry
+
+
 class AutoResolveBaseModel(BaseModel, extra=Extra.allow):
     model_name: Optional[str] = None
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        subclass_registry.register(cls)
+
     @root_validator()
     def assign_model(cls, values):
         model_name = values.get('model_name', None)
@@ -11,6 +18,10 @@ class AutoResolveBaseModel(BaseModel, extra=Extra.allow):
         values['model_name'] = model_name or cls.__name__
         return values
 
+
+subclass_registry.track(AutoResolveBaseModel)
+
+
 class FlexibleModel(BaseModel, extra=Extra.allow):
     """Flexibe model.
 
@@ -1,9 +1,11 @@
-import datetime
+from typing import TypeVar, Generic, List, Type, Optional, Sequence
+from collections.abc import MutableSequence
+import copy
 
-from typing import TypeVar, Generic, List, Type
-from pydantic.v1 import validator
+from pydantic.v1 import BaseModel, validator
 from pydantic.v1.generics import GenericModel
 
+import numpy as np
 import pandera as pa
 import pandas as pd
 
@@ -29,9 +31,152 @@ class TimePoint(GenericModel, Generic[V]):
         return v
 
 
+class ColumnarPoints(MutableSequence):
+    """
+    Points of a dynamic stored as parallel timestamp and value columns.
+
+    `TimePoint` objects are only created when accessed. Modifying the
+    sequence converts it into a list of points.
+    """
+    def __init__(
+            self,
+            point_cls: Type[TimePoint],
+            timestamps: np.ndarray,
+            values: Sequence):
+        self.point_cls = point_cls
+        self.timestamps = timestamps
+        self.values = values
+        self._points: Optional[List[TimePoint]] = None
+
+    @property
+    def is_columnar(self) -> bool:
+        return self._points is None
+
+    def _point(self, idx: int) -> TimePoint:
+        value = self.values[idx]
+        if isinstance(value, np.generic):
+            value = value.item()
+        return self.point_cls.construct(
+            timestamp=float(self.timestamps[idx]),
+            value=value
+        )
+
+    def _materialise(self) -> List[TimePoint]:
+        if self._points is None:
+            self._points = list(self)
+            self.timestamps = None
+            self.values = None
+        return self._points
+
+    def __len__(self):
+        if self._points is not None:
+            return len(self._points)
+        return len(self.timestamps)
+
+    def __getitem__(self, idx):
+        if self._points is not None:
+            return self._points[idx]
+        if isinstance(idx, slice):
+            return [self._point(i) for i in range(*idx.indices(len(self)))]
+        return self._point(range(len(self))[idx])
+
+    def __iter__(self):
+        if self._points is not None:
+            yield from self._points
+        else:
+            for idx in range(len(self)):
+                yield self._point(idx)
+
+    def __setitem__(self, idx, value):
+        self._materialise()[idx] = value
+
+    def __delitem__(self, idx):
+        del self._materialise()[idx]
+
+    def insert(self, idx, value):
+        self._materialise().insert(idx, value)
+
+    def __eq__(self, other):
+        if isinstance(other, (list, ColumnarPoints)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return repr(list(self))
+
+    def __reduce__(self):
+        return (list, (list(self),))
+
+    def __deepcopy__(self, memo):
+        # Keeps the columns rather than creating points via __reduce__
+        points = ColumnarPoints(
+            point_cls=self.point_cls,
+            timestamps=(
+                self.timestamps.copy() if self.timestamps is not None
+                else None
+            ),
+            values=copy.deepcopy(self.values, memo)
+        )
+        points._points = copy.deepcopy(self._points, memo)
+        return points
+
+    def to_dicts(self) -> List[dict]:
+        """Converts points to dictionaries as `TimePoint.dict()` would.
+        """
+        if self._points is not None:
+            return [point.dict() for point in self._points]
+
+        values = self.values
+        if isinstance(values, np.ndarray):
+            values = values.tolist()
+
+        return [
+            {
+                'timestamp': timestamp,
+                'value': (
+                    value.dict() if isinstance(value, BaseModel) else value
+                )
+            }
+            for timestamp, value in zip(self.timestamps.tolist(), values)
+        ]
+
+
+def index_to_timestamps(index: pd.Index) -> np.ndarray:
+    """Converts a datetime index into seconds since epoch.
+
+    Naive datetimes are taken to be in UTC.
+    """
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_convert('UTC').tz_localize(None)
+    return index.as_unit('ns').asi8 / 1e9
+
+
+def timestamps_to_index(timestamps: np.ndarray) -> pd.DatetimeIndex:
+    """Converts seconds since epoch into a naive UTC datetime index.
+    """
+    return pd.DatetimeIndex(
+        pd.to_datetime(
+            np.round(np.asarray(timestamps) * 1e6).astype('int64'),
+            unit='us'
+        ).as_unit('ns'),
+        name='timestamp'
+    )
+
+
 class Dynamic(GenericModel, Generic[V]):
+    """
+    A time series of values.
+
+    Dynamics created by `from_columns()` or `from_series()` keep timestamps
+    and values in columns and only create `TimePoint` objects when the
+    points are accessed.
+    """
     points: List[TimePoint[V]]
 
+    class Config:
+        json_encoders = {ColumnarPoints: ColumnarPoints.to_dicts}
+
     def __len__(self):
         return len(self.points)
 
@@ -39,24 +184,68 @@ class Dynamic(GenericModel, Generic[V]):
     def _get_point_type(cls) -> Type:
         return cls.__fields__['points'].type_._get_point_type()
 
+    @classmethod
+    def from_columns(
+            cls,
+            timestamps: Sequence[float],
+            values: Sequence) -> "Dynamic":
+        """Creates a dynamic from timestamps and values without validation.
+
+        Args:
+            timestamps: Seconds since epoch.
+            values: Values of the dynamic's point type.
+        """
+        timestamps = np.asarray(timestamps, dtype='float64')
+
+        if len(timestamps) != len(values):
+            raise ValueError(
+                f"Number of timestamps ({len(timestamps)}) does not match "
+                f"number of values ({len(values)})"
+            )
+
+        return cls.construct(
+            points=ColumnarPoints(
+                point_cls=cls.__fields__['points'].type_,
+                timestamps=timestamps,
+                values=values
+            )
+        )
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        if isinstance(self.points, ColumnarPoints) and self.points.is_columnar:
+            return self.points.timestamps
+        return np.array(
+            [point.timestamp for point in self.points],
+            dtype='float64'
+        )
+
+    @property
+    def values(self) -> Sequence:
+        if isinstance(self.points, ColumnarPoints) and self.points.is_columnar:
+            return self.points.values
+        return [point.value for point in self.points]
+
+    def dict(self, **kwargs):
+        data = super().dict(**kwargs)
+        if isinstance(data.get('points', None), ColumnarPoints):
+            data['points'] = data['points'].to_dicts()
+        return data
+
     def to_series(self):
-        times = [
-            datetime.datetime.fromtimestamp(point.timestamp)
-            for point in self.points
-        ]
-        if issubclass(self._point_type, Tensor):
-            series = [point.value.to_series() for point in self.points]
+        times = timestamps_to_index(self.timestamps)
+        values = self.values
+
+        if len(values) > 0 and isinstance(values[0], Tensor):
+            series = [value.to_series() for value in values]
             return pd.concat(series, keys=times, names=['timestamp'])
         else:
-            index = pd.Index(times, name='timestamp')
-            data = [point.value for point in self.points]
-            return pd.Series(index=index, data=data)
+            return pd.Series(index=times, data=values)
 
     @classmethod
     def from_series(cls, series: pd.Series):
         point_type = cls._get_point_type()
         if issubclass(point_type, Tensor):
-            tensor_schema_cls = point_type.schema_cls
             tensor_schema = point_type.pa_schema
 
             value_type = None
@@ -67,7 +256,7 @@ class Dynamic(GenericModel, Generic[V]):
 
                 if isinstance(tensor_schema.index, pa.MultiIndex):
                     schema_indexes = tensor_schema.index.indexes
-                elif isinstance(tensor_schema.index, pa.Indes):
+                elif isinstance(tensor_schema.index, pa.Index):
                     schema_indexes = [tensor_schema.index]
 
             schema = pa.SeriesSchema(
@@ -80,20 +269,25 @@ class Dynamic(GenericModel, Generic[V]):
 
             schema.validate(series)
 
-            datetime_index = series.index.levels[0]
+            timestamps = []
+            tensors = []
 
-            points = []
-
-            for timestamp in datetime_index:
-                tensor = Tensor[tensor_schema_cls].from_series(
-                    series[timestamp]
-                )
-                points.append(
-                    TimePoint[Tensor[tensor_schema_cls]](
-                        timestamp=timestamp.to_pydatetime().timestamp(),
-                        value=tensor
+            for timestamp, group in series.groupby(level=0, sort=True):
+                timestamps.append(timestamp)
+                # The whole series is validated already
+                tensors.append(
+                    point_type.from_series(
+                        group.droplevel(0),
+                        validate=False
                     )
                 )
-            return cls(
-                points=points
+
+            return cls.from_columns(
+                timestamps=index_to_timestamps(timestamps),
+                values=tensors
+            )
+        else:
+            return cls.from_columns(
+                timestamps=index_to_timestamps(series.index),
+                values=series.to_numpy()
             )
@@ -125,75 +125,152 @@ class RelInspector(BaseModel):
         )
 
 
-class StateInspector(BaseModel):
-    model_type: Type[StateModel]
-    static_props: Dict[str, Optional[StaticTypes]]
-    dynamic_props: Dict[str, Optional[Dynamic]]
+FieldKind = Literal[
+    'static', 'dynamic', 'association', 'aggregation', 'composition',
+    'backref'
+]
 
-    associations: Dict[str, RelInspector]
-    aggregations: Dict[str, RelInspector]
-    compositions: Dict[str, RelInspector]
-    backrefs: Dict[str, RelInspector]
+REL_KINDS = ('association', 'aggregation', 'composition', 'backref')
 
-    model: StateModel
+
+class FieldPlan(BaseModel):
+    """
+    Pre-computed inspection of a single state model field.
+
+    For relationship fields, `rel` holds a template `RelInspector` with
+    empty `to_refs`. It is built by `get_rel` when a state first has a
+    value in the field, so the related model is only resolved once it is
+    needed.
+    """
+    field_name: str
+    kind: FieldKind
+    rel: Optional[RelInspector] = None
+
+    def get_rel(self, model_type: Type[StateModel]) -> RelInspector:
+        if self.rel is None:
+            field = model_type.__fields__[self.field_name]
+            if self.kind == 'backref':
+                self.rel = RelInspector.from_backref(field=field, to_refs=[])
+            else:
+                self.rel = RelInspector.from_field(
+                    from_model_type=model_type,
+                    field=field,
+                    to_refs=[]
+                )
+        return self.rel
+
+
+class InspectionPlan(BaseModel):
+    """
+    Field classification of a state model class.
+
+    Plans are built once per model class by `InspectionPlan.for_model`
+    and reused by `StateInspector.from_state`, so inspecting a state does
+    not need to re-run type checks or backref lookups.
+    """
+    model_type: Type[StateModel]
+    fields: List[FieldPlan]
+    generation: int
 
     @classmethod
-    def from_state(cls, model: StateModel):
-        static_props = {}
-        dynamic_props = {}
-        associations = {}
-        aggregations = {}
-        compositions = {}
-        backrefs = {}
-
-        for field_name, field in model.__class__.__fields__.items():
-            value = getattr(model, field_name)
-            if value is None:
-                continue
+    def for_model(cls, model_type: Type[StateModel]) -> 'InspectionPlan':
+        # Plans are stored on the class itself (not inherited by
+        # subclasses), so they are collected together with the class.
+        plan = model_type.__dict__.get(PLAN_ATTR, None)
+        if plan is None or plan.generation != _plan_generation:
+            plan = cls.from_model(model_type)
+            setattr(model_type, PLAN_ATTR, plan)
+        return plan
+
+    @classmethod
+    def from_model(cls, model_type: Type[StateModel]) -> 'InspectionPlan':
+        fields = []
+        for field_name, field in model_type.__fields__.items():
             if not isinstance(field.type_, type):
                 # some typing types, e.g. Literal, Union are not classes in
                 # the normal sense. Cannot run issubclass.
                 # Check first and save as a static prop.
-                static_props[field_name] = value
+                kind = 'static'
             elif issubclass(field.type_, Backref):
-                backrefs[field_name] = RelInspector.from_backref(
-                    field=field,
-                    to_refs=value
-                )
+                kind = 'backref'
             elif issubclass(field.type_, Dynamic):
-                value = getattr(model, field_name)
-                dynamic_props[field_name] = value
-
+                kind = 'dynamic'
             elif issubclass(field.type_, Association):
-                associations[field_name] = RelInspector.from_field(
-                    from_model_type=type(model),
-                    field=field,
-                    to_refs=value
-                )
+                kind = 'association'
             elif issubclass(field.type_, Aggregation):
-                aggregations[field_name] = RelInspector.from_field(
-                    from_model_type=type(model),
-                    field=field,
-                    to_refs=value
-                )
+                kind = 'aggregation'
             elif issubclass(field.type_, Composition):
-                compositions[field_name] = RelInspector.from_field(
-                    from_model_type=type(model),
-                    field=field,
-                    to_refs=value
-                )
+                kind = 'composition'
             # Neoflux relies on model_name field to resolve the models
             # elif field_name != 'model_name':
             else:
-                static_props[field_name] = value
+                kind = 'static'
+
+            fields.append(FieldPlan(field_name=field_name, kind=kind))
+
+        return cls(
+            model_type=model_type,
+            fields=fields,
+            generation=_plan_generation
+        )
+
+
+PLAN_ATTR = '__inspection_plan__'
+
+_plan_generation = 0
+
+
+def clear_inspection_plans() -> None:
+    """Invalidates all cached inspection plans.
+
+    Must be called whenever model fields are modified after the class
+    creation, e.g. by `StateModel.fix_backrefs`.
+    """
+    global _plan_generation
+    _plan_generation += 1
+
+
+class StateInspector(BaseModel):
+    model_type: Type[StateModel]
+    static_props: Dict[str, Optional[StaticTypes]]
+    dynamic_props: Dict[str, Optional[Dynamic]]
+
+    associations: Dict[str, RelInspector]
+    aggregations: Dict[str, RelInspector]
+    compositions: Dict[str, RelInspector]
+    backrefs: Dict[str, RelInspector]
+
+    model: StateModel
+
+    @classmethod
+    def from_state(cls, model: StateModel):
+        props = {
+            'static': {},
+            'dynamic': {},
+            'association': {},
+            'aggregation': {},
+            'composition': {},
+            'backref': {}
+        }
+
+        plan = InspectionPlan.for_model(type(model))
+
+        for field_plan in plan.fields:
+            value = getattr(model, field_plan.field_name)
+            if value is None:
+                continue
+            if field_plan.kind in REL_KINDS:
+                rel = field_plan.get_rel(plan.model_type)
+                value = RelInspector(**(rel.__dict__ | {'to_refs': value}))
+            props[field_plan.kind][field_plan.field_name] = value
 
         return cls(
             model_type=type(model),
-            static_props=static_props,
-            dynamic_props=dynamic_props,
-            associations=associations,
-            aggregations=aggregations,
-            compositions=compositions,
-            backrefs=backrefs,
+            static_props=props['static'],
+            dynamic_props=props['dynamic'],
+            associations=props['association'],
+            aggregations=props['aggregation'],
+            compositions=props['composition'],
+            backrefs=props['backref'],
             model=model
         )
@@ -18,6 +18,7 @@ class StateModel(AutoResolveBaseModel):
         Fixes all `ForwardRef`s in the model's `Backref` fields to the actual model class.
         """
         from constelite.models.relationships import Backref
+        from constelite.models.inspector import clear_inspection_plans
 
         for _, field_info in cls.__fields__.items():
             MT = field_info.type_
@@ -27,6 +28,8 @@ class StateModel(AutoResolveBaseModel):
                     resolved_type = resolve_forward_ref(MTT, StateModel)
                     if resolved_type is not None:
                         field_info.type_ = Backref[resolved_type]
+        # Relationship inspection of any model may depend on this backref
+        clear_inspection_plans()
 
 
 def discover_models(root_module: ModuleType):
@@ -1,19 +1,11 @@
 from typing import Dict, Any, Optional, Type, TypeVar
 
-from constelite.utils import all_subclasses
+from constelite.utils import find_subclass
 from constelite.models import AutoResolveBaseModel, Ref, FlexibleModel
 
 
 def get_auto_resolve_model(model_name: str, root_cls=AutoResolveBaseModel):
-    model_type = next(
-        (
-            m for m in all_subclasses(root_cls)
-            if m.__name__ == model_name
-        ),
-        None
-    )
-
-    return model_type
+    return find_subclass(root_cls, model_name)
 
 
 ModelType = TypeVar('ModelType')
@@ -1,13 +1,17 @@
-from typing import TypeVar, Generic, List, Optional, ClassVar, Any
+from typing import TypeVar, Generic, List, Optional, ClassVar, Any, Union, Dict
 
+import base64
 from functools import reduce
 
-from pydantic.v1 import BaseModel, Field, validator, root_validator
+from pydantic.v1 import (
+    BaseModel, Field, PrivateAttr, validator, root_validator
+)
 from pydantic.v1.generics import GenericModel
 
 
 import pandera as pa
 import pandas as pd
+import numpy as np
 
 
 V = TypeVar('ValueType')
@@ -22,13 +26,84 @@ class DefaultSchema(TensorSchema):
     pa_schema = pa.SeriesSchema()
 
 
+def encode_array(array: np.ndarray) -> Union[Dict[str, str], List]:
+    """Encodes a numeric array as base64 of its raw buffer.
+
+    Arrays of other dtypes are encoded as lists.
+    """
+    if array.dtype.kind not in 'biuf':
+        return array.tolist()
+    return {
+        'dtype': array.dtype.str,
+        'b64': base64.b64encode(np.ascontiguousarray(array)).decode()
+    }
+
+
+def decode_array(value: Dict[str, str]) -> np.ndarray:
+    return np.frombuffer(
+        base64.b64decode(value['b64']),
+        dtype=np.dtype(value['dtype'])
+    )
+
+
+class TensorData:
+    """
+    Tensor data. Either a list or, in array mode, a one-dimensional NumPy
+    array.
+
+    Arrays are kept as they are and are decoded from their base64 encoding.
+    """
+    @classmethod
+    def __get_validators__(cls):
+        yield cls.validate
+
+    @classmethod
+    def __modify_schema__(cls, field_schema):
+        field_schema.update(
+            anyOf=[
+                {'type': 'array', 'items': {}},
+                {
+                    'type': 'object',
+                    'properties': {
+                        'dtype': {'type': 'string'},
+                        'b64': {'type': 'string'}
+                    }
+                }
+            ]
+        )
+
+    @classmethod
+    def validate(cls, v):
+        if isinstance(v, np.ndarray):
+            return np.ravel(v)
+        if isinstance(v, dict) and 'b64' in v:
+            return decode_array(v)
+        if isinstance(v, (list, tuple)):
+            return list(v)
+        raise TypeError('Tensor data must be a list or a numpy array')
+
+
 class Tensor(GenericModel, Generic[S]):
+    """
+    A labelled n-dimensional array stored as flat data and the index levels
+    of the data's cartesian product index.
+
+    Data is a list by default. Tensors created with a numpy array as data
+    or by `from_series(..., as_array=True)` keep it as an array, which is
+    shared with the series from `to_series()` without copying. `dict()`
+    and `json()` encode such arrays as base64.
+    """
     tensor_schema: Optional[S] = Field(exclude=True, default=DefaultSchema())
-    data: List
+    data: TensorData
     index: Optional[List[List]]
     index_names: Optional[List[str]]
     name: Optional[str]
 
+    _multi_index: Optional[pd.MultiIndex] = PrivateAttr(default=None)
+
+    class Config:
+        json_encoders = {np.ndarray: encode_array}
+
     @classmethod
     @property
     def pa_schema(cls):
@@ -45,9 +120,21 @@ class Tensor(GenericModel, Generic[S]):
         return pd.Series(
             index=pd.MultiIndex.from_product(index, names=index_names),
             data=data,
-            name=name
+            name=name,
+            copy=False
         )
 
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if name in ('index', 'index_names'):
+            self._multi_index = None
+
+    def dict(self, **kwargs):
+        data = super().dict(**kwargs)
+        if isinstance(data.get('data', None), np.ndarray):
+            data['data'] = encode_array(data['data'])
+        return data
+
     @validator('tensor_schema', always=True)
     def validate_schema(cls, v):
         schema_cls = cls.__fields__['tensor_schema'].type_
@@ -144,33 +231,81 @@ class Tensor(GenericModel, Generic[S]):
         return values
 
     @classmethod
-    def from_series(cls, series: pd.Series):
+    def from_series(
+            cls,
+            series: pd.Series,
+            as_array: bool = False,
+            validate: bool = True):
+        """Creates a tensor from a series validated against the schema.
+
+        Args:
+            series: Series indexed by the schema index levels, covering the
+                cartesian product of the level values.
+            as_array: Keep the data as a numpy array. If the series is
+                already ordered by the product index, the array is shared
+                with the series.
+            validate: Validate the series against the schema. Only skip
+                for series validated already.
+        """
         pa_schema = cls.pa_schema
 
         series.rename(pa_schema.name, inplace=True)
 
-        df = series.reset_index()
-        df.set_index(pa_schema.index.names, inplace=True)
+        if (
+            not isinstance(series.index, pd.MultiIndex)
+            or list(series.index.names) != list(pa_schema.index.names)
+        ):
+            df = series.reset_index()
+            df.set_index(pa_schema.index.names, inplace=True)
+
+            if not isinstance(df.index, pd.MultiIndex):
+                df.index = pd.MultiIndex.from_product([df.index])
+
+            series = df[pa_schema.name]
+
+        if validate:
+            pa_schema.validate(series)
 
-        if not isinstance(df.index, pd.MultiIndex):
-            df.index = pd.MultiIndex.from_product([df.index])
+        levels = series.index.remove_unused_levels().levels
+        multi_index = pd.MultiIndex.from_product(
+            levels, names=series.index.names
+        )
 
-        series = df[pa_schema.name]
-        pa_schema.validate(series)
+        if len(multi_index) != len(series):
+            raise ValueError(
+                f"Index len ({len(multi_index)}) does not match "
+                f"data len ({len(series)})"
+            )
 
-        index = [
-            list(level) for level in
-            pd.MultiIndex.from_product(series.index.levels).levels
-        ]
+        if not series.index.equals(multi_index):
+            series = series.reindex(multi_index)
 
-        data = list(series.to_numpy().flatten())
+        data = series.to_numpy()
 
-        return cls(index=index, data=data)
+        # The series is validated already, so skip model validation
+        tensor = cls.construct(
+            _fields_set={'index', 'data'},
+            tensor_schema=cls.schema_cls(),
+            data=data if as_array else data.tolist(),
+            index=[level.tolist() for level in levels],
+            index_names=list(pa_schema.index.names),
+            name=pa_schema.name
+        )
+        tensor._multi_index = multi_index
+        return tensor
 
     def to_series(self) -> pd.Series:
-        return self._generate_series(
-            index=self.index,
+        """Returns the tensor as a series.
+
+        In array mode, the series shares the tensor's data.
+        """
+        if self._multi_index is None:
+            self._multi_index = pd.MultiIndex.from_product(
+                self.index, names=self.index_names
+            )
+        return pd.Series(
+            index=self._multi_index,
             data=self.data,
-            index_names=self.index_names,
-            name=self.name
+            name=self.name,
+            copy=False
         )
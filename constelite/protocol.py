@@ -1,13 +1,13 @@
 import typing
-from typing import  Callable, Any, TYPE_CHECKING
+from typing import  Callable, Any, ClassVar, TYPE_CHECKING
 import abc
-import asyncio
 import inspect
 import re
 
 from pydantic.v1 import BaseModel, create_model
 
 from constelite.loggers import Logger
+from constelite.executor import default_executor
 
 if TYPE_CHECKING:
     from constelite.api.api import ConsteliteAPI
@@ -22,6 +22,7 @@ class ProtocolModel(BaseModel):
     fn_model: type[BaseModel]
     ret_model: type[Any] | None
     slug: str
+    use_unit_of_work: bool = False
 
 class ProtocolProtocol(typing.Protocol):
     def get_model(self) -> ProtocolModel: ...
@@ -31,10 +32,16 @@ class CallableProtocol(ProtocolProtocol):
 
 class protocol:
     """Decorator for protocols
+
+    Args:
+        name: Name of the protocol.
+        use_unit_of_work: Runs the protocol with a unit of work, see
+            `ConsteliteAPI.run_protocol`.
     """
 
-    def __init__(self, name):
+    def __init__(self, name, use_unit_of_work: bool = False):
         self.name = name
+        self.use_unit_of_work = use_unit_of_work
 
     @staticmethod
     def _generate_model(fn):
@@ -58,7 +65,12 @@ class protocol:
             if inspect.iscoroutinefunction(fn):
                 return await fn(api=api, logger=logger, **kwargs)
             else:
-                return await asyncio.to_thread(fn, api=api, logger=logger, **kwargs)
+                executor = getattr(api, 'protocol_executor', None)
+                if executor is None:
+                    executor = default_executor()
+                return await executor.run(
+                    fn, api=api, logger=logger, **kwargs
+                )
         
         wrapper.__name__ = fn.__name__
         wrapper.__module__ = fn.__module__
@@ -83,6 +95,7 @@ class protocol:
             slug=fn.__name__,
             ret_model=ret_model,
             fn_model=model,
+            use_unit_of_work=self.use_unit_of_work
         )
         
 
@@ -90,6 +103,9 @@ class protocol:
 
 
 class Protocol(BaseModel):
+    # Runs the protocol with a unit of work, see `ConsteliteAPI.run_protocol`
+    use_unit_of_work: ClassVar[bool] = False
+
     @classmethod
     def get_slug(cls):
         pattern = re.compile(r'(?<!^)(?=[A-Z])')
@@ -119,5 +135,6 @@ class Protocol(BaseModel):
             fn=wrapper,
             slug=cls.get_slug(),
             ret_model=ret_model,
-            fn_model=cls
+            fn_model=cls,
+            use_unit_of_work=cls.use_unit_of_work
         )
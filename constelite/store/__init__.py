@@ -2,19 +2,22 @@ from constelite.store.base import (
     BaseStore
 )
 from constelite.store.queries import (
-    Query, RefQuery, BackrefQuery, PropertyQuery
+    Query, RefQuery, BackrefQuery, PropertyQuery, DynamicQuery, Projection
 )
 
 from constelite.store.base_async import AsyncBaseStore
 
 from constelite.store.memory import MemoryStore
 from constelite.store.pickle import PickleStore
+from constelite.store.segment import SegmentStore
 from constelite.store.memcached import MemcachedStore
+from constelite.store.cached import CachedStore, CacheMetrics
 from constelite.store.neoflux import (
     NeofluxStore,
     NeoConfig,
     InfluxConfig
 )
+from constelite.store.neoflux_async import AsyncNeofluxStore
 
 from constelite.store.memory import MemoryStore
 
@@ -23,12 +26,18 @@ __all__ = [
     'RefQuery',
     'PropertyQuery',
     'BackrefQuery',
+    'DynamicQuery',
+    'Projection',
     'BaseStore',
     'AsyncBaseStore',
     'PickleStore',
+    'SegmentStore',
     'NeofluxStore',
+    'AsyncNeofluxStore',
     'NeoConfig',
     'InfluxConfig',
     'MemcachedStore',
+    'CachedStore',
+    'CacheMetrics',
     'MemoryStore'
 ]
@@ -8,15 +8,22 @@ from typing import (
     Type,
     Any,
     ForwardRef,
-    TypeVar
+    TypeVar,
+    Tuple
 )
 
 from functools import partial
 
-from pydantic.v1 import root_validator, PrivateAttr, UUID4, AnyUrl
+from pydantic.v1 import root_validator, PrivateAttr, UUID4, AnyUrl, Field
 
-from constelite.utils import all_subclasses, to_thread, async_map
-from constelite.store.queries import Query, BackrefQuery
+from constelite.utils import to_thread, iter_chunks, thread_map
+from constelite.executor import (
+    BoundedExecutor, ExecutorConfig, ThreadExecutorMixin
+)
+from constelite.store.queries import (
+    Query, BackrefQuery, DynamicQuery, Projection,
+    apply_dynamic_queries, apply_projection
+)
 
 from constelite.models import (
     StateModel,
@@ -41,7 +48,7 @@ GUIDMap = ForwardRef("GUIDMap")
 StoreMethod = Literal['PUT', 'PATCH', 'GET', 'DELETE', 'QUERY', "GRAPHQL"]
 
 
-class BaseStore(StoreModel):
+class BaseStore(ThreadExecutorMixin, StoreModel):
     """
     Base class for all stores.
     """
@@ -52,6 +59,17 @@ class BaseStore(StoreModel):
 
     graphql_schema_manager: Optional[GraphQLSchemaManager] = None
 
+    bulk_chunk_size: int = Field(default=500, exclude=True)
+
+    # Number of related records written or deleted at a time
+    relationship_concurrency: int = Field(default=8, exclude=True)
+
+    executor_config: Optional[ExecutorConfig] = Field(
+        default=None,
+        exclude=True
+    )
+    _thread_executor: Optional[BoundedExecutor] = PrivateAttr(default=None)
+
     class Config:
         arbitrary_types_allowed = True
 
@@ -74,6 +92,18 @@ class BaseStore(StoreModel):
                 )
             return guid
 
+    def get_guid_records(
+            self,
+            uids: List[UID]
+    ) -> Dict[UID, Optional[UUID4]]:
+        """Returns guids of several records, creating the missing ones
+        with one `get_or_create_guids` call.
+        """
+        if self._guid_map is None:
+            return {uid: None for uid in uids}
+
+        return self._guid_map.get_or_create_guids(uids=uids, store=self)
+
     def link_record(self, uid: UID, guid: UUID4):
         if self._guid_map is not None:
             existing_guid = self._guid_map.get_guid(uid=uid, store=self)
@@ -165,11 +195,78 @@ class BaseStore(StoreModel):
     def get_model_by_backref(self, query: BackrefQuery) -> List[StateModel]:
         raise NotImplementedError
 
+    def get_states_by_uids(
+            self,
+            uids: List[UID],
+            model_type: Type[StateModel],
+            dynamic_queries: Optional[Dict[str, DynamicQuery]] = None,
+            projection: Optional[Projection] = None
+    ) -> Dict[UID, StateModel]:
+        """
+        Fetches states of several records of the same model type.
+
+        Uids of records that do not exist are omitted from the result.
+        Points of dynamic properties are selected by `dynamic_queries` and
+        fields of the states by `projection`.
+        Falls back to `uid_exists` and `get_state_by_uid` per uid and
+        selects points and fields in memory. Stores that can fetch many
+        records in one operation or select points and fields when fetching
+        should override it.
+        """
+        return {
+            uid: apply_dynamic_queries(
+                state=apply_projection(
+                    state=self.get_state_by_uid(uid=uid, model_type=model_type),
+                    projection=projection
+                ),
+                dynamic_queries=dynamic_queries
+            )
+            for uid in uids
+            if self.uid_exists(uid=uid, model_type=model_type)
+        }
+
+    def create_models(
+            self,
+            model_type: Type[StateModel],
+            static_props: List[Dict[str, StaticTypes]],
+            dynamic_props: List[Dict[str, Optional[Dynamic]]]) -> List[UID]:
+        """
+        Creates several records of the same model type.
+
+        Falls back to `create_model` per record. Stores that can create
+        many records in one operation should override it.
+
+        Returns:
+            Uids of the new records in the order of the given props.
+        """
+        return [
+            self.create_model(
+                model_type=model_type,
+                static_props=static,
+                dynamic_props=dynamic
+            )
+            for static, dynamic in zip(static_props, dynamic_props)
+        ]
+
+    def delete_models(
+            self,
+            model_type: Type[StateModel],
+            uids: List[UID]) -> None:
+        """
+        Deletes several records of the same model type.
+
+        Falls back to `delete_model` per record. Stores that can delete
+        many records in one operation should override it.
+        """
+        for uid in uids:
+            self.delete_model(model_type=model_type, uid=uid)
+
     def execute_query(
             self,
             query: Query,
             model_type: Type[StateModel],
-            include_states: bool
+            include_states: bool,
+            projection: Optional[Projection] = None
     ) -> Dict[UID, Optional[StateModel]]:
         raise NotImplementedError
 
@@ -202,6 +299,48 @@ class BaseStore(StoreModel):
             guid=guid
         )
 
+    def generate_refs(
+        self,
+        uids: List[UID],
+        state_model_name: Optional[str] = None,
+        states: Optional[Dict[UID, Optional[StateModel]]] = None,
+        state_model_names: Optional[Dict[UID, str]] = None
+    ) -> List[Ref]:
+        """Generates references to several records of the store.
+
+        Guids of all records are resolved with `get_guid_records` instead
+        of one guid map lookup per record.
+
+        Arguments:
+            uids: Uids of the records.
+            state_model_name: Name of the state model of the records.
+            states: States to include in the references by uid.
+            state_model_names: Names of the state models by uid, for
+                records of different models. Overrides `state_model_name`.
+
+        Returns:
+            References in the order of `uids`.
+        """
+        if not uids:
+            return []
+
+        guids = self.get_guid_records(uids=list(dict.fromkeys(uids)))
+        store = self.dict()
+        states = states or {}
+        state_model_names = state_model_names or {}
+
+        return [
+            Ref(
+                record=StoreRecordModel(store=store, uid=uid),
+                state=states.get(uid, None),
+                state_model_name=state_model_names.get(
+                    uid, state_model_name
+                ),
+                guid=str(guids[uid]) if guids[uid] is not None else None
+            )
+            for uid in uids
+        ]
+
     def _validate_ref_uid(self, ref: Ref):
         if ref.record is None:
             raise ValueError("Can't validate uid of a ref without a record")
@@ -221,18 +360,74 @@ class BaseStore(StoreModel):
         ):
             raise KeyError('Ref does not exist in the store')
 
-    def _validate_ref_full(self, ref: Ref) -> Ref:
-        ref = self._fetch_record_by_guid(ref)
-
+    def _validate_ref_record(self, ref: Ref) -> None:
         if ref.record is None:
             raise ValueError("Reference does not have a store record")
         if ref.record.store.uid != self.uid:
             raise ValueError(
                 'Reference store record is from a different store'
             )
+
+    def _validate_ref_full(self, ref: Ref) -> Ref:
+        ref = self._fetch_record_by_guid(ref)
+        self._validate_ref_record(ref)
         self._validate_ref_uid(ref=ref)
         return ref
 
+    def _prepare_bulk_refs(
+            self,
+            refs: List[Ref]
+    ) -> Tuple[List[Ref], Dict[Any, List[Ref]]]:
+        """
+        Resolves records of the refs by guid and groups refs by their
+        state model type.
+
+        Existence of the records is not checked. Bulk methods rely on
+        `get_states_by_uids` omitting missing records instead.
+
+        Returns:
+            Resolved refs and the resolved refs grouped by model type.
+        """
+        refs = [self._fetch_record_by_guid(ref) for ref in refs]
+
+        groups = {}
+        for ref in refs:
+            self._validate_ref_record(ref)
+            if ref.state_model_name == 'Any':
+                model_type = Any
+            else:
+                model_type = get_auto_resolve_model(
+                    model_name=ref.state_model_name
+                )
+                if model_type is None:
+                    raise ValueError(
+                        f"Unknown state model name '{ref.state_model_name}'"
+                    )
+            groups.setdefault(model_type, []).append(ref)
+        return refs, groups
+
+    def _get_bulk_states(
+            self,
+            uids: List[UID],
+            model_type: Type[StateModel],
+            dynamic_queries: Optional[Dict[str, DynamicQuery]] = None,
+            projection: Optional[Projection] = None
+    ) -> Dict[UID, StateModel]:
+        states = {}
+        for chunk in iter_chunks(uids, self.bulk_chunk_size):
+            states.update(
+                self.get_states_by_uids(
+                    uids=chunk,
+                    model_type=model_type,
+                    dynamic_queries=dynamic_queries,
+                    projection=projection
+                )
+            )
+
+        if len(states) != len(set(uids)):
+            raise KeyError('Ref does not exist in the store')
+        return states
+
     def _fetch_record_by_guid(self, ref: Ref) -> Ref:
         if ref.guid is not None and self._guid_map is not None:
             uid = self._guid_map.get_uid(guid=ref.guid, store=self)
@@ -253,6 +448,19 @@ class BaseStore(StoreModel):
                 f'{method} is not allowed for {self.name}'
             )
 
+    def _map_related(self, fn: Callable, items, message: str) -> list:
+        """Calls `fn` for every related record, `relationship_concurrency`
+        at a time, in the calling thread and the workers of
+        `thread_executor`.
+        """
+        return thread_map(
+            fn,
+            items,
+            max_workers=self.relationship_concurrency,
+            message=message,
+            executor=self.thread_executor
+        )
+
     def _update_relationships(
             self,
             method: Callable,
@@ -270,19 +478,20 @@ class BaseStore(StoreModel):
             )
 
             if delete_orphans is True:
-                for orphan_uid in orphans:
-                    self.delete_model(
+                self._map_related(
+                    lambda orphan_uid: self.delete_model(
                         uid=orphan_uid,
-                        model_type=from_model_type
-                    )
-
-        to_objs_refs = []
-
-        for to_ref in rel.to_refs:
-            obj_ref = method(ref=to_ref)
-            to_objs_refs.append(obj_ref)
+                        model_type=rel.to_model
+                    ),
+                    orphans,
+                    message=f"Failed to delete orphans of '{field_name}'"
+                )
 
-        rel.to_refs = to_objs_refs
+        rel.to_refs = self._map_related(
+            lambda to_ref: method(ref=to_ref),
+            rel.to_refs,
+            message=f"Failed to write related records of '{field_name}'"
+        )
 
         self.create_relationships(
             from_uid=from_uid,
@@ -331,7 +540,7 @@ class BaseStore(StoreModel):
                 | inspector.compositions
             ).items():
                 self._update_relationships(
-                    method=partial(BaseStore.put._sync_fn, self),
+                    method=partial(type(self).put._sync_fn, self),
                     from_uid=uid,
                     from_model_type=inspector.model_type,
                     field_name=field_name,
@@ -359,7 +568,7 @@ class BaseStore(StoreModel):
             for field_name, rel in (
                     inspector.associations | inspector.aggregations).items():
                 self._update_relationships(
-                    method=partial(BaseStore.put._sync_fn, self),
+                    method=partial(type(self).put._sync_fn, self),
                     from_uid=ref.uid,
                     from_model_type=inspector.model_type,
                     field_name=field_name,
@@ -370,7 +579,7 @@ class BaseStore(StoreModel):
 
             for field_name, rel in inspector.compositions.items():
                 self._update_relationships(
-                    method=partial(BaseStore.put._sync_fn, self),
+                    method=partial(type(self).put._sync_fn, self),
                     from_uid=ref.uid,
                     from_model_type=inspector.model_type,
                     field_name=field_name,
@@ -426,7 +635,7 @@ class BaseStore(StoreModel):
 
         for field_name, rel in inspector.associations.items():
             self._update_relationships(
-                method=partial(BaseStore.patch._sync_fn, self),
+                method=partial(type(self).patch._sync_fn, self),
                 from_uid=ref.uid,
                 from_model_type=inspector.model_type,
                 field_name=field_name,
@@ -438,7 +647,7 @@ class BaseStore(StoreModel):
         for field_name, rel in (
                 inspector.compositions | inspector.aggregations).items():
             self._update_relationships(
-                method=partial(BaseStore.patch._sync_fn, self),
+                method=partial(type(self).patch._sync_fn, self),
                 from_uid=ref.uid,
                 from_model_type=inspector.model_type,
                 field_name=field_name,
@@ -465,12 +674,9 @@ class BaseStore(StoreModel):
 
         ref = self._validate_ref_full(ref=ref)
 
-        model_type = next(
-            (
-                cls for cls in all_subclasses(StateModel)
-                if cls.__name__ == ref.state_model_name
-            ),
-            None
+        model_type = get_auto_resolve_model(
+            model_name=ref.state_model_name,
+            root_cls=StateModel
         )
 
         if model_type is None:
@@ -513,37 +719,224 @@ class BaseStore(StoreModel):
             model_type=model_type
         )
     @to_thread
-    def get(self, ref: Ref[M]) -> Ref[M]:
+    def get(
+            self,
+            ref: Ref[M],
+            dynamic_queries: Optional[Dict[str, DynamicQuery]] = None,
+            projection: Optional[Projection] = None
+    ) -> Ref[M]:
         """
         Returns the record referenced by `ref`.
 
         Arguments:
             ref: Reference to the record to be retrieved.
-        
+            dynamic_queries: Selection of points of dynamic properties by
+                field name. All points are returned for other fields.
+            projection: Selection of the fields of the returned states.
+                All fields are returned if not given.
+
         Returns:
             Reference to the retrieved record.
         """
         self._validate_method('GET')
-        ref = self._validate_ref_full(ref)
+        ref = self._fetch_record_by_guid(ref)
+        self._validate_ref_record(ref)
 
-        if ref.state_model_name == 'Any':
+        if ref.state_model_name is None:
+            raise ValueError("Unspecified ref.state_model_name")
+        elif ref.state_model_name == 'Any':
             model_type = Any
         else:
             model_type = get_auto_resolve_model(
                 model_name=ref.state_model_name
             )
 
+        # Existence is checked by fetching the state, which saves a
+        # separate uid_exists round trip.
+        states = self._get_bulk_states(
+            uids=[ref.uid],
+            model_type=model_type,
+            dynamic_queries=dynamic_queries,
+            projection=projection
+        )
+
         return self.generate_ref(
             uid=ref.record.uid,
-            state=self.get_state_by_uid(
-                uid=ref.uid,
-                model_type=model_type
-            )
+            state=states[ref.uid]
         )
 
-    async def bulk_get(self, refs: list[Ref]) -> list[Ref]:
+    @to_thread
+    def bulk_get(
+            self,
+            refs: list[Ref],
+            dynamic_queries: Optional[Dict[str, DynamicQuery]] = None,
+            projection: Optional[Projection] = None
+    ) -> list[Ref]:
+        """
+        Returns the records referenced by `refs`.
+
+        Records are fetched with `get_states_by_uids` in chunks of
+        `bulk_chunk_size` per state model type.
+
+        Arguments:
+            refs: References to the records to be retrieved.
+            dynamic_queries: Selection of points of dynamic properties by
+                field name. All points are returned for other fields.
+            projection: Selection of the fields of the returned states.
+                All fields are returned if not given.
+
+        Returns:
+            References to the retrieved records in the order of `refs`.
+        """
         self._validate_method('GET')
-        return await async_map(self.get, refs)
+
+        refs, groups = self._prepare_bulk_refs(refs)
+
+        states = {}
+        for model_type, group_refs in groups.items():
+            states.update(
+                self._get_bulk_states(
+                    uids=[ref.uid for ref in group_refs],
+                    model_type=model_type,
+                    dynamic_queries=dynamic_queries,
+                    projection=projection
+                )
+            )
+
+        return self.generate_refs(
+            uids=[ref.uid for ref in refs],
+            states=states
+        )
+
+    @to_thread
+    def bulk_put(self, refs: list[Ref]) -> list[Ref]:
+        """
+        Puts several records.
+
+        New records without relationships are created with `create_models`
+        in chunks of `bulk_chunk_size` per state model type. Other refs are
+        put one by one.
+
+        Arguments:
+            refs: References to the records to be created or overwritten.
+
+        Returns:
+            References to the created or overwritten records in the order
+            of `refs`.
+        """
+        self._validate_method('PUT')
+
+        new_records = {}
+        results = [None] * len(refs)
+
+        for idx, ref in enumerate(refs):
+            if (
+                ref.record is None and ref.guid is None
+                and ref.state is not None
+            ):
+                inspector = StateInspector.from_state(ref.state)
+                if not (
+                    inspector.associations or inspector.aggregations
+                    or inspector.compositions
+                ):
+                    new_records.setdefault(
+                        inspector.model_type, []
+                    ).append((idx, ref, inspector))
+                    continue
+            results[idx] = type(self).put._sync_fn(self, ref)
+
+        for model_type, items in new_records.items():
+            for chunk in iter_chunks(items, self.bulk_chunk_size):
+                uids = self.create_models(
+                    model_type=model_type,
+                    static_props=[
+                        inspector.static_props for _, _, inspector in chunk
+                    ],
+                    dynamic_props=[
+                        inspector.dynamic_props for _, _, inspector in chunk
+                    ]
+                )
+                new_refs = self.generate_refs(
+                    uids=uids,
+                    state_model_name=chunk[0][1].state_model_name
+                )
+                for (idx, _, _), new_ref in zip(chunk, new_refs):
+                    results[idx] = new_ref
+
+        return results
+
+    @to_thread
+    def bulk_patch(self, refs: list[Ref]) -> list[Ref]:
+        """
+        Patches several records.
+
+        Each patch touches its own set of properties and relationships, so
+        records are patched one by one.
+
+        Arguments:
+            refs: References to the records to be patched.
+
+        Returns:
+            References to the patched records in the order of `refs`.
+        """
+        self._validate_method('PATCH')
+        return [type(self).patch._sync_fn(self, ref) for ref in refs]
+
+    @to_thread
+    def bulk_delete(self, refs: list[Ref]) -> None:
+        """
+        Deletes several records.
+
+        States of the records are fetched with `get_states_by_uids` and
+        records, together with the records related by composition, are
+        removed with `delete_models` in chunks of `bulk_chunk_size` per
+        state model type.
+
+        Arguments:
+            refs: References to the records to be deleted.
+        """
+        self._validate_method('DELETE')
+
+        _, groups = self._prepare_bulk_refs(refs)
+
+        orphans = {}
+
+        for model_type, group_refs in groups.items():
+            if model_type is Any:
+                raise ValueError("Can't delete a record of unknown model")
+
+            uids = [ref.uid for ref in group_refs]
+            states = self._get_bulk_states(uids=uids, model_type=model_type)
+
+            for uid, state in states.items():
+                inspector = StateInspector.from_state(state)
+
+                for field_name in (
+                        inspector.associations | inspector.aggregations):
+                    self.delete_all_relationships(
+                        from_uid=uid,
+                        from_model_type=model_type,
+                        rel_from_name=field_name
+                    )
+
+                for field_name, rel in inspector.compositions.items():
+                    orphans.setdefault(rel.to_model, []).extend(
+                        self.delete_all_relationships(
+                            from_uid=uid,
+                            from_model_type=model_type,
+                            rel_from_name=field_name
+                        )
+                    )
+
+            for uid in uids:
+                self.delete_uid_record(uid=uid)
+
+            for chunk in iter_chunks(uids, self.bulk_chunk_size):
+                self.delete_models(model_type=model_type, uids=chunk)
+
+        for model_type, orphan_uids in orphans.items():
+            for chunk in iter_chunks(orphan_uids, self.bulk_chunk_size):
+                self.delete_models(model_type=model_type, uids=chunk)
 
     @to_thread
     def query(
@@ -551,6 +944,7 @@ class BaseStore(StoreModel):
         model_name: str,
         include_states: bool,
         query: Optional[Query] = None,
+        projection: Optional[Projection] = None
     ) -> List[Ref]:
         """
         Queries the store.
@@ -559,6 +953,8 @@ class BaseStore(StoreModel):
             query: Query to be executed.
             model_name: Name of the model to be queried.
             include_states: Whether to include the state of the queried records.
+            projection: Selection of the fields of the included states.
+                All fields are returned if not given.
         
         Returns:
             List of references to the records that match the query.
@@ -575,17 +971,15 @@ class BaseStore(StoreModel):
         uids = self.execute_query(
             query=query,
             model_type=model_type,
-            include_states=include_states
+            include_states=include_states,
+            projection=projection
         )
 
-        return [
-            self.generate_ref(
-                uid=uid,
-                state_model_name=model_name,
-                state=state
-            )
-            for uid, state in uids.items()
-        ]
+        return self.generate_refs(
+            uids=list(uids.keys()),
+            state_model_name=model_name,
+            states=uids
+        )
 
     async def execute_graphql(self, query: GraphQLQuery) -> Dict[str, Any]:
         """
@@ -600,11 +994,21 @@ class BaseStore(StoreModel):
         """
         # Get the GraphQL schema
         schema = self.graphql_schema_manager.get_schema()
+        # Only load the state fields selected in the query
+        projections = self.graphql_schema_manager.get_projections(
+            query.query_string
+        )
         # Generate a new set of data loaders for this store
-        dataloaders = self.graphql_schema_manager.get_dataloaders(self)
+        dataloaders = self.graphql_schema_manager.get_dataloaders(
+            self, projections=projections
+        )
         results = await schema.execute_async(
             query.query_string,
-            context={'store': self, 'dataloaders': dataloaders}
+            context={
+                'store': self,
+                'dataloaders': dataloaders,
+                'projections': projections
+            }
         )
 
         return results.formatted
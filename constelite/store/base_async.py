@@ -9,14 +9,20 @@ from typing import (
     Callable,
     Type,
     Any,
-    ForwardRef
+    ForwardRef,
+    Tuple
 )
 
-from pydantic.v1 import BaseModel, root_validator, PrivateAttr, UUID4, AnyUrl
+from pydantic.v1 import (
+    BaseModel, root_validator, PrivateAttr, UUID4, AnyUrl, Field
+)
 
 from constelite.graphql.schema import GraphQLSchemaManager
 from constelite.graphql.utils import GraphQLQuery, GraphQLModelQuery
-from constelite.utils import async_map
+from constelite.utils import async_map, bounded_async_map, iter_chunks
+from constelite.store.queries import (
+    DynamicQuery, Projection, apply_dynamic_queries, apply_projection
+)
 
 from constelite.models import (
     StateModel,
@@ -78,6 +84,14 @@ class AsyncBaseStore(StoreModel):
 
     graphql_schema_manager: Optional[GraphQLSchemaManager] = None
 
+    bulk_chunk_size: int = Field(default=500, exclude=True)
+
+    # Number of related records written or deleted at a time
+    relationship_concurrency: int = Field(default=16, exclude=True)
+
+    # Number of records written at a time by bulk_put and bulk_patch
+    bulk_concurrency: int = Field(default=16, exclude=True)
+
     class Config:
         arbitrary_types_allowed = True
 
@@ -100,6 +114,18 @@ class AsyncBaseStore(StoreModel):
                 )
             return guid
 
+    async def get_guid_records(
+            self,
+            uids: List[UID]
+    ) -> Dict[UID, Optional[UUID4]]:
+        """Returns guids of several records, creating the missing ones
+        with one `get_or_create_guids` call.
+        """
+        if self._guid_map is None:
+            return {uid: None for uid in uids}
+
+        return await self._guid_map.get_or_create_guids(uids=uids, store=self)
+
     async def link_record(self, uid: UID, guid: UUID4):
         if self._guid_map is not None:
             existing_guid = await self._guid_map.get_guid(uid=uid, store=self)
@@ -191,11 +217,88 @@ class AsyncBaseStore(StoreModel):
     async def get_model_by_backref(self, query: BackrefQuery) -> List[StateModel]:
         raise NotImplementedError
 
+    async def get_states_by_uids(
+            self,
+            uids: List[UID],
+            model_type: Type[StateModel],
+            dynamic_queries: Optional[Dict[str, DynamicQuery]] = None,
+            projection: Optional[Projection] = None
+    ) -> Dict[UID, StateModel]:
+        """
+        Fetches states of several records of the same model type.
+
+        Uids of records that do not exist are omitted from the result.
+        Points of dynamic properties are selected by `dynamic_queries` and
+        fields of the states by `projection`.
+        Falls back to `uid_exists` and `get_state_by_uid` per uid and
+        selects points and fields in memory. Stores that can fetch many
+        records in one operation or select points and fields when fetching
+        should override it.
+        """
+        async def get_state(uid):
+            if await self.uid_exists(uid=uid, model_type=model_type):
+                return apply_dynamic_queries(
+                    state=apply_projection(
+                        state=await self.get_state_by_uid(
+                            uid=uid,
+                            model_type=model_type
+                        ),
+                        projection=projection
+                    ),
+                    dynamic_queries=dynamic_queries
+                )
+
+        states = await async_map(get_state, uids)
+
+        return {
+            uid: state for uid, state in zip(uids, states)
+            if state is not None
+        }
+
+    async def create_models(
+            self,
+            model_type: Type[StateModel],
+            static_props: List[Dict[str, StaticTypes]],
+            dynamic_props: List[Dict[str, Optional[Dynamic]]]) -> List[UID]:
+        """
+        Creates several records of the same model type.
+
+        Falls back to `create_model` per record. Stores that can create
+        many records in one operation should override it.
+
+        Returns:
+            Uids of the new records in the order of the given props.
+        """
+        return await async_map(
+            lambda props: self.create_model(
+                model_type=model_type,
+                static_props=props[0],
+                dynamic_props=props[1]
+            ),
+            zip(static_props, dynamic_props)
+        )
+
+    async def delete_models(
+            self,
+            model_type: Type[StateModel],
+            uids: List[UID]) -> None:
+        """
+        Deletes several records of the same model type.
+
+        Falls back to `delete_model` per record. Stores that can delete
+        many records in one operation should override it.
+        """
+        await async_map(
+            lambda uid: self.delete_model(model_type=model_type, uid=uid),
+            uids
+        )
+
     async def execute_query(
             self,
             query: Optional[Query],
             model_type: Type[StateModel],
-            include_states: bool
+            include_states: bool,
+            projection: Optional[Projection] = None
     ) -> Dict[UID, Optional[StateModel]]:
         raise NotImplementedError
 
@@ -229,6 +332,48 @@ class AsyncBaseStore(StoreModel):
             guid=guid
         )
 
+    async def generate_refs(
+        self,
+        uids: List[UID],
+        state_model_name: Optional[str] = None,
+        states: Optional[Dict[UID, Optional[StateModel]]] = None,
+        state_model_names: Optional[Dict[UID, str]] = None
+    ) -> List[Ref]:
+        """Generates references to several records of the store.
+
+        Guids of all records are resolved with `get_guid_records` instead
+        of one guid map lookup per record.
+
+        Arguments:
+            uids: Uids of the records.
+            state_model_name: Name of the state model of the records.
+            states: States to include in the references by uid.
+            state_model_names: Names of the state models by uid, for
+                records of different models. Overrides `state_model_name`.
+
+        Returns:
+            References in the order of `uids`.
+        """
+        if not uids:
+            return []
+
+        guids = await self.get_guid_records(uids=list(dict.fromkeys(uids)))
+        store = self.dict()
+        states = states or {}
+        state_model_names = state_model_names or {}
+
+        return [
+            Ref(
+                record=StoreRecordModel(store=store, uid=uid),
+                state=states.get(uid, None),
+                state_model_name=state_model_names.get(
+                    uid, state_model_name
+                ),
+                guid=str(guids[uid]) if guids[uid] is not None else None
+            )
+            for uid in uids
+        ]
+
     async def _validate_ref_uid(self, ref: Ref):
         if ref.record is None:
             raise ValueError("Can't validate uid of a ref without a record")
@@ -250,18 +395,74 @@ class AsyncBaseStore(StoreModel):
         if not uid_exists:
             raise KeyError('Ref does not exist in the store')
 
-    async def _validate_ref_full(self, ref: Ref) -> Ref:
-        ref = await self._fetch_record_by_guid(ref)
-
+    def _validate_ref_record(self, ref: Ref) -> None:
         if ref.record is None:
             raise ValueError("Reference does not have a store record")
         if ref.record.store.uid != self.uid:
             raise ValueError(
                 'Reference store record is from a different store'
             )
+
+    async def _validate_ref_full(self, ref: Ref) -> Ref:
+        ref = await self._fetch_record_by_guid(ref)
+        self._validate_ref_record(ref)
         await self._validate_ref_uid(ref=ref)
         return ref
 
+    async def _prepare_bulk_refs(
+            self,
+            refs: List[Ref]
+    ) -> Tuple[List[Ref], Dict[Any, List[Ref]]]:
+        """
+        Resolves records of the refs by guid and groups refs by their
+        state model type.
+
+        Existence of the records is not checked. Bulk methods rely on
+        `get_states_by_uids` omitting missing records instead.
+
+        Returns:
+            Resolved refs and the resolved refs grouped by model type.
+        """
+        refs = await async_map(self._fetch_record_by_guid, refs)
+
+        groups = {}
+        for ref in refs:
+            self._validate_ref_record(ref)
+            if ref.state_model_name == 'Any':
+                model_type = Any
+            else:
+                model_type = get_auto_resolve_model(
+                    model_name=ref.state_model_name
+                )
+                if model_type is None:
+                    raise ValueError(
+                        f"Unknown state model name '{ref.state_model_name}'"
+                    )
+            groups.setdefault(model_type, []).append(ref)
+        return refs, groups
+
+    async def _get_bulk_states(
+            self,
+            uids: List[UID],
+            model_type: Type[StateModel],
+            dynamic_queries: Optional[Dict[str, DynamicQuery]] = None,
+            projection: Optional[Projection] = None
+    ) -> Dict[UID, StateModel]:
+        states = {}
+        for chunk in iter_chunks(uids, self.bulk_chunk_size):
+            states.update(
+                await self.get_states_by_uids(
+                    uids=chunk,
+                    model_type=model_type,
+                    dynamic_queries=dynamic_queries,
+                    projection=projection
+                )
+            )
+
+        if len(states) != len(set(uids)):
+            raise KeyError('Ref does not exist in the store')
+        return states
+
     async def _fetch_record_by_guid(self, ref: Ref) -> Ref:
         if ref.guid is not None and self._guid_map is not None:
             uid = await self._guid_map.get_uid(guid=ref.guid, store=self)
@@ -300,26 +501,22 @@ class AsyncBaseStore(StoreModel):
             )
 
             if delete_orphans is True:
-                async with asyncio.TaskGroup() as tg:
-                    for orphan_uid in orphans:
-                        tg.create_task(
-                            self.delete_model(
-                                uid=orphan_uid,
-                                model_type=from_model_type
-                            )
-                        )
-        
-        tasks = []
-        async with asyncio.TaskGroup() as tg:
-            for to_ref in rel.to_refs:
-                task = tg.create_task(
-                    method(ref=to_ref)
+                await bounded_async_map(
+                    lambda orphan_uid: self.delete_model(
+                        uid=orphan_uid,
+                        model_type=rel.to_model
+                    ),
+                    orphans,
+                    limit=self.relationship_concurrency,
+                    message=f"Failed to delete orphans of '{field_name}'"
                 )
-                tasks.append(task)
 
-        rel.to_refs = [
-            task.result() for task in tasks
-        ]
+        rel.to_refs = await bounded_async_map(
+            lambda to_ref: method(ref=to_ref),
+            rel.to_refs,
+            limit=self.relationship_concurrency,
+            message=f"Failed to write related records of '{field_name}'"
+        )
 
         await self.create_relationships(
             from_uid=from_uid,
@@ -489,39 +686,37 @@ class AsyncBaseStore(StoreModel):
 
         inspector = StateInspector.from_state(state)
 
-        async def delete_rels_with_orphans_wrapper(field_name, rel):
+        async def delete_rels(field):
+            field_name, rel, delete_orphans = field
             orphan_uids = await self.delete_all_relationships(
                 from_uid=ref.uid,
                 from_model_type=model_type,
                 rel_from_name=field_name
             )
-            async with asyncio.TaskGroup() as tg:
-                for orphan_uid in orphan_uids:
-                    tg.create_task(
-                            self.delete_model(
-                            uid=orphan_uid,
-                            model_type=rel.to_model
-                        )
-                    )
-
-        async with asyncio.TaskGroup() as tg:
-            for field_name, rel in (
-                        inspector.associations | inspector.aggregations).items():
-                tg.create_task(
-                    self.delete_all_relationships(
-                        from_uid=ref.uid,
-                        from_model_type=model_type,
-                        rel_from_name=field_name
-                    )
+            if delete_orphans:
+                await bounded_async_map(
+                    lambda orphan_uid: self.delete_model(
+                        uid=orphan_uid,
+                        model_type=rel.to_model
+                    ),
+                    orphan_uids,
+                    limit=self.relationship_concurrency,
+                    message=f"Failed to delete orphans of '{field_name}'"
                 )
 
-            for field_name, rel in inspector.compositions.items():
-                tg.create_task(
-                    delete_rels_with_orphans_wrapper(
-                        field_name=field_name,
-                        rel=rel
-                    )
-                )
+        await bounded_async_map(
+            delete_rels,
+            [
+                (field_name, rel, False) for field_name, rel in (
+                    inspector.associations | inspector.aggregations
+                ).items()
+            ] + [
+                (field_name, rel, True)
+                for field_name, rel in inspector.compositions.items()
+            ],
+            limit=self.relationship_concurrency,
+            message=f"Failed to delete relationships of '{ref.uid}'"
+        )
 
         await self.delete_uid_record(uid=ref.uid)
 
@@ -530,35 +725,252 @@ class AsyncBaseStore(StoreModel):
             model_type=model_type
         )
 
-    async def get(self, ref: Ref) -> Ref:
+    async def get(
+            self,
+            ref: Ref,
+            dynamic_queries: Optional[Dict[str, DynamicQuery]] = None,
+            projection: Optional[Projection] = None
+    ) -> Ref:
+        """
+        Returns the record referenced by `ref`.
+
+        Arguments:
+            ref: Reference to the record to be retrieved.
+            dynamic_queries: Selection of points of dynamic properties by
+                field name. All points are returned for other fields.
+            projection: Selection of the fields of the returned states.
+                All fields are returned if not given.
+
+        Returns:
+            Reference to the retrieved record.
+        """
         self._validate_method('GET')
-        ref = await self._validate_ref_full(ref)
+        ref = await self._fetch_record_by_guid(ref)
+        self._validate_ref_record(ref)
 
-        if ref.state_model_name == 'Any':
+        if ref.state_model_name is None:
+            raise ValueError("Unspecified ref.state_model_name")
+        elif ref.state_model_name == 'Any':
             model_type = Any
         else:
             model_type = get_auto_resolve_model(
                 model_name=ref.state_model_name
             )
-        state = await self.get_state_by_uid(
-            uid=ref.uid,
-            model_type=model_type
+
+        # Existence is checked by fetching the state, which saves a
+        # separate uid_exists round trip.
+        states = await self._get_bulk_states(
+            uids=[ref.uid],
+            model_type=model_type,
+            dynamic_queries=dynamic_queries,
+            projection=projection
         )
 
         return await self.generate_ref(
             uid=ref.record.uid,
-            state=state
+            state=states[ref.uid]
         )
 
-    async def bulk_get(self, refs: list[Ref]) -> list[Ref]:
+    async def bulk_get(
+            self,
+            refs: list[Ref],
+            dynamic_queries: Optional[Dict[str, DynamicQuery]] = None,
+            projection: Optional[Projection] = None
+    ) -> list[Ref]:
+        """
+        Returns the records referenced by `refs`.
+
+        Records are fetched with `get_states_by_uids` in chunks of
+        `bulk_chunk_size` per state model type.
+
+        Arguments:
+            refs: References to the records to be retrieved.
+            dynamic_queries: Selection of points of dynamic properties by
+                field name. All points are returned for other fields.
+            projection: Selection of the fields of the returned states.
+                All fields are returned if not given.
+
+        Returns:
+            References to the retrieved records in the order of `refs`.
+        """
         self._validate_method('GET')
-        return await async_map(self.get, refs)
+
+        refs, groups = await self._prepare_bulk_refs(refs)
+
+        states = {}
+        for model_type, group_refs in groups.items():
+            states.update(
+                await self._get_bulk_states(
+                    uids=[ref.uid for ref in group_refs],
+                    model_type=model_type,
+                    dynamic_queries=dynamic_queries,
+                    projection=projection
+                )
+            )
+
+        return await self.generate_refs(
+            uids=[ref.uid for ref in refs],
+            states=states
+        )
+
+    async def bulk_put(self, refs: list[Ref]) -> list[Ref]:
+        """
+        Puts several records.
+
+        New records without relationships are created with `create_models`
+        in chunks of `bulk_chunk_size` per state model type. Other refs are
+        put one by one, `bulk_concurrency` at a time.
+
+        Arguments:
+            refs: References to the records to be created or overwritten.
+
+        Returns:
+            References to the created or overwritten records in the order
+            of `refs`.
+        """
+        self._validate_method('PUT')
+
+        new_records = {}
+        other_refs = {}
+
+        for idx, ref in enumerate(refs):
+            if (
+                ref.record is None and ref.guid is None
+                and ref.state is not None
+            ):
+                inspector = StateInspector.from_state(ref.state)
+                if not (
+                    inspector.associations or inspector.aggregations
+                    or inspector.compositions
+                ):
+                    new_records.setdefault(
+                        inspector.model_type, []
+                    ).append((idx, ref, inspector))
+                    continue
+            other_refs[idx] = ref
+
+        results = [None] * len(refs)
+
+        for model_type, items in new_records.items():
+            for chunk in iter_chunks(items, self.bulk_chunk_size):
+                uids = await self.create_models(
+                    model_type=model_type,
+                    static_props=[
+                        inspector.static_props for _, _, inspector in chunk
+                    ],
+                    dynamic_props=[
+                        inspector.dynamic_props for _, _, inspector in chunk
+                    ]
+                )
+                new_refs = await self.generate_refs(
+                    uids=uids,
+                    state_model_name=chunk[0][1].state_model_name
+                )
+                for (idx, _, _), new_ref in zip(chunk, new_refs):
+                    results[idx] = new_ref
+
+        put_refs = await bounded_async_map(
+            self.put,
+            other_refs.values(),
+            limit=self.bulk_concurrency,
+            message="Failed to put some of the records"
+        )
+        for idx, put_ref in zip(other_refs.keys(), put_refs):
+            results[idx] = put_ref
+
+        return results
+
+    async def bulk_patch(self, refs: list[Ref]) -> list[Ref]:
+        """
+        Patches several records.
+
+        Each patch touches its own set of properties and relationships, so
+        records are patched concurrently one by one, `bulk_concurrency` at
+        a time.
+
+        Arguments:
+            refs: References to the records to be patched.
+
+        Returns:
+            References to the patched records in the order of `refs`.
+        """
+        self._validate_method('PATCH')
+        return await bounded_async_map(
+            self.patch,
+            refs,
+            limit=self.bulk_concurrency,
+            message="Failed to patch some of the records"
+        )
+
+    async def bulk_delete(self, refs: list[Ref]) -> None:
+        """
+        Deletes several records.
+
+        States of the records are fetched with `get_states_by_uids` and
+        records, together with the records related by composition, are
+        removed with `delete_models` in chunks of `bulk_chunk_size` per
+        state model type.
+
+        Arguments:
+            refs: References to the records to be deleted.
+        """
+        self._validate_method('DELETE')
+
+        _, groups = await self._prepare_bulk_refs(refs)
+
+        orphans = {}
+
+        async def delete_relationships(uid, model_type, state):
+            inspector = StateInspector.from_state(state)
+
+            for field_name in (
+                    inspector.associations | inspector.aggregations):
+                await self.delete_all_relationships(
+                    from_uid=uid,
+                    from_model_type=model_type,
+                    rel_from_name=field_name
+                )
+
+            for field_name, rel in inspector.compositions.items():
+                orphans.setdefault(rel.to_model, []).extend(
+                    await self.delete_all_relationships(
+                        from_uid=uid,
+                        from_model_type=model_type,
+                        rel_from_name=field_name
+                    )
+                )
+
+        for model_type, group_refs in groups.items():
+            if model_type is Any:
+                raise ValueError("Can't delete a record of unknown model")
+
+            uids = [ref.uid for ref in group_refs]
+            states = await self._get_bulk_states(
+                uids=uids,
+                model_type=model_type
+            )
+
+            await async_map(
+                lambda uid: delete_relationships(
+                    uid, model_type, states[uid]
+                ),
+                states.keys()
+            )
+            await async_map(self.delete_uid_record, uids)
+
+            for chunk in iter_chunks(uids, self.bulk_chunk_size):
+                await self.delete_models(model_type=model_type, uids=chunk)
+
+        for model_type, orphan_uids in orphans.items():
+            for chunk in iter_chunks(orphan_uids, self.bulk_chunk_size):
+                await self.delete_models(model_type=model_type, uids=chunk)
 
     async def query(
         self,
         model_name: str,
         include_states: bool,
-        query: Optional[Query] = None
+        query: Optional[Query] = None,
+        projection: Optional[Projection] = None
     ) -> List[Ref]:
         self._validate_method('QUERY')
         model_type = get_auto_resolve_model(
@@ -572,28 +984,15 @@ class AsyncBaseStore(StoreModel):
         uids = await self.execute_query(
             query=query,
             model_type=model_type,
-            include_states=include_states
+            include_states=include_states,
+            projection=projection
         ) 
 
-        tasks = []
-
-        async with asyncio.TaskGroup() as tg:
-            for uid, state in uids.items():
-                task =  tg.create_task(
-                    self.generate_ref(
-                        uid=uid,
-                        state_model_name=model_name,
-                        state=state
-                    )
-                )
-
-                tasks.append(task)
-        
-        refs = [
-            task.result() for task in tasks
-        ]
-
-        return refs
+        return await self.generate_refs(
+            uids=list(uids.keys()),
+            state_model_name=model_name,
+            states=uids
+        )
 
     async def execute_graphql(self, query: GraphQLQuery) -> Dict[str, Any]:
         """
@@ -608,11 +1007,21 @@ class AsyncBaseStore(StoreModel):
         """
         # Get the GraphQL schema
         schema = self.graphql_schema_manager.get_schema()
+        # Only load the state fields selected in the query
+        projections = self.graphql_schema_manager.get_projections(
+            query.query_string
+        )
         # Generate a new set of data loaders for this store
-        dataloaders = self.graphql_schema_manager.get_dataloaders(self)
+        dataloaders = self.graphql_schema_manager.get_dataloaders(
+            self, projections=projections
+        )
         results = await schema.execute_async(
             query.query_string,
-            context={'store': self, 'dataloaders': dataloaders}
+            context={
+                'store': self,
+                'dataloaders': dataloaders,
+                'projections': projections
+            }
         )
 
         return results.formatted
@@ -0,0 +1,497 @@
+from typing import (
+    Any, Dict, List, NamedTuple, Optional, Set, Tuple, Union
+)
+
+import sys
+import time
+
+from collections import OrderedDict
+
+import numpy as np
+
+from pydantic.v1 import BaseModel
+
+from constelite.models import (
+    StateModel, Ref, UID, InspectionPlan, StoreRecordModel
+)
+from constelite.models.dynamic import ColumnarPoints
+from constelite.store.base import BaseStore
+from constelite.store.base_async import AsyncBaseStore
+from constelite.store.queries import Query, DynamicQuery, Projection
+
+
+def approximate_size(obj: Any, seen: Optional[Set[int]] = None) -> int:
+    """Returns an estimate of the memory used by an object and everything
+    it references, in bytes.
+
+    Objects referenced several times are counted once.
+    """
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    if isinstance(obj, np.ndarray):
+        return sys.getsizeof(obj) + (obj.nbytes if obj.base is not None else 0)
+
+    size = sys.getsizeof(obj)
+
+    if isinstance(obj, (str, bytes, int, float, bool)) or obj is None:
+        return size
+    elif isinstance(obj, dict):
+        size += sum(
+            approximate_size(key, seen) + approximate_size(value, seen)
+            for key, value in obj.items()
+        )
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(approximate_size(item, seen) for item in obj)
+    elif isinstance(obj, ColumnarPoints):
+        if obj.is_columnar:
+            size += approximate_size(obj.timestamps, seen)
+            size += approximate_size(obj.values, seen)
+        else:
+            size += approximate_size(list(obj), seen)
+    elif isinstance(obj, BaseModel):
+        size += approximate_size(obj.__dict__, seen)
+    return size
+
+
+class CacheMetrics(BaseModel):
+    """
+    Counters of a `CachedStore`.
+
+    Attributes:
+        hits: Number of states served from the cache.
+        misses: Number of states fetched from the store.
+        evictions: Number of states dropped to stay within the size limit.
+        expirations: Number of states dropped after their time to live.
+        invalidations: Number of states dropped after a write.
+        entries: Number of cached states.
+        size: Approximate size of the cached states in bytes.
+    """
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    invalidations: int = 0
+    entries: int = 0
+    size: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total > 0 else 0.0
+
+
+class CacheEntry(NamedTuple):
+    state: StateModel
+    size: int
+    expires: Optional[float]
+    related_uids: Set[UID]
+    guid: Optional[str]
+
+
+class CachedStore:
+    """
+    Read-through cache of record states in front of a store.
+
+    Wraps a `BaseStore` or an `AsyncBaseStore` and exposes the same
+    asynchronous methods. States fetched by `get`, `bulk_get` and `query`
+    are kept in an LRU cache keyed by the store and record uids, limited to
+    `max_size` bytes and, if given, to `ttl` seconds.
+
+    Writes through the wrapper drop the written records from the cache
+    together with the cached records related to them, as their backrefs
+    may change. Writes that bypass the wrapper are only seen once the
+    cached states expire.
+
+    Cached states are kept with the guids of their records, so hits,
+    including those of references by guid, are served without calls to
+    the store or its guid map.
+
+    Gets with dynamic queries or projections bypass the cache. Other
+    attributes are forwarded to the wrapped store.
+
+    Arguments:
+        store: Store to cache.
+        max_size: Limit of the approximate size of the cached states in
+            bytes.
+        ttl: Time to live of the cached states in seconds. States don't
+            expire if not given.
+    """
+    def __init__(
+            self,
+            store: Union[BaseStore, AsyncBaseStore],
+            max_size: int = 64 * 2**20,
+            ttl: Optional[float] = None):
+        self.store = store
+        self.max_size = max_size
+        self.ttl = ttl
+        self.metrics = CacheMetrics()
+
+        self._entries: OrderedDict[
+            Tuple[Any, UID], CacheEntry] = OrderedDict()
+        # Uids of the cached records that reference a record
+        self._referrers: Dict[UID, Set[UID]] = {}
+        # Uids of the cached records by guid
+        self._guid_uids: Dict[str, UID] = {}
+        # Incremented on every invalidation, so states fetched before a
+        # write are not cached after it
+        self._generation = 0
+
+    def __getattr__(self, name: str) -> Any:
+        if name == 'store':
+            raise AttributeError(name)
+        return getattr(self.store, name)
+
+    @property
+    def is_async(self) -> bool:
+        return isinstance(self.store, AsyncBaseStore)
+
+    def _key(self, uid: UID) -> Tuple[Any, UID]:
+        return (self.store.uid, uid)
+
+    def _is_local(self, ref: Ref) -> bool:
+        return ref.record is not None and ref.record.store.uid == self.uid
+
+    def _related_uids(self, state: Optional[StateModel]) -> Set[UID]:
+        """Returns uids of the records of this store related to a state.
+        """
+        if state is None:
+            return set()
+
+        uids = set()
+        for field_plan in InspectionPlan.for_model(type(state)).fields:
+            if field_plan.kind in ('static', 'dynamic'):
+                continue
+            for rel_ref in getattr(state, field_plan.field_name, None) or []:
+                if self._is_local(rel_ref):
+                    uids.add(rel_ref.uid)
+        return uids
+
+    def _cached_uid(self, ref: Ref) -> Optional[UID]:
+        """Returns the uid of the record of a ref if it may be cached,
+        resolving guids from the cached records only.
+        """
+        if ref.guid is not None and self.store._guid_map is not None:
+            return self._guid_uids.get(str(ref.guid), None)
+        if self._is_local(ref):
+            return ref.uid
+        return None
+
+    def _remove(self, uid: UID) -> Optional[CacheEntry]:
+        entry = self._entries.pop(self._key(uid), None)
+        if entry is not None:
+            if entry.guid is not None:
+                self._guid_uids.pop(entry.guid, None)
+            for related_uid in entry.related_uids:
+                referrers = self._referrers.get(related_uid, None)
+                if referrers is not None:
+                    referrers.discard(uid)
+                    if not referrers:
+                        del self._referrers[related_uid]
+            self.metrics.entries -= 1
+            self.metrics.size -= entry.size
+        return entry
+
+    def _lookup(self, uid: Optional[UID]) -> Optional[CacheEntry]:
+        if uid is None:
+            self.metrics.misses += 1
+            return None
+
+        key = self._key(uid)
+        entry = self._entries.get(key, None)
+
+        if entry is not None and entry.expires is not None \
+                and entry.expires < time.monotonic():
+            self._remove(uid)
+            self.metrics.expirations += 1
+            entry = None
+
+        if entry is None:
+            self.metrics.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.metrics.hits += 1
+        # Callers are free to modify the returned state
+        return entry._replace(state=entry.state.copy(deep=True))
+
+    def _insert(
+            self,
+            uid: UID,
+            state: Optional[StateModel],
+            generation: int,
+            guid: Optional[str] = None) -> None:
+        if state is None or generation != self._generation:
+            return
+
+        self._remove(uid)
+
+        state = state.copy(deep=True)
+        size = approximate_size(state)
+        if size > self.max_size:
+            return
+
+        related_uids = self._related_uids(state)
+        self._entries[self._key(uid)] = CacheEntry(
+            state=state,
+            size=size,
+            expires=(
+                time.monotonic() + self.ttl if self.ttl is not None else None
+            ),
+            related_uids=related_uids,
+            guid=str(guid) if guid is not None else None
+        )
+        if guid is not None:
+            self._guid_uids[str(guid)] = uid
+        for related_uid in related_uids:
+            self._referrers.setdefault(related_uid, set()).add(uid)
+
+        self.metrics.entries += 1
+        self.metrics.size += size
+
+        while self.metrics.size > self.max_size:
+            oldest_uid = next(iter(self._entries))[1]
+            self._remove(oldest_uid)
+            self.metrics.evictions += 1
+
+    def invalidate(self, uids: List[UID]) -> None:
+        """Drops records and the cached records referencing them from the
+        cache.
+        """
+        self._generation += 1
+
+        for uid in uids:
+            for drop_uid in {uid} | self._referrers.get(uid, set()):
+                if self._remove(drop_uid) is not None:
+                    self.metrics.invalidations += 1
+
+    def clear(self) -> None:
+        """Drops all states from the cache.
+        """
+        self._generation += 1
+        self._entries.clear()
+        self._referrers.clear()
+        self._guid_uids.clear()
+        self.metrics.entries = 0
+        self.metrics.size = 0
+
+    async def _resolve(self, ref: Ref) -> Ref:
+        """Resolves the record of a ref from its guid, if needed.
+        """
+        if ref.guid is None or self.store._guid_map is None:
+            return ref
+        if self.is_async:
+            return await self.store._fetch_record_by_guid(ref)
+        return await self.store.thread_executor.run(
+            self.store._fetch_record_by_guid, ref
+        )
+
+    async def _generate_refs(
+            self,
+            uids: List[UID],
+            states: Dict[UID, StateModel]) -> List[Ref]:
+        if self.is_async:
+            return await self.store.generate_refs(uids=uids, states=states)
+        return await self.store.thread_executor.run(
+            self.store.generate_refs, uids=uids, states=states
+        )
+
+    async def _cached_refs(
+            self,
+            uids: List[UID],
+            entries: List[CacheEntry]) -> List[Ref]:
+        """Returns references to cached records.
+
+        References are built from the cached guids. Guids of records
+        cached without one are generated by the store in one call.
+        """
+        store = self.store.dict()
+        refs = [
+            Ref(
+                record=StoreRecordModel(store=store, uid=uid),
+                state=entry.state,
+                guid=entry.guid
+            )
+            for uid, entry in zip(uids, entries)
+        ]
+
+        if self.store._guid_map is not None:
+            missing = [
+                idx for idx, entry in enumerate(entries) if entry.guid is None
+            ]
+            if missing:
+                generated = await self._generate_refs(
+                    uids=[uids[idx] for idx in missing],
+                    states={uids[idx]: entries[idx].state for idx in missing}
+                )
+                for idx, ref in zip(missing, generated):
+                    refs[idx] = ref
+        return refs
+
+    async def _written_uids(self, refs: List[Ref]) -> List[UID]:
+        """Returns uids of the records that writing the refs may change.
+        """
+        uids = []
+        for ref in refs:
+            ref = await self._resolve(ref)
+            if self._is_local(ref):
+                uids.append(ref.uid)
+                entry = self._entries.get(self._key(ref.uid), None)
+                if entry is not None:
+                    # Covers records dropped together with the written one
+                    uids.extend(entry.related_uids)
+            uids.extend(self._related_uids(ref.state))
+        return uids
+
+    async def get(
+            self,
+            ref: Ref,
+            dynamic_queries: Optional[Dict[str, DynamicQuery]] = None,
+            projection: Optional[Projection] = None
+    ) -> Ref:
+        """
+        Returns the record referenced by `ref`, from the cache if possible.
+        """
+        if dynamic_queries or projection is not None:
+            return await self.store.get(
+                ref, dynamic_queries=dynamic_queries, projection=projection
+            )
+
+        self.store._validate_method('GET')
+
+        uid = self._cached_uid(ref)
+        entry = self._lookup(uid)
+        if entry is not None:
+            return (await self._cached_refs(uids=[uid], entries=[entry]))[0]
+
+        generation = self._generation
+        ref = await self.store.get(ref)
+        self._insert(
+            uid=ref.uid, state=ref.state, generation=generation, guid=ref.guid
+        )
+        return ref
+
+    async def bulk_get(
+            self,
+            refs: List[Ref],
+            dynamic_queries: Optional[Dict[str, DynamicQuery]] = None,
+            projection: Optional[Projection] = None
+    ) -> List[Ref]:
+        """
+        Returns the records referenced by `refs`. Records that are not
+        cached are fetched with one `bulk_get` of the wrapped store.
+        """
+        if dynamic_queries or projection is not None:
+            return await self.store.bulk_get(
+                refs, dynamic_queries=dynamic_queries, projection=projection
+            )
+
+        self.store._validate_method('GET')
+
+        results = [None] * len(refs)
+        missing = []
+        hits = {}
+
+        for idx, ref in enumerate(refs):
+            uid = self._cached_uid(ref)
+            entry = self._lookup(uid)
+            if entry is None:
+                missing.append(idx)
+            else:
+                hits[idx] = (uid, entry)
+
+        if hits:
+            cached_refs = await self._cached_refs(
+                uids=[uid for uid, _ in hits.values()],
+                entries=[entry for _, entry in hits.values()]
+            )
+            for idx, cached_ref in zip(hits.keys(), cached_refs):
+                results[idx] = cached_ref
+
+        if missing:
+            generation = self._generation
+            fetched = await self.store.bulk_get(
+                [refs[idx] for idx in missing]
+            )
+            for idx, ref in zip(missing, fetched):
+                self._insert(
+                    uid=ref.uid,
+                    state=ref.state,
+                    generation=generation,
+                    guid=ref.guid
+                )
+                results[idx] = ref
+
+        return results
+
+    async def query(
+            self,
+            model_name: str,
+            include_states: bool,
+            query: Optional[Query] = None,
+            projection: Optional[Projection] = None
+    ) -> List[Ref]:
+        """
+        Queries the wrapped store and caches the returned states.
+        """
+        generation = self._generation
+        refs = await self.store.query(
+            model_name=model_name,
+            include_states=include_states,
+            query=query,
+            projection=projection
+        )
+        if include_states and projection is None:
+            for ref in refs:
+                self._insert(
+                    uid=ref.uid,
+                    state=ref.state,
+                    generation=generation,
+                    guid=ref.guid
+                )
+        return refs
+
+    async def put(self, ref: Ref) -> Ref:
+        uids = await self._written_uids([ref])
+        try:
+            return await self.store.put(ref)
+        finally:
+            self.invalidate(uids)
+
+    async def patch(self, ref: Ref) -> Ref:
+        uids = await self._written_uids([ref])
+        try:
+            return await self.store.patch(ref)
+        finally:
+            self.invalidate(uids)
+
+    async def delete(self, ref: Ref) -> None:
+        uids = await self._written_uids([ref])
+        try:
+            return await self.store.delete(ref)
+        finally:
+            self.invalidate(uids)
+
+    async def bulk_put(self, refs: List[Ref]) -> List[Ref]:
+        uids = await self._written_uids(refs)
+        try:
+            return await self.store.bulk_put(refs)
+        finally:
+            self.invalidate(uids)
+
+    async def bulk_patch(self, refs: List[Ref]) -> List[Ref]:
+        uids = await self._written_uids(refs)
+        try:
+            return await self.store.bulk_patch(refs)
+        finally:
+            self.invalidate(uids)
+
+    async def bulk_delete(self, refs: List[Ref]) -> None:
+        uids = await self._written_uids(refs)
+        try:
+            return await self.store.bulk_delete(refs)
+        finally:
+            self.invalidate(uids)
@@ -0,0 +1,330 @@
+from typing import Any, Dict, Optional, Type, Union
+
+import pickle
+import uuid
+from datetime import date, datetime, time, timedelta
+from enum import Enum
+from functools import lru_cache
+
+import numpy as np
+from pydantic.v1 import BaseModel, ValidationError
+from pydantic.v1.fields import ModelField
+
+from constelite.models import (
+    StateModel, Dynamic, get_auto_resolve_model, resolve_model
+)
+from constelite.store.queries import Projection
+
+# Marks dynamics serialised as timestamp and value columns
+DYNAMIC_TAG = '__dynamic__'
+
+_PRIMITIVES = (str, int, float, bool)
+
+
+def to_document(state: StateModel) -> Dict[str, Any]:
+    """
+    Converts a state into plain values tagged with model names.
+
+    Same as `state.dict()`, except that dynamics are kept as a column of
+    timestamps and a column of values.
+    """
+    document = {'model_name': state.model_name or type(state).__name__}
+    for name, value in state.__dict__.items():
+        if name != 'model_name':
+            document[name] = _encode_value(value)
+    return document
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, Dynamic):
+        values = value.values
+        if isinstance(values, np.ndarray):
+            values = values.tolist()
+        else:
+            values = [
+                v.dict() if isinstance(v, BaseModel) else v for v in values
+            ]
+        return {
+            DYNAMIC_TAG: True,
+            'timestamps': value.timestamps.tolist(),
+            'values': values
+        }
+    if isinstance(value, StateModel):
+        return to_document(value)
+    if isinstance(value, BaseModel):
+        return value.dict()
+    if isinstance(value, list):
+        return [_encode_value(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _encode_value(v) for k, v in value.items()}
+    return value
+
+
+def from_document(document: Dict[str, Any]) -> StateModel:
+    """
+    Creates a state from the values produced by `to_document()` or
+    `state.dict()`.
+
+    Values that already have the type of their field, dynamics stored as
+    columns and nested states are set without validation. Other values
+    are validated by their field. States of models with validators of
+    their own are validated as a whole, see `_has_validators()`.
+    """
+    values = dict(document)
+    model_name = values.pop('model_name', None)
+    model_type = (
+        get_auto_resolve_model(model_name=model_name)
+        if model_name is not None else None
+    )
+    if model_type is None or not issubclass(model_type, StateModel):
+        # Raises the errors of an unknown model
+        return resolve_model(values=document)
+
+    fields = {}
+    for name, raw in values.items():
+        field = model_type.__fields__.get(name)
+        fields[name] = (
+            raw if field is None
+            else _decode_field(model_type, field, raw)
+        )
+
+    if _has_validators(model_type):
+        return model_type.validate(fields | {'model_name': model_name})
+
+    return model_type.construct(
+        _fields_set=set(fields),
+        model_name=model_name,
+        **fields
+    )
+
+
+@lru_cache(maxsize=None)
+def _has_validators(model_type: Type[StateModel]) -> bool:
+    """
+    Checks if a state model has root or field validators other than those
+    of `StateModel`.
+
+    `construct()` skips them, so states of such models are validated.
+    """
+    base_validators = {fn for _, fn in StateModel.__post_root_validators__}
+    return (
+        len(model_type.__pre_root_validators__) > 0
+        or any(
+            fn not in base_validators
+            for _, fn in model_type.__post_root_validators__
+        )
+        or any(
+            len(field.class_validators) > 0
+            for field in model_type.__fields__.values()
+        )
+    )
+
+
+def _decode_field(model_type, field: ModelField, raw: Any) -> Any:
+    if raw is None:
+        return None
+
+    outer_type = field.outer_type_
+    if outer_type in _PRIMITIVES and type(raw) is outer_type:
+        return raw
+
+    if isinstance(raw, dict) and isinstance(outer_type, type):
+        if raw.get(DYNAMIC_TAG, False) and issubclass(outer_type, Dynamic):
+            return _decode_dynamic(outer_type, raw)
+
+        if (
+            issubclass(outer_type, StateModel)
+            and raw.get('model_name', None) not in (None, 'Ref')
+        ):
+            state = from_document(raw)
+            if isinstance(state, outer_type):
+                return state
+
+    value, errors = field.validate(raw, {}, loc=field.name, cls=model_type)
+    if errors:
+        raise ValidationError([errors], model_type)
+    return value
+
+
+def _decode_dynamic(dynamic_type, raw: Dict[str, Any]) -> Dynamic:
+    point_type = dynamic_type._get_point_type()
+    values = raw['values']
+
+    if point_type is float:
+        values = np.asarray(values, dtype='float64')
+    elif isinstance(point_type, type) and issubclass(point_type, BaseModel):
+        values = [
+            point_type(**v) if isinstance(v, dict) else v for v in values
+        ]
+
+    return dynamic_type.from_columns(
+        timestamps=raw['timestamps'],
+        values=values
+    )
+
+
+def _default(value: Any) -> Any:
+    """Converts values the binary formats don't support natively."""
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (np.ndarray, np.generic)):
+        return value.tolist()
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    if isinstance(value, BaseModel):
+        return value.dict()
+    raise TypeError(f"Can't serialise {type(value).__name__}")
+
+
+class StateCodec:
+    """
+    Serialises states of a uid-key store.
+
+    States are converted with `to_document()` before they are serialised
+    and restored with `from_document()`. Subclasses implement `dumps` and
+    `loads` of the documents.
+    """
+    name: str = None
+
+    def dumps(self, document: Dict[str, Any]) -> bytes:
+        raise NotImplementedError
+
+    def loads(self, data: Union[bytes, memoryview]) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def encode(self, state: StateModel) -> bytes:
+        return self.dumps(to_document(state))
+
+    def decode(
+            self,
+            data: Union[bytes, memoryview, Dict[str, Any]],
+            projection: Optional[Projection] = None) -> StateModel:
+        """
+        Restores a state from the serialised data.
+
+        Data of stores written before codecs were introduced can be given
+        as the already deserialised dictionary.
+        """
+        document = data if isinstance(data, dict) else self.loads(data)
+        if projection is not None:
+            document = projection.select_values(document)
+        return from_document(document)
+
+
+class PickleCodec(StateCodec):
+    """Pickles the documents. Reads pickled `state.dict()` values too."""
+    name = 'pickle'
+
+    def dumps(self, document: Dict[str, Any]) -> bytes:
+        return pickle.dumps(document, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def loads(self, data: Union[bytes, memoryview]) -> Dict[str, Any]:
+        return pickle.loads(data)
+
+
+class OrjsonCodec(StateCodec):
+    """Serialises the documents as JSON with orjson."""
+    name = 'orjson'
+
+    def __init__(self):
+        try:
+            import orjson
+        except ImportError:
+            raise ImportError(
+                "The orjson codec requires the 'orjson' package"
+            )
+        self._orjson = orjson
+
+    def dumps(self, document: Dict[str, Any]) -> bytes:
+        return self._orjson.dumps(
+            document,
+            default=_default,
+            option=(
+                self._orjson.OPT_SERIALIZE_NUMPY
+                | self._orjson.OPT_NON_STR_KEYS
+            )
+        )
+
+    def loads(self, data: Union[bytes, memoryview]) -> Dict[str, Any]:
+        return self._orjson.loads(data)
+
+
+class MsgpackCodec(StateCodec):
+    """Serialises the documents with MessagePack."""
+    name = 'msgpack'
+
+    def __init__(self):
+        try:
+            import msgpack
+        except ImportError:
+            raise ImportError(
+                "The msgpack codec requires the 'msgpack' package"
+            )
+        self._msgpack = msgpack
+
+    def dumps(self, document: Dict[str, Any]) -> bytes:
+        return self._msgpack.packb(document, default=_default)
+
+    def loads(self, data: Union[bytes, memoryview]) -> Dict[str, Any]:
+        return self._msgpack.unpackb(data, strict_map_key=False)
+
+
+class ZstdCodec(StateCodec):
+    """Compresses the output of another codec with zstd.
+
+    Arguments:
+        codec: Codec serialising the documents.
+        level: Compression level.
+    """
+    def __init__(self, codec: StateCodec, level: int = 3):
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError(
+                "zstd compression requires the 'zstandard' package"
+            )
+        self.codec = codec
+        self.name = f'{codec.name}+zstd'
+        self._compressor = zstandard.ZstdCompressor(level=level)
+        self._decompressor = zstandard.ZstdDecompressor()
+
+    def dumps(self, document: Dict[str, Any]) -> bytes:
+        return self._compressor.compress(self.codec.dumps(document))
+
+    def loads(self, data: Union[bytes, memoryview]) -> Dict[str, Any]:
+        return self.codec.loads(self._decompressor.decompress(data))
+
+
+_CODECS = {
+    PickleCodec.name: PickleCodec,
+    OrjsonCodec.name: OrjsonCodec,
+    MsgpackCodec.name: MsgpackCodec,
+}
+
+
+def get_codec(name: str) -> StateCodec:
+    """
+    Returns the codec with the given name.
+
+    Names are 'pickle', 'orjson' and 'msgpack', with a '+zstd' suffix for
+    zstd compression, e.g. 'msgpack+zstd'.
+
+    Raises:
+        ValueError: If there is no codec with the name.
+        ImportError: If the package the codec needs is not installed.
+    """
+    base_name, _, compression = name.partition('+')
+    codec_type = _CODECS.get(base_name, None)
+    if codec_type is None or compression not in ('', 'zstd'):
+        raise ValueError(f"Unknown codec '{name}'")
+
+    codec = codec_type()
+    if compression == 'zstd':
+        codec = ZstdCodec(codec)
+    return codec
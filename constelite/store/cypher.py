@@ -0,0 +1,253 @@
+"""
+Cypher statements used by the Neo4j-backed store and GUID maps.
+
+Values are always passed as `$parameters`, so the text of each statement is
+constant and Neo4j can reuse its compiled query plan across calls.
+"""
+from typing import Tuple, Optional
+from functools import lru_cache
+
+from loguru import logger
+
+UID_FIELD = '_uid'
+LIVE_LABEL = "_LiveNode"
+
+STORE_LABEL = "_Store"
+ENTITY_LABEL = "_Entity"
+STORED_REL_LABEL = "_STORED_IN"
+
+RELATIONSHIP_TYPES = ('Association', 'Composition', 'Aggregation')
+
+STATEMENTS = {
+    # NeofluxStore
+    'uid_exists': (
+        f"MATCH (n:{LIVE_LABEL} {{{UID_FIELD}: $uid}})"
+        " RETURN count(n) > 0"
+    ),
+    'get_outgoing_relations': (
+        f"MATCH (n {{{UID_FIELD}: $uid}})-[r]->(m)"
+        f" RETURN r.from_field AS field, m.{UID_FIELD} AS uid,"
+        " m.model_name AS model_name"
+    ),
+    'get_incoming_relations': (
+        f"MATCH (m)-[r]->(n {{{UID_FIELD}: $uid}})"
+        " WHERE r.to_field IS NOT NULL"
+        f" RETURN r.to_field AS field, m.{UID_FIELD} AS uid,"
+        " m.model_name AS model_name"
+    ),
+    'delete_relationships': (
+        f"MATCH (:{LIVE_LABEL} {{{UID_FIELD}: $uid}})"
+        f"-[r {{from_field: $from_field}}]->(n:{LIVE_LABEL})"
+        " DELETE r"
+        f" RETURN n.{UID_FIELD} AS uid"
+    ),
+    'update_node': (
+        f"MATCH (n:{LIVE_LABEL} {{{UID_FIELD}: $uid}})"
+        " SET n += $props"
+    ),
+    'delete_nodes': (
+        "UNWIND $uids AS uid"
+        f" MATCH (n:{LIVE_LABEL} {{{UID_FIELD}: uid}})"
+        " DETACH DELETE n"
+    ),
+    # GUID maps
+    'merge_store': (
+        f"MERGE (s:{STORE_LABEL} {{uid: $store_uid}})"
+        " RETURN s"
+    ),
+    'guid_exists': (
+        f"MATCH (e:{ENTITY_LABEL} {{guid: $guid}})"
+        " RETURN count(e) > 0"
+    ),
+    'get_guid': (
+        f"MATCH (s:{STORE_LABEL} {{uid: $store_uid}})"
+        f"<-[r:{STORED_REL_LABEL} {{uid: $uid}}]-(e:{ENTITY_LABEL})"
+        " RETURN e.guid"
+    ),
+    'get_guids': (
+        f"MATCH (s:{STORE_LABEL} {{uid: $store_uid}})"
+        " UNWIND $uids AS uid"
+        f" MATCH (s)<-[:{STORED_REL_LABEL} {{uid: uid}}]-(e:{ENTITY_LABEL})"
+        " RETURN uid, e.guid AS guid"
+    ),
+    'get_uids': (
+        f"MATCH (s:{STORE_LABEL} {{uid: $store_uid}})"
+        " UNWIND $guids AS guid"
+        f" MATCH (s)<-[r:{STORED_REL_LABEL}]-(:{ENTITY_LABEL} {{guid: guid}})"
+        " RETURN guid, r.uid AS uid"
+    ),
+    'get_uid': (
+        f"MATCH (s:{STORE_LABEL} {{uid: $store_uid}})"
+        f"<-[r:{STORED_REL_LABEL}]-(e:{ENTITY_LABEL} {{guid: $guid}})"
+        " RETURN r.uid"
+    ),
+    'link_uid': (
+        f"MATCH (e:{ENTITY_LABEL} {{guid: $guid}})"
+        f" MERGE (s:{STORE_LABEL} {{uid: $store_uid}})"
+        f" CREATE (e)-[:{STORED_REL_LABEL} {{uid: $uid}}]->(s)"
+        " RETURN e.guid"
+    ),
+    'create_guid': (
+        f"MERGE (s:{STORE_LABEL} {{uid: $store_uid}})"
+        f" CREATE (e:{ENTITY_LABEL} {{guid: $guid}})"
+        f"-[:{STORED_REL_LABEL} {{uid: $uid}}]->(s)"
+    ),
+    'create_guids': (
+        f"MERGE (s:{STORE_LABEL} {{uid: $store_uid}})"
+        " WITH s"
+        " UNWIND $records AS record"
+        f" CREATE (e:{ENTITY_LABEL} {{guid: record.guid}})"
+        f"-[:{STORED_REL_LABEL} {{uid: record.uid}}]->(s)"
+    ),
+    # Candidate guids in `$records` are only used for the uids without an
+    # entity, so the lookup and the creation take one round trip
+    'get_or_create_guids': (
+        f"MERGE (s:{STORE_LABEL} {{uid: $store_uid}})"
+        " WITH s"
+        " UNWIND $records AS record"
+        f" OPTIONAL MATCH (s)<-[:{STORED_REL_LABEL} {{uid: record.uid}}]"
+        f"-(e:{ENTITY_LABEL})"
+        " FOREACH (_ IN CASE WHEN e IS NULL THEN [1] ELSE [] END |"
+        f" CREATE (:{ENTITY_LABEL} {{guid: record.guid}})"
+        f"-[:{STORED_REL_LABEL} {{uid: record.uid}}]->(s))"
+        " RETURN record.uid AS uid, coalesce(e.guid, record.guid) AS guid"
+    ),
+    'delete_uid': (
+        f"MATCH (s:{STORE_LABEL} {{uid: $store_uid}})"
+        f"<-[r:{STORED_REL_LABEL} {{uid: $uid}}]-(e:{ENTITY_LABEL})"
+        " DELETE r"
+    ),
+}
+
+SCHEMA_STATEMENTS = (
+    "CREATE CONSTRAINT live_node_uid IF NOT EXISTS"
+    f" FOR (n:{LIVE_LABEL}) REQUIRE n.{UID_FIELD} IS UNIQUE",
+    "CREATE CONSTRAINT entity_guid IF NOT EXISTS"
+    f" FOR (e:{ENTITY_LABEL}) REQUIRE e.guid IS UNIQUE",
+    "CREATE CONSTRAINT store_uid IF NOT EXISTS"
+    f" FOR (s:{STORE_LABEL}) REQUIRE s.uid IS UNIQUE",
+)
+
+
+def statement(name: str) -> str:
+    """Returns the text of a registered Cypher statement.
+    """
+    return STATEMENTS[name]
+
+
+@lru_cache(maxsize=None)
+def get_states_statement(
+        prop_names: Optional[Tuple[str, ...]] = None,
+        with_relationships: bool = True) -> str:
+    """Returns a statement fetching properties and relationships in both
+    directions of the nodes with uids in `$uids`.
+
+    Only the given properties are returned if `prop_names` is given.
+    Relationships are limited to the fields in `$rel_fields`, unless it is
+    null, and are not fetched at all if `with_relationships` is false.
+    """
+    if prop_names is None:
+        data = "properties(n)"
+    else:
+        data = "n {" + ", ".join(
+            f".`{prop_name}`" for prop_name in prop_names
+        ) + "}"
+
+    statement_str = (
+        "UNWIND $uids AS uid"
+        f" MATCH (n:{LIVE_LABEL} {{{UID_FIELD}: uid}})"
+        f" RETURN uid, {data} AS data"
+    )
+
+    if not with_relationships:
+        return statement_str + ", [] AS outgoing, [] AS incoming"
+
+    return statement_str + (
+        ", [(n)-[r]->(m)"
+        " WHERE $rel_fields IS NULL OR r.from_field IN $rel_fields | {"
+        f"field: r.from_field, uid: m.{UID_FIELD},"
+        " model_name: m.model_name}] AS outgoing,"
+        " [(m)-[r]->(n) WHERE r.to_field IS NOT NULL"
+        " AND ($rel_fields IS NULL OR r.to_field IN $rel_fields) | {"
+        f"field: r.to_field, uid: m.{UID_FIELD},"
+        " model_name: m.model_name}] AS incoming"
+    )
+
+
+@lru_cache(maxsize=None)
+def create_nodes_statement(labels: Tuple[str, ...]) -> str:
+    """Returns a statement creating nodes with the given labels from
+    `$rows`, one node per row of properties.
+
+    Labels can't be parameterised, so one statement is cached per set of
+    labels.
+    """
+    label_str = ":".join(f"`{label}`" for label in labels)
+    return (
+        "UNWIND $rows AS row"
+        f" CREATE (n:{label_str})"
+        " SET n = row"
+    )
+
+
+@lru_cache(maxsize=None)
+def create_relationships_statement(
+        rel_type: str, with_to_field: bool) -> str:
+    """Returns a statement linking node `$from_uid` to every node in
+    `$to_uids` with a relationship of the given type.
+
+    Relationships are merged, so existing ones are not duplicated.
+    """
+    if rel_type not in RELATIONSHIP_TYPES:
+        raise ValueError(f"Unsupported relationship type '{rel_type}'")
+
+    rel_props = "from_field: $from_field"
+    if with_to_field:
+        rel_props += ", to_field: $to_field"
+
+    return (
+        f"MATCH (a:{LIVE_LABEL} {{{UID_FIELD}: $from_uid}})"
+        " UNWIND $to_uids AS to_uid"
+        f" MATCH (b:{LIVE_LABEL} {{{UID_FIELD}: to_uid}})"
+        f" MERGE (a)-[r:`{rel_type}` {{{rel_props}}}]->(b)"
+    )
+
+
+@lru_cache(maxsize=None)
+def match_nodes_statement(label: str, prop_names: Tuple[str, ...]) -> str:
+    """Returns a statement matching nodes with the given label whose
+    properties are equal to the values in the `$props` map.
+    """
+    statement_str = f"MATCH (n:`{label}`)"
+
+    if len(prop_names) > 0:
+        statement_str += " WHERE " + " AND ".join(
+            f"n.`{prop_name}` = $props.`{prop_name}`"
+            for prop_name in prop_names
+        )
+
+    return statement_str + f" RETURN n.{UID_FIELD} AS uid"
+
+
+def bootstrap_schema(graph) -> None:
+    """Creates indexes and constraints used by the statements above.
+
+    Failures (e.g. missing privileges) are logged and ignored, as the
+    statements work without the schema, only slower.
+    """
+    for schema_statement in SCHEMA_STATEMENTS:
+        try:
+            graph.run(schema_statement)
+        except Exception as e:
+            logger.warning(f"Failed to create Neo4j schema: {repr(e)}")
+
+
+async def async_bootstrap_schema(driver) -> None:
+    """Creates the schema as `bootstrap_schema` does, using an async
+    neo4j driver.
+    """
+    for schema_statement in SCHEMA_STATEMENTS:
+        try:
+            await driver.execute_query(schema_statement)
+        except Exception as e:
+            logger.warning(f"Failed to create Neo4j schema: {repr(e)}")
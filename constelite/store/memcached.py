@@ -1,30 +1,78 @@
-from typing import Type, Optional
-from pydantic.v1 import Field
+from typing import Type, Optional, Dict, List, Union
+from pydantic.v1 import Field, PrivateAttr
 
 from constelite.models import (
-    StateModel, UID, resolve_model
+    StateModel, UID
 )
 
+from constelite.executor import (
+    BoundedExecutor, ExecutorConfig, ThreadExecutorMixin
+)
 from constelite.store.uid_key_base import UIDKeyStoreBase
+from constelite.store.queries import (
+    DynamicQuery, Projection, apply_dynamic_queries
+)
 
-from pymemcache.client.base import Client
+from pymemcache.client.base import PooledClient
+from pymemcache.client.hash import HashClient
 from pymemcache import serde
 
 
-class MemcachedStore(UIDKeyStoreBase):
+class MemcachedStore(ThreadExecutorMixin, UIDKeyStoreBase):
+    """
+    Store keeping records in memcached.
+
+    Connections are taken from a pool, so concurrent calls don't share a
+    socket. With several `servers`, records are spread over them with
+    consistent hashing. The blocking client calls run in `thread_executor`.
+
+    Attributes:
+        host: Address of the memcached server.
+        servers: Addresses of several memcached servers, used instead of
+            `host`.
+        max_pool_size: Maximum number of connections per server.
+        executor_config: Configuration of the executor of the client
+            calls. The default executor is used if not given.
+    """
     _allowed_methods = ["PUT", "GET", "PATCH", "DELETE"]
     host: Optional[str] = Field(exclude=True)
-    client: Optional[Client] = Field(exclude=True)
+    servers: Optional[List[str]] = Field(default=None, exclude=True)
+    max_pool_size: int = Field(default=16, exclude=True)
+    client: Optional[Union[PooledClient, HashClient]] = Field(exclude=True)
+
+    executor_config: Optional[ExecutorConfig] = Field(
+        default=None,
+        exclude=True
+    )
+    _thread_executor: Optional[BoundedExecutor] = PrivateAttr(default=None)
 
     class Config:
         arbitrary_types_allowed = True
 
     def __init__(self, **data):
         super().__init__(**data)
-        self.client = Client(self.host, serde=serde.pickle_serde)
+        if self.client is None:
+            if self.servers:
+                self.client = HashClient(
+                    self.servers,
+                    use_pooling=True,
+                    max_pool_size=self.max_pool_size,
+                    serde=serde.pickle_serde
+                )
+            else:
+                self.client = PooledClient(
+                    self.host,
+                    max_pool_size=self.max_pool_size,
+                    serde=serde.pickle_serde
+                )
+
+    async def _call(self, method: str, *args, **kwargs):
+        return await self.thread_executor.run(
+            getattr(self.client, method), *args, **kwargs
+        )
 
     async def uid_exists(self, uid: UID, model_type: Type[StateModel]) -> bool:
-        model = self.client.get(uid)
+        model = await self._call('get', uid)
         return model is not None
 
     async def get_state_by_uid(
@@ -32,27 +80,52 @@ class MemcachedStore(UIDKeyStoreBase):
             uid: UID,
             model_type: Type[StateModel]
     ) -> StateModel:
-        if not await self.uid_exists(
-            uid=uid,
-            model_type=model_type
-        ):
+        # One round trip, a missing record comes back as None
+        data = await self._call('get', uid)
+        if data is None:
             raise ValueError(f"Model with reference '{uid}' cannot be found")
-        else:
-            model = self.client.get(uid)
-            return resolve_model(values=model)
+        return self.decode_state(data)
+
+    async def get_states_by_uids(
+            self,
+            uids: List[UID],
+            model_type: Type[StateModel],
+            dynamic_queries: Optional[Dict[str, DynamicQuery]] = None,
+            projection: Optional[Projection] = None
+    ) -> Dict[UID, StateModel]:
+        found = await self._call('get_many', uids)
+        return {
+            uid: apply_dynamic_queries(
+                state=self.decode_state(data, projection=projection),
+                dynamic_queries=dynamic_queries
+            )
+            for uid, data in found.items()
+        }
 
     async def store(self, uid: str, model: StateModel) -> str:
-        self.client.set(uid, model.dict())
+        await self._call('set', uid, self.encode_state(model))
 
         return uid
 
+    async def store_many(self, models: Dict[UID, StateModel]) -> List[UID]:
+        failed = await self._call(
+            'set_many',
+            {uid: self.encode_state(model) for uid, model in models.items()}
+        )
+        if failed:
+            raise ValueError(f"Failed to store models {failed}")
+
+        return list(models.keys())
+
     async def delete_model(
             self,
             model_type: Type[StateModel],
             uid: UID) -> None:
-        if await self.uid_exists(
-            uid=uid,
-            model_type=model_type
-        ):
-            self.client.delete(uid)
+        # Deleting a missing key is a no-op, no need to check first
+        await self._call('delete', uid)
 
+    async def delete_models(
+            self,
+            model_type: Type[StateModel],
+            uids: List[UID]) -> None:
+        await self._call('delete_many', uids)
@@ -1,4 +1,4 @@
-from typing import Optional, Type, Dict
+from typing import Optional, Type, Dict, List
 
 from pydantic.v1 import Field
 
@@ -9,6 +9,9 @@ from constelite.models import (
 from constelite.store.uid_key_base import (
     UIDKeyStoreBase
 )
+from constelite.store.queries import (
+    DynamicQuery, Projection, apply_dynamic_queries, apply_projection
+)
 
 
 class MemoryStore(UIDKeyStoreBase):
@@ -40,6 +43,25 @@ class MemoryStore(UIDKeyStoreBase):
         else:
             return self.memory[uid]
 
+    async def get_states_by_uids(
+            self,
+            uids: List[UID],
+            model_type: Type[StateModel],
+            dynamic_queries: Optional[Dict[str, DynamicQuery]] = None,
+            projection: Optional[Projection] = None
+    ) -> Dict[UID, StateModel]:
+        return {
+            uid: apply_dynamic_queries(
+                state=apply_projection(
+                    state=self.memory[uid],
+                    projection=projection
+                ),
+                dynamic_queries=dynamic_queries
+            )
+            for uid in uids
+            if uid in self.memory
+        }
+
     async def delete_model(
             self,
             model_type: Type[StateModel],
@@ -2,36 +2,53 @@ from typing import Optional, Dict, List, Tuple, Type
 from uuid import uuid4
 
 import json
+import threading
+
+from contextlib import contextmanager
 
 from datetime import timezone
 
 import datetime
 from dateutil.parser import isoparse
 
+import numpy as np
 import pandas as pd
 
 from inspect import getmro
 
-from pydantic.v1 import Field, BaseModel, UUID4
+from pydantic.v1 import Field, BaseModel, UUID4, PrivateAttr
 
 from constelite.store import BaseStore, PropertyQuery
+from constelite.store.queries import DynamicQuery, Projection
+from constelite.utils import to_thread, thread_map
 
 from constelite.models import (
     StateModel, StaticTypes, Dynamic, UID,
-    RelInspector, resolve_model, Tensor, TimePoint, Ref
+    RelInspector, resolve_model, Tensor, Ref, InspectionPlan
 )
 
-from py2neo import Graph, Node, Relationship
-from influxdb_client import InfluxDBClient
-from influxdb_client.client.write_api import SYNCHRONOUS
+from constelite.store.cypher import (
+    UID_FIELD, LIVE_LABEL, statement, bootstrap_schema,
+    get_states_statement, create_nodes_statement,
+    create_relationships_statement, match_nodes_statement
+)
 
-UID_FIELD = '_uid'
-LIVE_LABEL = "_LiveNode"
+from py2neo import Graph, Node, Transaction
+from influxdb_client import InfluxDBClient
+from influxdb_client.client.write_api import (
+    ASYNCHRONOUS, WriteApi, PointSettings
+)
+from influxdb_client.client.write.dataframe_serializer import (
+    data_frame_to_list_of_points
+)
 
 
 class NeoConfig(BaseModel):
     url: str
     auth: Tuple[str, str]
+    bootstrap_schema: bool = True
+    # Used by the async driver only
+    max_connection_pool_size: int = 100
 
 
 class InfluxConfig(BaseModel):
@@ -39,6 +56,9 @@ class InfluxConfig(BaseModel):
     token: str
     org: str
     bucket: str
+    write_batch_size: int = 5000
+    # Used by the async client only
+    connection_pool_maxsize: int = 100
 
 
 class NeofluxStore(BaseStore):
@@ -55,6 +75,9 @@ class NeofluxStore(BaseStore):
 
     graph: Optional[Graph] = Field(exclude=True)
     influx: Optional[InfluxDBClient] = Field(exclude=True)
+    influx_write_api: Optional[WriteApi] = Field(exclude=True)
+
+    _local: threading.local = PrivateAttr(default_factory=threading.local)
 
     class Config:
         arbitrary_types_allowed = True
@@ -62,20 +85,112 @@ class NeofluxStore(BaseStore):
     def __init__(self, **data):
         super().__init__(**data)
         self.graph = Graph(self.neo_config.url, auth=self.neo_config.auth)
+        if self.neo_config.bootstrap_schema:
+            bootstrap_schema(self.graph)
         self.influx = InfluxDBClient(
             url=self.influx_config.url,
             token=self.influx_config.token,
             org=self.influx_config.org
         )
-
-    def write_points(self, points):
-        write_api = self.influx.write_api(write_options=SYNCHRONOUS)
-        write_api.write(
-            self.influx_config.bucket,
-            self.influx_config.org,
-            points
+        self.influx_write_api = self.influx.write_api(
+            write_options=ASYNCHRONOUS
         )
 
+    @property
+    def transaction(self) -> Optional[Transaction]:
+        """Neo4j transaction of the write in progress in this thread.
+        """
+        return getattr(self._local, 'transaction', None)
+
+    def run(self, query: str, **parameters):
+        """Runs a Cypher statement in the current write transaction, if
+        any, so that it sees the changes made before it.
+        """
+        if self.transaction is not None:
+            return self.transaction.run(query, **parameters)
+        return self.graph.run(query, **parameters)
+
+    @contextmanager
+    def write_transaction(self):
+        """
+        Runs all Cypher statements of the block in one Neo4j transaction,
+        committed at the end of the block or rolled back on an error.
+
+        Influx writes and deletes of the block are queued and sent once
+        the transaction is committed, consecutive writes in one batch.
+        They are dropped if the transaction is rolled back. Nested blocks
+        join the outer transaction.
+
+        Guid map changes are not part of the transaction.
+        """
+        if self.transaction is not None:
+            yield
+            return
+
+        self._local.transaction = self.graph.begin()
+        self._local.influx_ops = []
+        try:
+            yield
+        except BaseException:
+            self.graph.rollback(self._local.transaction)
+            raise
+        else:
+            self.graph.commit(self._local.transaction)
+        finally:
+            influx_ops = self._local.influx_ops
+            self._local.transaction = None
+            self._local.influx_ops = None
+
+        points = []
+        for op, args in influx_ops:
+            if op == 'write':
+                points.extend(args)
+                continue
+            if points:
+                self._write_points(points)
+                points = []
+            self._delete_points(**args)
+        if points:
+            self._write_points(points)
+
+    def write_points(self, points: List[str]):
+        """Writes line-protocol points, after the commit of the current
+        write transaction if there is one.
+        """
+        if self.transaction is not None:
+            self._local.influx_ops.append(('write', points))
+        else:
+            self._write_points(points)
+
+    def delete_points(self, model_type, uid, field_name=None):
+        """Deletes points of a record, after the commit of the current
+        write transaction if there is one.
+        """
+        args = dict(model_type=model_type, uid=uid, field_name=field_name)
+        if self.transaction is not None:
+            self._local.influx_ops.append(('delete', args))
+        else:
+            self._delete_points(**args)
+
+    def _write_points(self, points: List[str]):
+        """Writes line-protocol points in batches.
+
+        Batches are sent concurrently and the call returns once all of them
+        are written, so that the points can be read straight after.
+        """
+        batch_size = self.influx_config.write_batch_size
+        results = [
+            self.influx_write_api.write(
+                self.influx_config.bucket,
+                self.influx_config.org,
+                points[i:i + batch_size]
+            )
+            for i in range(0, len(points), batch_size)
+        ]
+
+        for result in results:
+            result.get()
+
     def query_points(self, query):
         query_api = self.influx.query_api()
         res = query_api.query_stream(
@@ -84,7 +199,7 @@ class NeofluxStore(BaseStore):
         )
         return list(res)
 
-    def delete_points(self, model_type, uid, field_name=None):
+    def _delete_points(self, model_type, uid, field_name=None):
         delete_api = self.influx.delete_api()
 
         predicate = (
@@ -103,11 +218,71 @@ class NeofluxStore(BaseStore):
             predicate=predicate
         )
 
+    def _map_related(self, fn, items, message: str) -> list:
+        # A py2neo transaction can't be shared between threads
+        if self.transaction is not None:
+            return thread_map(fn, items, max_workers=1, message=message)
+        return super()._map_related(fn, items, message=message)
+
+    @to_thread
+    def put(self, ref: Ref) -> Ref:
+        """
+        Puts the record and the records related to it in one Neo4j
+        transaction. See `BaseStore.put`.
+        """
+        with self.write_transaction():
+            return BaseStore.put._sync_fn(self, ref)
+
+    @to_thread
+    def patch(self, ref: Ref) -> Ref:
+        """
+        Patches the record and the records related to it in one Neo4j
+        transaction. See `BaseStore.patch`.
+        """
+        with self.write_transaction():
+            return BaseStore.patch._sync_fn(self, ref)
+
+    @to_thread
+    def delete(self, ref: Ref) -> None:
+        """
+        Deletes the record and its orphans in one Neo4j transaction. See
+        `BaseStore.delete`.
+        """
+        with self.write_transaction():
+            return BaseStore.delete._sync_fn(self, ref)
+
+    @to_thread
+    def bulk_put(self, refs: List[Ref]) -> List[Ref]:
+        """
+        Puts several records in one Neo4j transaction. See
+        `BaseStore.bulk_put`.
+        """
+        with self.write_transaction():
+            return BaseStore.bulk_put._sync_fn(self, refs)
+
+    @to_thread
+    def bulk_patch(self, refs: List[Ref]) -> List[Ref]:
+        """
+        Patches several records in one Neo4j transaction. See
+        `BaseStore.bulk_patch`.
+        """
+        with self.write_transaction():
+            return BaseStore.bulk_patch._sync_fn(self, refs)
+
+    @to_thread
+    def bulk_delete(self, refs: List[Ref]) -> None:
+        """
+        Deletes several records in one Neo4j transaction. See
+        `BaseStore.bulk_delete`.
+        """
+        with self.write_transaction():
+            return BaseStore.bulk_delete._sync_fn(self, refs)
+
     def uid_exists(self, uid: UID, model_type: Type[StateModel]) -> bool:
-        return self.graph.nodes.match(
-                LIVE_LABEL,
-                **{UID_FIELD: uid}
-            ).exists()
+        return self.run(
+            statement('uid_exists'),
+            uid=uid
+        ).evaluate()
 
     def get_node(self, uid: UID) -> Node:
         return self.graph.nodes.match(
@@ -116,133 +291,277 @@ class NeofluxStore(BaseStore):
             ).first()
 
     def get_relations(self, node) -> Dict[str, Ref]:
-        rel_dict = {}
-        res = self.graph.run(
-            f"MATCH (n {{{UID_FIELD}:\"{node[UID_FIELD]}\"}})"
-            "-[r]->(m)"
-            f" RETURN r.from_field, m.{UID_FIELD}, m.model_name"
-        ).data()
-
-        for row in res:
-            from_field_name = row['r.from_field']
-
-            if from_field_name not in rel_dict:
-                rel_dict[from_field_name] = []
-            rel_dict[from_field_name].append(
-                self.generate_ref(
-                    uid=row[f"m.{UID_FIELD}"],
-                    state_model_name=row["m.model_name"]
-                )
-            )
-
-        res = self.graph.run(
-            "MATCH (m)"
-            f"-[r]->(n {{{UID_FIELD}:\"{node[UID_FIELD]}\"}})"
-            " WHERE EXISTS(r.to_field)"
-            f" RETURN r.to_field, m.{UID_FIELD}, m.model_name"
-        ).data()
+        rows = []
+        for statement_name in (
+                'get_outgoing_relations', 'get_incoming_relations'):
+            rows.extend(self.run(
+                statement(statement_name),
+                uid=node[UID_FIELD]
+            ).data())
+
+        refs = self.generate_refs(
+            uids=[row['uid'] for row in rows],
+            state_model_names={row['uid']: row['model_name'] for row in rows}
+        )
 
-        for row in res:
-            to_field_name = row['r.to_field']
-
-            if to_field_name not in rel_dict:
-                rel_dict[to_field_name] = []
-            rel_dict[to_field_name].append(
-                self.generate_ref(
-                    uid=row[f"m.{UID_FIELD}"],
-                    state_model_name=row["m.model_name"]
-                )
-            )
+        rel_dict = {}
+        for row, ref in zip(rows, refs):
+            rel_dict.setdefault(row['field'], []).append(ref)
 
         return rel_dict
 
-    def create_model(
-            self,
-            model_type: StateModel,
-            static_props: Dict[str, StaticTypes],
-            dynamic_props: Dict[str, Optional[Dynamic]]) -> UID:
-        mro = getmro(model_type)
+    @staticmethod
+    def get_labels(model_type: Type[StateModel]) -> List[str]:
         labels = []
 
-        for cls in mro:
+        for cls in getmro(model_type):
             labels.append(cls.__name__)
             if cls == StateModel:
                 break
 
         labels.append(LIVE_LABEL)
+        return labels
+
+    @staticmethod
+    def serialise_static_props(
+            props: Dict[str, StaticTypes]) -> Dict[str, StaticTypes]:
+        for prop_name, prop in props.items():
+            if isinstance(prop, BaseModel):
+                props[prop_name] = prop.json()
+        return props
 
+    def create_model(
+            self,
+            model_type: StateModel,
+            static_props: Dict[str, StaticTypes],
+            dynamic_props: Dict[str, Optional[Dynamic]]) -> UID:
         uid = str(uuid4())
 
         static_props[UID_FIELD] = uid
 
-        for prop_name, prop in static_props.items():
-            if isinstance(prop, BaseModel):
-                static_props[prop_name] = prop.json()
+        static_props = self.serialise_static_props(static_props)
 
-        node = Node(*labels, **static_props)
-
-        tx = self.graph.begin()
-        tx.create(node)
-        self.graph.commit(tx)
+        self.run(
+            create_nodes_statement(tuple(self.get_labels(model_type))),
+            rows=[static_props]
+        )
 
-        for prop_name, prop in dynamic_props.items():
-            self.write_dynamic_to_influx(
+        self.write_points([
+            point
+            for prop_name, prop in dynamic_props.items()
+            for point in self.dynamic_to_points(
                 uid=uid,
                 model_type_name=model_type.__name__,
                 prop_name=prop_name,
                 prop=prop
             )
+        ])
 
         return uid
 
+    def create_models(
+            self,
+            model_type: Type[StateModel],
+            static_props: List[Dict[str, StaticTypes]],
+            dynamic_props: List[Dict[str, Optional[Dynamic]]]) -> List[UID]:
+        uids = [str(uuid4()) for _ in static_props]
+
+        rows = [
+            self.serialise_static_props(props | {UID_FIELD: uid})
+            for uid, props in zip(uids, static_props)
+        ]
+
+        self.run(
+            create_nodes_statement(tuple(self.get_labels(model_type))),
+            rows=rows
+        )
+
+        points = [
+            point
+            for uid, props in zip(uids, dynamic_props)
+            for prop_name, prop in props.items()
+            for point in self.dynamic_to_points(
+                uid=uid,
+                model_type_name=model_type.__name__,
+                prop_name=prop_name,
+                prop=prop
+            )
+        ]
+
+        self.write_points(points)
+
+        return uids
+
     def write_dynamic_to_influx(
         self, uid: UID, model_type_name: str, prop_name: str, prop: Dynamic
     ):
         if prop is None:
             return
 
-        points = []
-        for timepoint in prop.points:
-            tags = {
-                UID_FIELD: uid
-            }
-            value = timepoint.value
-
-            time = datetime.datetime.utcfromtimestamp(
-                timepoint.timestamp
+        self.write_points(
+            self.dynamic_to_points(
+                uid=uid,
+                model_type_name=model_type_name,
+                prop_name=prop_name,
+                prop=prop
             )
+        )
 
-            if isinstance(value, Tensor):
-                series = value.to_series().reset_index()
-                for idx in range(len(series)):
-                    fields = {
-                        f"{prop_name}": series.iloc[idx:idx+1][value.name].iloc[0]
-                    }
-                    tags = tags | {
-                        f"{prop_name}.{idx_name}": series.iloc[idx:idx+1][idx_name].iloc[0]
+    @staticmethod
+    def dynamic_to_frame(prop_name: str, prop: Dynamic) -> pd.DataFrame:
+        """
+        Converts a dynamic property into a data frame indexed by time, with
+        the value in the `prop_name` column and, for tensors, each tensor
+        index level in a `prop_name.index_name` column.
+        """
+        # Round to microseconds, as datetime.utcfromtimestamp does
+        timestamps = np.round(prop.timestamps * 1e6).astype('int64') * 1000
+        values = prop.values
+
+        if isinstance(values[0], Tensor):
+            frames = []
+            lengths = []
+            for value in values:
+                df = value.to_series().rename(prop_name).reset_index()
+                df.rename(
+                    columns={
+                        idx_name: f"{prop_name}.{idx_name}"
                         for idx_name in value.index_names
-                    }
-                    points.append(
-                        {
-                            "time": time,
-                            "measurement": model_type_name,
-                            "fields": fields,
-                            "tags": tags
-                        }
-                    )
-            else:
-                fields = {
-                    prop_name: value
-                }
-                points.append(
-                    {
-                        "time": time,
-                        "measurement": model_type_name,
-                        "fields": fields,
-                        "tags": tags
-                    }
+                    },
+                    inplace=True
                 )
-        self.write_points(points)
+                frames.append(df)
+                lengths.append(len(df))
+
+            df = pd.concat(frames, ignore_index=True)
+            df.index = pd.to_datetime(
+                np.repeat(timestamps, lengths), unit='ns', utc=True
+            )
+        else:
+            df = pd.DataFrame(
+                {prop_name: values},
+                index=pd.to_datetime(timestamps, unit='ns', utc=True)
+            )
+        return df
+
+    @staticmethod
+    def dynamic_to_points(
+        uid: UID, model_type_name: str, prop_name: str, prop: Dynamic
+    ) -> List[str]:
+        """Converts a dynamic property into line-protocol points.
+        """
+        if prop is None or len(prop) == 0:
+            return []
+
+        df = NeofluxStore.dynamic_to_frame(prop_name=prop_name, prop=prop)
+        df[UID_FIELD] = uid
+
+        return data_frame_to_list_of_points(
+            df,
+            PointSettings(),
+            data_frame_measurement_name=model_type_name,
+            data_frame_tag_columns=[
+                column for column in df.columns if column != prop_name
+            ]
+        )
+
+    @staticmethod
+    def flux_any(column: str, values: List[str]) -> str:
+        """Generates a Flux predicate matching any of the given values.
+
+        Uses a chain of equalities rather than `contains`, so that the
+        filter can be pushed down to the storage engine.
+        """
+        return "(" + " or ".join(
+            f"r.{column} == {json.dumps(value)}" for value in values
+        ) + ")"
+
+    @staticmethod
+    def flux_time(time: datetime.datetime) -> str:
+        """Formats a time as a Flux time literal. Naive times are in UTC.
+        """
+        if time.tzinfo is None:
+            time = time.replace(tzinfo=timezone.utc)
+        return time.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+    @staticmethod
+    def dynamic_records_query(
+            bucket: str,
+            uids: List[UID],
+            model_type: Type,
+            field_names: List[str],
+            dynamic_query: Optional[DynamicQuery] = None
+    ) -> str:
+        """
+        Generates a Flux query fetching points of all given dynamic fields
+        of all given records.
+
+        Time window, aggregation and limit of the `dynamic_query` are
+        applied by Influx.
+        """
+        if dynamic_query is None:
+            dynamic_query = DynamicQuery()
+
+        flux_any = NeofluxStore.flux_any
+        flux_time = NeofluxStore.flux_time
+
+        range_args = 'start: 0'
+        if dynamic_query.start is not None:
+            range_args = f'start: {flux_time(dynamic_query.start)}'
+        if dynamic_query.stop is not None:
+            range_args += f', stop: {flux_time(dynamic_query.stop)}'
+
+        query = (
+            f'from(bucket: "{bucket}")'
+            f' |>range({range_args})'
+            f' |>filter(fn:(r) => r._measurement == "{model_type.__name__}")'
+            f' |>filter(fn:(r) => {flux_any("_field", field_names)})'
+            f' |>filter(fn:(r) => {flux_any(UID_FIELD, uids)})'
+        )
+
+        if dynamic_query.every is not None:
+            every = dynamic_query.every // datetime.timedelta(microseconds=1)
+            query += (
+                f' |>aggregateWindow(every: {every}us,'
+                f' fn: {dynamic_query.aggregate},'
+                ' createEmpty: false, timeSrc: "_start")'
+            )
+
+        if dynamic_query.last is not None:
+            query += f' |>tail(n: {dynamic_query.last})'
+
+        return query
+
+    def query_dynamic_records(
+            self,
+            uids: List[UID],
+            model_type: Type,
+            field_names: List[str],
+            dynamic_query: Optional[DynamicQuery] = None
+    ) -> Dict[Tuple[UID, str], List]:
+        """
+        Fetches points of all given dynamic fields of all given records
+        in a single Flux query.
+
+        Returns:
+            Flux records grouped by (uid, field name).
+        """
+        if len(uids) == 0 or len(field_names) == 0:
+            return {}
+
+        query = self.dynamic_records_query(
+            bucket=self.influx_config.bucket,
+            uids=uids,
+            model_type=model_type,
+            field_names=field_names,
+            dynamic_query=dynamic_query
+        )
+
+        records = {}
+        for point in self.query_points(query=query):
+            key = (point.values[UID_FIELD], point.get_field())
+            records.setdefault(key, []).append(point)
+        return records
 
     def influx_to_dynamic(
             self,
@@ -251,15 +570,25 @@ class NeofluxStore(BaseStore):
             field_name: str,
             point_type: Type,
     ) -> Dynamic:
-        query = (
-            f'from(bucket: "{self.influx_config.bucket}")'
-            f' |>range(start:0)'
-            f' |>filter(fn:(r) => r._field == "{field_name}")'
-            f' |>filter(fn:(r) => r._measurement == "{model_type.__name__}")'
-            f' |>filter(fn:(r) => r.{UID_FIELD} == "{uid}")'
+        records = self.query_dynamic_records(
+            uids=[uid],
+            model_type=model_type,
+            field_names=[field_name]
         )
-        points = list(self.query_points(query=query))
-        timepoints = []
+        return self.records_to_dynamic(
+            points=records.get((uid, field_name), []),
+            field_name=field_name,
+            point_type=point_type
+        )
+
+    @staticmethod
+    def records_to_dynamic(
+            points: List,
+            field_name: str,
+            point_type: Type
+    ) -> Optional[Dynamic]:
+        timestamps = []
+        values = []
 
         if issubclass(point_type, Tensor):
             df = pd.DataFrame(
@@ -288,49 +617,50 @@ class NeofluxStore(BaseStore):
 
                 for timestamp, time_group in time_groups:
                     df = time_group.drop('_time', axis=1)
-                    timepoint = TimePoint(
-                        timestamp=int(timestamp.timestamp()),
-                        value=point_type.from_series(df['_value'])
-                    )
-
-                    timepoints.append(timepoint)
+                    timestamps.append(int(timestamp.timestamp()))
+                    values.append(point_type.from_series(df['_value']))
 
         else:
-            timepoints = [
-                TimePoint(
-                    timestamp=int(point.get_time().timestamp()),
-                    value=point.get_value()
-                )
-                for point in points
-            ]
+            for point in points:
+                timestamps.append(int(point.get_time().timestamp()))
+                values.append(point.get_value())
 
-        if len(timepoints) == 0:
+        if len(timestamps) == 0:
             return None
         else:
-            return Dynamic[point_type](points=timepoints)
+            return Dynamic[point_type].from_columns(
+                timestamps=timestamps,
+                values=values
+            )
 
     def delete_model(
             self,
             model_type: Type[StateModel],
             uid: UID) -> None:
-        node = self.get_node(uid=uid)
-        self.graph.delete(node)
+        self.run(statement('delete_nodes'), uids=[uid])
 
         self.delete_points(model_type=model_type, uid=uid)
 
+    def delete_models(
+            self,
+            model_type: Type[StateModel],
+            uids: List[UID]) -> None:
+        self.run(statement('delete_nodes'), uids=uids)
+
+        # Influx delete predicates do not support OR
+        for uid in uids:
+            self.delete_points(model_type=model_type, uid=uid)
+
     def overwrite_static_props(
             self,
             uid: UID,
             model_type: Type[StateModel],
             props: Dict[str, StaticTypes]) -> None:
-        node = self.get_node(uid=uid)
-
-        for prop_name, prop in props.items():
-            if isinstance(prop, BaseModel):
-                props[prop_name] = prop.json()
-
-        node.update(props)
-        self.graph.push(node)
+        self.run(
+            statement('update_node'),
+            uid=uid,
+            props=self.serialise_static_props(props)
+        )
 
     def overwrite_dynamic_props(
             self,
@@ -377,102 +707,261 @@ class NeofluxStore(BaseStore):
             from_model_type: Type[StateModel],
             rel_from_name: str) -> List[UID]:
 
-        ret = self.graph.run(
-            f"MATCH (:{LIVE_LABEL} {{{UID_FIELD}:\"{from_uid}\"}})"
-            f"-[r {{from_field: \"{rel_from_name}\"}}]->(n:{LIVE_LABEL})"
-            f" DELETE r"
-            f" RETURN n.{UID_FIELD}"
-        )
-        return [r.get(f"n.{UID_FIELD}") for r in ret]
+        res = self.run(
+            statement('delete_relationships'),
+            uid=from_uid,
+            from_field=rel_from_name
+        ).data()
+        return [row['uid'] for row in res]
 
     def create_relationships(
             self,
             from_uid: UID,
             from_model_type: Type[StateModel],
             inspector: RelInspector) -> None:
-        node = self.get_node(uid=from_uid)
         new_to_refs = (
             inspector.to_refs
             if inspector.to_refs is not None
             else []
         )
-        for to_ref in new_to_refs:
-            to_node = self.get_node(uid=to_ref.uid)
-            rel_props = {
-                "from_field": inspector.from_field_name
-            }
 
-            if inspector.to_field_name is not None:
-                rel_props["to_field"] = inspector.to_field_name
-
-            rel = Relationship(
-                node, inspector.rel_type, to_node,
-                **rel_props
-            )
+        if len(new_to_refs) == 0:
+            return
 
-            if not self.graph.exists(rel):
-                self.graph.create(rel)
+        self.run(
+            create_relationships_statement(
+                rel_type=inspector.rel_type,
+                with_to_field=inspector.to_field_name is not None
+            ),
+            from_uid=from_uid,
+            to_uids=[to_ref.uid for to_ref in new_to_refs],
+            from_field=inspector.from_field_name,
+            to_field=inspector.to_field_name
+        )
 
     def get_state_by_uid(
             self,
             uid: UID,
             model_type: Type[StateModel]
     ) -> StateModel:
-        node = self.get_node(uid=uid)
-        rels = self.get_relations(node=node)
-        data = dict(node)
+        states = self.get_states_by_uids(uids=[uid], model_type=model_type)
+        if uid not in states:
+            raise KeyError(f"Model with reference '{uid}' cannot be found")
+        return states[uid]
+
+    def get_states_by_uids(
+            self,
+            uids: List[UID],
+            model_type: Type[StateModel],
+            dynamic_queries: Optional[Dict[str, DynamicQuery]] = None,
+            projection: Optional[Projection] = None
+    ) -> Dict[UID, StateModel]:
+        """
+        Fetches node properties and relationships in both directions for
+        all uids in one Cypher query and dynamic properties in one Flux
+        query per distinct dynamic query.
+
+        Properties, relationships and dynamic properties not selected by
+        the projection are not fetched.
+        """
+        prop_names, rel_fields, dynamic_fields = self.projection_fields(
+            model_type=model_type,
+            projection=projection
+        )
+
+        res = self.run(
+            get_states_statement(
+                prop_names=prop_names,
+                with_relationships=rel_fields is None or len(rel_fields) > 0
+            ),
+            uids=uids,
+            rel_fields=rel_fields
+        ).data()
+
+        query_groups = self.group_dynamic_queries(
+            field_names=list(dynamic_fields.keys()),
+            dynamic_queries=dynamic_queries
+        )
+
+        dynamic_records = {}
+        for dynamic_query, field_names in query_groups:
+            dynamic_records.update(
+                self.query_dynamic_records(
+                    uids=[row['uid'] for row in res],
+                    model_type=model_type,
+                    field_names=field_names,
+                    dynamic_query=dynamic_query
+                )
+            )
+
+        # Guids of all related records in one guid map lookup
+        rel_rows = [
+            rel for row in res for rel in row['outgoing'] + row['incoming']
+        ]
+        rel_refs = iter(self.generate_refs(
+            uids=[rel['uid'] for rel in rel_rows],
+            state_model_names={
+                rel['uid']: rel['model_name'] for rel in rel_rows
+            }
+        ))
+
+        states = {}
+        for row in res:
+            uid = row['uid']
+            rels = {}
+            for rel in row['outgoing'] + row['incoming']:
+                rels.setdefault(rel['field'], []).append(next(rel_refs))
+
+            dynamic_props = {
+                field_name: self.records_to_dynamic(
+                    points=dynamic_records.get((uid, field_name), []),
+                    field_name=field_name,
+                    point_type=point_type
+                )
+                for field_name, point_type in dynamic_fields.items()
+            }
+
+            states[uid] = self.hydrate_state(
+                model_type=model_type,
+                data=row['data'],
+                rels=rels,
+                dynamic_props=dynamic_props
+            )
+        return states
+
+    @staticmethod
+    def projection_fields(
+            model_type: Type[StateModel],
+            projection: Optional[Projection] = None
+    ) -> Tuple[
+        Optional[Tuple[str, ...]], Optional[List[str]], Dict[str, Type]
+    ]:
+        """
+        Returns names of the static properties and of the relationship
+        fields and point types of the dynamic fields selected by the
+        projection.
+
+        Property and relationship names are `None` if all of them are
+        selected.
+        """
+        dynamic_fields = NeofluxStore.get_dynamic_fields(model_type)
+
+        if projection is None:
+            return None, None, dynamic_fields
+
+        field_names = projection.field_names(model_type)
+        field_kinds = {
+            field_plan.field_name: field_plan.kind
+            for field_plan in InspectionPlan.for_model(model_type).fields
+        }
+        prop_names = tuple(
+            field_name for field_name, kind in field_kinds.items()
+            if kind == 'static' and field_name in field_names
+        )
+        rel_fields = [
+            field_name for field_name, kind in field_kinds.items()
+            if kind not in ('static', 'dynamic')
+            and field_name in field_names
+        ]
+        dynamic_fields = {
+            field_name: point_type
+            for field_name, point_type in dynamic_fields.items()
+            if field_name in field_names
+        }
+        return prop_names, rel_fields, dynamic_fields
+
+    @staticmethod
+    def group_dynamic_queries(
+            field_names: List[str],
+            dynamic_queries: Optional[Dict[str, DynamicQuery]] = None
+    ) -> List[Tuple[Optional[DynamicQuery], List[str]]]:
+        """Groups dynamic fields by their dynamic query, so that fields
+        with the same query are fetched together.
+        """
+        query_groups = []
+        for field_name in field_names:
+            dynamic_query = (dynamic_queries or {}).get(field_name, None)
+            for group_query, group_fields in query_groups:
+                if group_query == dynamic_query:
+                    group_fields.append(field_name)
+                    break
+            else:
+                query_groups.append((dynamic_query, [field_name]))
+        return query_groups
+
+    @staticmethod
+    def get_dynamic_fields(model_type: Type[StateModel]) -> Dict[str, Type]:
+        """Returns point types of the dynamic fields of the model.
+        """
+        return {
+            field_name: field.type_._get_point_type()
+            for field_name, field in model_type.__fields__.items()
+            # some typing types, e.g. Literal, Union are not classes in
+            # the normal sense. Cannot run issubclass.
+            if isinstance(field.type_, type)
+            and issubclass(field.type_, Dynamic)
+        }
+
+    @staticmethod
+    def hydrate_state(
+            model_type: Type[StateModel],
+            data: Dict,
+            rels: Dict[str, List[Ref]],
+            dynamic_props: Dict[str, Optional[Dynamic]]
+    ) -> StateModel:
+        """
+        Converts node properties, relationships and dynamic properties
+        into a state.
+        """
         # Remove the UID field. This isn't included in the state.
-        del data[UID_FIELD]
+        data.pop(UID_FIELD, None)
 
         for field_name, field in model_type.__fields__.items():
-            if isinstance(field.type_, type):
-                # some typing types, e.g. Literal, Union are not classes in
-                # the normal sense. Cannot run issubclass.
-                if issubclass(field.type_, Dynamic):
-                    point_type = field.type_._point_type
-                    data[field_name] = self.influx_to_dynamic(
-                        uid=uid,
-                        model_type=model_type,
-                        field_name=field_name,
-                        point_type=point_type,
-                    )
-                elif (
-                        issubclass(field.type_, BaseModel)
-                        and field_name in data
-                ):
-                    json_str = data[field_name]
-                    if json_str is not None:
-                        data[field_name] = field.type_(
-                            **json.loads(node[field_name])
-                        )
-
-        return model_type(**data | rels)
+            if (
+                isinstance(field.type_, type)
+                and not issubclass(field.type_, Dynamic)
+                and issubclass(field.type_, BaseModel)
+                and data.get(field_name, None) is not None
+            ):
+                data[field_name] = field.type_(
+                    **json.loads(data[field_name])
+                )
+
+        return model_type(**data | rels | dynamic_props)
         # return resolve_model(values=data | rels)
 
-    def execute_query(self, query, model_type, include_states):
+    def execute_query(
+            self,
+            query,
+            model_type,
+            include_states,
+            projection: Optional[Projection] = None):
         if query is None:
-            res = self.graph.nodes.match(
-                model_type.__name__
-            ).all()
+            props = {}
         elif isinstance(query, PropertyQuery):
-            res = self.graph.nodes.match(
-                model_type.__name__,
-                **query.property_values
-            ).all()
+            props = query.property_values
         else:
             raise ValueError("Unsupported query type")
 
+        res = self.run(
+            match_nodes_statement(
+                label=model_type.__name__,
+                prop_names=tuple(props.keys())
+            ),
+            props=props
+        ).data()
+
+        uids = [row['uid'] for row in res]
+
         if include_states:
-            return {
-                node.get(UID_FIELD): self.get_state_by_uid(
-                    uid=node.get(UID_FIELD),
-                    model_type=model_type
-                )
-                for node in res
-            }
+            return self.get_states_by_uids(
+                uids=uids,
+                model_type=model_type,
+                projection=projection
+            )
 
         else:
             return {
-                node.get(UID_FIELD): None
-                for node in res
+                uid: None
+                for uid in uids
             }
@@ -0,0 +1,484 @@
+from typing import Optional, Dict, List, Tuple, Type
+from uuid import uuid4
+
+import asyncio
+import datetime
+
+from pydantic.v1 import Field, PrivateAttr
+
+from constelite.store.base_async import AsyncBaseStore
+from constelite.store.neoflux import NeofluxStore, NeoConfig, InfluxConfig
+from constelite.store.queries import DynamicQuery, Projection, PropertyQuery
+
+from constelite.models import (
+    StateModel, StaticTypes, Dynamic, UID, RelInspector
+)
+
+from constelite.store.cypher import (
+    UID_FIELD, statement, async_bootstrap_schema,
+    get_states_statement, create_nodes_statement,
+    create_relationships_statement, match_nodes_statement
+)
+
+from neo4j import AsyncGraphDatabase, AsyncDriver, Record
+from influxdb_client.client.influxdb_client_async import InfluxDBClientAsync
+
+
+class AsyncNeofluxStore(AsyncBaseStore):
+    """
+    An asynchronous hybrid Neo4j-InfluxDB store.
+
+    Stores data in the same way as `NeofluxStore`, using the async neo4j
+    driver and the async InfluxDB client instead of blocking calls run in
+    threads. Both clients keep a pool of connections, limited by
+    `NeoConfig.max_connection_pool_size` and
+    `InfluxConfig.connection_pool_maxsize`.
+
+    The InfluxDB client and the Neo4j schema are set up on first use, as
+    they need a running event loop. Call `close()` to release the
+    connections.
+    """
+    _allowed_methods = ["PUT", "GET", "PATCH", "DELETE", "QUERY", "GRAPHQL"]
+
+    neo_config: NeoConfig = Field(exclude=True)
+    influx_config: InfluxConfig = Field(exclude=True)
+
+    driver: Optional[AsyncDriver] = Field(exclude=True)
+
+    _influx: Optional[InfluxDBClientAsync] = PrivateAttr(default=None)
+    _schema_ready: bool = PrivateAttr(default=False)
+    _schema_lock: asyncio.Lock = PrivateAttr(default_factory=asyncio.Lock)
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    def __init__(self, **data):
+        super().__init__(**data)
+        self.driver = AsyncGraphDatabase.driver(
+            self.neo_config.url,
+            auth=tuple(self.neo_config.auth),
+            max_connection_pool_size=self.neo_config.max_connection_pool_size
+        )
+        self._schema_ready = not self.neo_config.bootstrap_schema
+
+    @property
+    def influx(self) -> InfluxDBClientAsync:
+        if self._influx is None:
+            self._influx = InfluxDBClientAsync(
+                url=self.influx_config.url,
+                token=self.influx_config.token,
+                org=self.influx_config.org,
+                connection_pool_maxsize=(
+                    self.influx_config.connection_pool_maxsize
+                )
+            )
+        return self._influx
+
+    async def close(self) -> None:
+        """Closes the Neo4j and InfluxDB connections.
+        """
+        await self.driver.close()
+        if self._influx is not None:
+            await self._influx.close()
+            self._influx = None
+
+    async def ensure_schema(self) -> None:
+        """Creates the Neo4j schema on first use.
+
+        Concurrent first calls wait for one bootstrap. The schema is
+        marked as ready only once the bootstrap succeeds, so a failed
+        bootstrap is retried by the next call.
+        """
+        if self._schema_ready:
+            return
+        async with self._schema_lock:
+            if not self._schema_ready:
+                await async_bootstrap_schema(self.driver)
+                self._schema_ready = True
+
+    async def run(self, query: str, **parameters) -> List[Record]:
+        """Runs a Cypher statement in its own transaction.
+        """
+        await self.ensure_schema()
+
+        records, _, _ = await self.driver.execute_query(
+            query,
+            parameters_=parameters
+        )
+        return records
+
+    async def write_points(self, points: List[str]):
+        """Writes line-protocol points in concurrent batches.
+        """
+        write_api = self.influx.write_api()
+        batch_size = self.influx_config.write_batch_size
+
+        await asyncio.gather(*[
+            write_api.write(
+                bucket=self.influx_config.bucket,
+                org=self.influx_config.org,
+                record=points[i:i + batch_size]
+            )
+            for i in range(0, len(points), batch_size)
+        ])
+
+    async def query_points(self, query) -> List:
+        records = await self.influx.query_api().query_stream(
+            query=query,
+            org=self.influx_config.org
+        )
+        return [record async for record in records]
+
+    async def delete_points(self, model_type, uid, field_name=None):
+        predicate = (
+            f'_measurement="{model_type.__name__}"'
+            f' AND _uid="{uid}"'
+        )
+
+        if field_name is not None:
+            predicate += f' AND _field="{field_name}"'
+
+        await self.influx.delete_api().delete(
+            start=datetime.datetime.utcfromtimestamp(0),
+            stop=datetime.datetime.utcnow(),
+            predicate=predicate,
+            bucket=self.influx_config.bucket,
+            org=self.influx_config.org
+        )
+
+    async def uid_exists(self, uid: UID, model_type: Type[StateModel]) -> bool:
+        records = await self.run(statement('uid_exists'), uid=uid)
+        return records[0][0]
+
+    async def create_model(
+            self,
+            model_type: StateModel,
+            static_props: Dict[str, StaticTypes],
+            dynamic_props: Dict[str, Optional[Dynamic]]) -> UID:
+        uids = await self.create_models(
+            model_type=model_type,
+            static_props=[static_props],
+            dynamic_props=[dynamic_props]
+        )
+        return uids[0]
+
+    async def create_models(
+            self,
+            model_type: Type[StateModel],
+            static_props: List[Dict[str, StaticTypes]],
+            dynamic_props: List[Dict[str, Optional[Dynamic]]]) -> List[UID]:
+        uids = [str(uuid4()) for _ in static_props]
+
+        rows = [
+            NeofluxStore.serialise_static_props(props | {UID_FIELD: uid})
+            for uid, props in zip(uids, static_props)
+        ]
+
+        await self.run(
+            create_nodes_statement(
+                tuple(NeofluxStore.get_labels(model_type))
+            ),
+            rows=rows
+        )
+
+        await self.write_points([
+            point
+            for uid, props in zip(uids, dynamic_props)
+            for prop_name, prop in props.items()
+            for point in NeofluxStore.dynamic_to_points(
+                uid=uid,
+                model_type_name=model_type.__name__,
+                prop_name=prop_name,
+                prop=prop
+            )
+        ])
+
+        return uids
+
+    async def write_dynamic_to_influx(
+        self, uid: UID, model_type_name: str, prop_name: str, prop: Dynamic
+    ):
+        if prop is None:
+            return
+
+        await self.write_points(
+            NeofluxStore.dynamic_to_points(
+                uid=uid,
+                model_type_name=model_type_name,
+                prop_name=prop_name,
+                prop=prop
+            )
+        )
+
+    async def query_dynamic_records(
+            self,
+            uids: List[UID],
+            model_type: Type,
+            field_names: List[str],
+            dynamic_query: Optional[DynamicQuery] = None
+    ) -> Dict[Tuple[UID, str], List]:
+        """
+        Fetches points of all given dynamic fields of all given records
+        in a single Flux query.
+
+        Returns:
+            Flux records grouped by (uid, field name).
+        """
+        if len(uids) == 0 or len(field_names) == 0:
+            return {}
+
+        query = NeofluxStore.dynamic_records_query(
+            bucket=self.influx_config.bucket,
+            uids=uids,
+            model_type=model_type,
+            field_names=field_names,
+            dynamic_query=dynamic_query
+        )
+
+        records = {}
+        for point in await self.query_points(query=query):
+            key = (point.values[UID_FIELD], point.get_field())
+            records.setdefault(key, []).append(point)
+        return records
+
+    async def delete_model(
+            self,
+            model_type: Type[StateModel],
+            uid: UID) -> None:
+        await self.delete_models(model_type=model_type, uids=[uid])
+
+    async def delete_models(
+            self,
+            model_type: Type[StateModel],
+            uids: List[UID]) -> None:
+        await self.run(statement('delete_nodes'), uids=uids)
+
+        # Influx delete predicates do not support OR
+        await asyncio.gather(*[
+            self.delete_points(model_type=model_type, uid=uid)
+            for uid in uids
+        ])
+
+    async def overwrite_static_props(
+            self,
+            uid: UID,
+            model_type: Type[StateModel],
+            props: Dict[str, StaticTypes]) -> None:
+        await self.run(
+            statement('update_node'),
+            uid=uid,
+            props=NeofluxStore.serialise_static_props(props)
+        )
+
+    async def overwrite_dynamic_props(
+            self,
+            uid: UID,
+            model_type: Type[StateModel],
+            props: Dict[str, Optional[Dynamic]]) -> None:
+        for prop_name, prop in props.items():
+            await self.delete_points(
+                model_type=model_type,
+                uid=uid,
+                field_name=prop_name
+            )
+            await self.write_dynamic_to_influx(
+                uid=uid,
+                model_type_name=model_type.__name__,
+                prop_name=prop_name,
+                prop=prop
+            )
+
+    async def extend_dynamic_props(
+            self,
+            uid: UID,
+            model_type: Type[StateModel],
+            props: Dict[str, Optional[Dynamic]]) -> None:
+        await self.write_points([
+            point
+            for prop_name, prop in props.items()
+            for point in NeofluxStore.dynamic_to_points(
+                uid=uid,
+                model_type_name=model_type.__name__,
+                prop_name=prop_name,
+                prop=prop
+            )
+        ])
+
+    async def delete_all_relationships(
+            self,
+            from_uid: UID,
+            from_model_type: Type[StateModel],
+            rel_from_name: str) -> List[UID]:
+        records = await self.run(
+            statement('delete_relationships'),
+            uid=from_uid,
+            from_field=rel_from_name
+        )
+        return [record['uid'] for record in records]
+
+    async def create_relationships(
+            self,
+            from_uid: UID,
+            from_model_type: Type[StateModel],
+            inspector: RelInspector) -> None:
+        new_to_refs = (
+            inspector.to_refs
+            if inspector.to_refs is not None
+            else []
+        )
+
+        if len(new_to_refs) == 0:
+            return
+
+        await self.run(
+            create_relationships_statement(
+                rel_type=inspector.rel_type,
+                with_to_field=inspector.to_field_name is not None
+            ),
+            from_uid=from_uid,
+            to_uids=[to_ref.uid for to_ref in new_to_refs],
+            from_field=inspector.from_field_name,
+            to_field=inspector.to_field_name
+        )
+
+    async def get_state_by_uid(
+            self,
+            uid: UID,
+            model_type: Type[StateModel]
+    ) -> StateModel:
+        states = await self.get_states_by_uids(
+            uids=[uid],
+            model_type=model_type
+        )
+        if uid not in states:
+            raise KeyError(f"Model with reference '{uid}' cannot be found")
+        return states[uid]
+
+    async def get_states_by_uids(
+            self,
+            uids: List[UID],
+            model_type: Type[StateModel],
+            dynamic_queries: Optional[Dict[str, DynamicQuery]] = None,
+            projection: Optional[Projection] = None
+    ) -> Dict[UID, StateModel]:
+        """
+        Fetches node properties and relationships in both directions for
+        all uids in one Cypher query and dynamic properties in one Flux
+        query per distinct dynamic query, all sent concurrently.
+
+        Guids of the related records are resolved with one guid map call.
+        """
+        prop_names, rel_fields, dynamic_fields = (
+            NeofluxStore.projection_fields(
+                model_type=model_type,
+                projection=projection
+            )
+        )
+
+        query_groups = NeofluxStore.group_dynamic_queries(
+            field_names=list(dynamic_fields.keys()),
+            dynamic_queries=dynamic_queries
+        )
+
+        # Points of missing uids are fetched too, but never used
+        records, *dynamic_groups = await asyncio.gather(
+            self.run(
+                get_states_statement(
+                    prop_names=prop_names,
+                    with_relationships=(
+                        rel_fields is None or len(rel_fields) > 0
+                    )
+                ),
+                uids=uids,
+                rel_fields=rel_fields
+            ),
+            *[
+                self.query_dynamic_records(
+                    uids=uids,
+                    model_type=model_type,
+                    field_names=field_names,
+                    dynamic_query=dynamic_query
+                )
+                for dynamic_query, field_names in query_groups
+            ]
+        )
+        rows = [record.data() for record in records]
+
+        dynamic_records = {}
+        for group_records in dynamic_groups:
+            dynamic_records.update(group_records)
+
+        rel_uids = {}
+        for row in rows:
+            for rel in row['outgoing'] + row['incoming']:
+                rel_uids.setdefault(rel['model_name'], {})[rel['uid']] = None
+
+        rel_refs = {}
+        for model_name, model_uids in rel_uids.items():
+            refs = await self.generate_refs(
+                uids=list(model_uids),
+                state_model_name=model_name
+            )
+            rel_refs.update({ref.uid: ref for ref in refs})
+
+        states = {}
+        for row in rows:
+            uid = row['uid']
+            rels = {}
+            for rel in row['outgoing'] + row['incoming']:
+                rels.setdefault(rel['field'], []).append(
+                    rel_refs[rel['uid']].copy()
+                )
+
+            dynamic_props = {
+                field_name: NeofluxStore.records_to_dynamic(
+                    points=dynamic_records.get((uid, field_name), []),
+                    field_name=field_name,
+                    point_type=point_type
+                )
+                for field_name, point_type in dynamic_fields.items()
+            }
+
+            states[uid] = NeofluxStore.hydrate_state(
+                model_type=model_type,
+                data=row['data'],
+                rels=rels,
+                dynamic_props=dynamic_props
+            )
+        return states
+
+    async def execute_query(
+            self,
+            query,
+            model_type,
+            include_states,
+            projection: Optional[Projection] = None):
+        if query is None:
+            props = {}
+        elif isinstance(query, PropertyQuery):
+            props = query.property_values
+        else:
+            raise ValueError("Unsupported query type")
+
+        records = await self.run(
+            match_nodes_statement(
+                label=model_type.__name__,
+                prop_names=tuple(props.keys())
+            ),
+            props=props
+        )
+
+        uids = [record['uid'] for record in records]
+
+        if include_states:
+            return await self.get_states_by_uids(
+                uids=uids,
+                model_type=model_type,
+                projection=projection
+            )
+
+        else:
+            return {
+                uid: None
+                for uid in uids
+            }
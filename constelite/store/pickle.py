@@ -1,47 +1,237 @@
-from typing import Optional, Type
+from typing import Optional, Type, Dict, List
 
+import asyncio
 import os
+import tempfile
+import weakref
 
-import pickle
+from contextlib import asynccontextmanager
 
-from pydantic.v1 import Field
+from pydantic.v1 import Field, PrivateAttr
 
 from constelite.models import (
-    StateModel, UID, resolve_model
+    StateModel, UID, Ref, InspectionPlan
 )
 
 from constelite.store.uid_key_base import (
     UIDKeyStoreBase
 )
+from constelite.store.queries import (
+    DynamicQuery, Projection, apply_dynamic_queries
+)
 
 
 class PickleStore(UIDKeyStoreBase):
+    """
+    Store keeping every record in a file named after its uid, serialised
+    with the codec of the store.
+
+    Files are written to a temporary file and moved in place with
+    `os.replace`, so readers never see a partly written record and a crash
+    leaves either the old or the new version.
+
+    Records are kept in subdirectories named after the first
+    `shard_length` characters of their uid, so directories stay small for
+    stores with many records. Records written by earlier versions directly
+    in `path` are still found and are moved to their subdirectory when
+    written again.
+
+    Puts, patches and deletes hold the locks of the records they can
+    change until the changes are stored, so concurrent changes of one
+    record in a process are not lost. Puts and patches lock the records
+    of the given references and of the references related to them, as
+    their backrefs are rewritten.
+
+    Attributes:
+        path: Directory of the store.
+        shard_length: Number of uid characters in the names of the
+            subdirectories. 0 keeps all records directly in `path`.
+        fsync: Whether to flush records and their directory to disk
+            before a write returns.
+    """
     path: Optional[str] = Field(exclude=True)
+    shard_length: int = Field(default=2, exclude=True)
+    fsync: bool = Field(default=False, exclude=True)
+
+    _locks: weakref.WeakValueDictionary = PrivateAttr(
+        default_factory=weakref.WeakValueDictionary
+    )
 
     def __init__(self, **data):
         super().__init__(**data)
         if not os.path.isdir(self.path):
             os.makedirs(self.path)
 
-    async def uid_exists(self, uid: UID, model_type: Type[StateModel]) -> bool:
-        path = os.path.join(self.path, uid)
-        return os.path.exists(path)
+    def _shard_dir(self, uid: UID) -> str:
+        if self.shard_length <= 0:
+            return self.path
+        return os.path.join(self.path, uid[:self.shard_length])
 
-    async def store(self, uid: UID, model: StateModel) -> UID:
-        path = os.path.join(self.path, uid)
+    def _file_path(self, uid: UID) -> str:
+        return os.path.join(self._shard_dir(uid), uid)
+
+    def _legacy_path(self, uid: UID) -> Optional[str]:
+        if self.shard_length <= 0:
+            return None
+        return os.path.join(self.path, uid)
+
+    def _existing_path(self, uid: UID) -> Optional[str]:
+        path = self._file_path(uid)
+        if os.path.exists(path):
+            return path
 
-        exception = None
+        legacy_path = self._legacy_path(uid)
+        if legacy_path is not None and os.path.isfile(legacy_path):
+            return legacy_path
+        return None
 
-        with open(path, 'wb') as f:
+    def _read(self, uid: UID) -> bytes:
+        try:
+            with open(self._file_path(uid), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            legacy_path = self._legacy_path(uid)
+            if legacy_path is None or not os.path.isfile(legacy_path):
+                raise
+            with open(legacy_path, 'rb') as f:
+                return f.read()
+
+    def _write(self, uid: UID, data: bytes) -> None:
+        shard_dir = self._shard_dir(uid)
+        os.makedirs(shard_dir, exist_ok=True)
+
+        fd, tmp_path = tempfile.mkstemp(
+            dir=shard_dir,
+            prefix=f'.{uid}.',
+            suffix='.tmp'
+        )
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+                if self.fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.replace(tmp_path, self._file_path(uid))
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+        if self.fsync:
+            self._fsync_dir(shard_dir)
+
+        legacy_path = self._legacy_path(uid)
+        if legacy_path is not None and os.path.isfile(legacy_path):
+            os.remove(legacy_path)
+
+    def _remove(self, uid: UID) -> None:
+        for path in (self._file_path(uid), self._legacy_path(uid)):
+            if path is None:
+                continue
             try:
-                pickle.dump(model.dict(), f)
-            except Exception as e:
-                exception = e
+                os.remove(path)
+            except (FileNotFoundError, IsADirectoryError):
+                continue
+            if self.fsync:
+                self._fsync_dir(os.path.dirname(path))
+
+    @staticmethod
+    def _fsync_dir(path: str) -> None:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    @asynccontextmanager
+    async def lock_records(self, uids: List[UID]):
+        """
+        Holds the locks of the records with the given uids.
+
+        Locks are taken in the order of the uids, so blocks locking
+        several records can't deadlock each other. Blocks inside a write
+        batch don't take locks, they are covered by the locks of the
+        operation that started the batch.
+        """
+        if self._batch is not None:
+            yield
+            return
+
+        locks = []
+        for uid in sorted(set(uids)):
+            lock = self._locks.get(uid)
+            if lock is None:
+                lock = asyncio.Lock()
+                self._locks[uid] = lock
+            locks.append(lock)
 
-        if exception is not None:
-            os.remove(path)
-            raise exception
+        acquired = []
+        try:
+            for lock in locks:
+                await lock.acquire()
+                acquired.append(lock)
+            yield
+        finally:
+            for lock in reversed(acquired):
+                lock.release()
 
+    @staticmethod
+    def _locked_uids(refs: List[Ref]) -> List[UID]:
+        """Returns the uids of the records that a write of the references
+        can change, including the records of related references at any
+        depth.
+        """
+        uids = []
+        seen = set()
+        refs = list(refs)
+        while refs:
+            ref = refs.pop()
+            if id(ref) in seen:
+                continue
+            seen.add(id(ref))
+
+            if ref.record is not None:
+                uids.append(ref.uid)
+            if ref.state is None:
+                continue
+
+            for field_plan in InspectionPlan.for_model(
+                    type(ref.state)).fields:
+                if field_plan.kind in (
+                        'association', 'aggregation', 'composition'):
+                    refs.extend(
+                        getattr(ref.state, field_plan.field_name) or []
+                    )
+        return uids
+
+    async def put(self, ref: Ref) -> Ref:
+        async with self.lock_records(self._locked_uids([ref])):
+            return await super().put(ref)
+
+    async def patch(self, ref: Ref) -> Ref:
+        async with self.lock_records(self._locked_uids([ref])):
+            return await super().patch(ref)
+
+    async def bulk_put(self, refs: List[Ref]) -> List[Ref]:
+        async with self.lock_records(self._locked_uids(refs)):
+            return await super().bulk_put(refs)
+
+    async def bulk_patch(self, refs: List[Ref]) -> List[Ref]:
+        async with self.lock_records(self._locked_uids(refs)):
+            return await super().bulk_patch(refs)
+
+    async def delete(self, ref: Ref) -> None:
+        async with self.lock_records(self._locked_uids([ref])):
+            return await super().delete(ref)
+
+    async def uid_exists(self, uid: UID, model_type: Type[StateModel]) -> bool:
+        return self._existing_path(uid) is not None
+
+    async def store(self, uid: UID, model: StateModel) -> UID:
+        # Encode first, so a model that can't be encoded leaves no file
+        self._write(uid, self.encode_state(model))
         return uid
 
     async def get_state_by_uid(
@@ -49,25 +239,42 @@ class PickleStore(UIDKeyStoreBase):
             uid: UID,
             model_type: Type[StateModel]
     ) -> StateModel:
-        if not await self.uid_exists(
-            uid=uid,
-            model_type=model_type
-        ):
-            raise ValueError(f"Model with reference '{uid}' cannon be found")
-        else:
-            path = os.path.join(self.path, uid)
-            with open(path, 'rb') as f:
-                return resolve_model(
-                    values=pickle.load(f)
-                )
+        try:
+            data = self._read(uid)
+        except FileNotFoundError:
+            raise ValueError(f"Model with reference '{uid}' cannot be found")
+        return self.decode_state(data)
+
+    async def get_states_by_uids(
+            self,
+            uids: List[UID],
+            model_type: Type[StateModel],
+            dynamic_queries: Optional[Dict[str, DynamicQuery]] = None,
+            projection: Optional[Projection] = None
+    ) -> Dict[UID, StateModel]:
+        states = {}
+        for uid in uids:
+            # Open directly instead of checking existence first
+            try:
+                data = self._read(uid)
+            except FileNotFoundError:
+                continue
+
+            states[uid] = apply_dynamic_queries(
+                state=self.decode_state(data, projection=projection),
+                dynamic_queries=dynamic_queries
+            )
+        return states
 
     async def delete_model(
             self,
             model_type: Type[StateModel],
             uid: UID) -> None:
-        if await self.uid_exists(
-            uid=uid,
-            model_type=model_type
-        ):
-            path = os.path.join(self.path, uid)
-            os.remove(path)
\ No newline at end of file
+        self._remove(uid)
+
+    async def delete_models(
+            self,
+            model_type: Type[StateModel],
+            uids: List[UID]) -> None:
+        for uid in uids:
+            self._remove(uid)
@@ -1,8 +1,11 @@
-from pydantic.v1 import BaseModel
+from pydantic.v1 import BaseModel, Field
 from constelite.models import (
-    Ref,
+    Ref, Dynamic, StateModel, InspectionPlan, get_auto_resolve_model
 )
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Literal, List, Set, Type
+from datetime import datetime, timedelta
+
+import pandas as pd
 
 
 class Query(BaseModel):
@@ -30,3 +33,176 @@ class PropertyQuery(Query):
 
 class GetAllQuery(Query):
     pass
+
+
+class DynamicQuery(BaseModel):
+    """
+    Selection of the points of a dynamic property.
+
+    Points are limited to the `[start, stop)` window, then aggregated per
+    `every` interval, if given, and finally limited to the `last` points.
+
+    Attributes:
+        start: Earliest time of the points.
+        stop: Time before which the points are.
+        every: Interval of the aggregation windows. Windows are aligned to
+            the Unix epoch and points are timestamped with their window start.
+        aggregate: Aggregation of the points in each window.
+        last: Number of the latest points to keep.
+    """
+    start: Optional[datetime] = None
+    stop: Optional[datetime] = None
+    every: Optional[timedelta] = None
+    aggregate: Literal[
+        'mean', 'median', 'min', 'max', 'sum', 'first', 'last'
+    ] = 'mean'
+    last: Optional[int] = Field(default=None, gt=0)
+
+    @staticmethod
+    def _to_utc(time: datetime) -> pd.Timestamp:
+        time = pd.Timestamp(time)
+        if time.tz is not None:
+            time = time.tz_convert('UTC').tz_localize(None)
+        return time
+
+    def apply(self, dynamic: Optional[Dynamic]) -> Optional[Dynamic]:
+        """Selects the points of a dynamic in memory.
+
+        Used by stores that can't apply the query when fetching the points.
+        """
+        if dynamic is None or len(dynamic) == 0:
+            return dynamic
+
+        series = dynamic.to_series()
+        times = series.index.get_level_values('timestamp')
+
+        if self.start is not None:
+            series = series[times >= self._to_utc(self.start)]
+            times = series.index.get_level_values('timestamp')
+        if self.stop is not None:
+            series = series[times < self._to_utc(self.stop)]
+            times = series.index.get_level_values('timestamp')
+
+        if self.every is not None:
+            names = list(series.index.names)
+            series = series.groupby(
+                [times.floor(self.every)] + [
+                    series.index.get_level_values(name)
+                    for name in names[1:]
+                ]
+            ).agg(self.aggregate)
+            series.index.names = names
+            times = series.index.get_level_values('timestamp')
+
+        if self.last is not None:
+            last_times = times.unique().sort_values()[-self.last:]
+            series = series[times.isin(last_times)]
+
+        if len(series) == 0:
+            return None
+
+        return type(dynamic).from_series(series)
+
+
+def apply_dynamic_queries(
+        state: StateModel,
+        dynamic_queries: Optional[Dict[str, DynamicQuery]]) -> StateModel:
+    """Returns a copy of the state with the dynamic queries applied.
+    """
+    if not dynamic_queries:
+        return state
+
+    return state.copy(
+        update={
+            field_name: dynamic_query.apply(getattr(state, field_name))
+            for field_name, dynamic_query in dynamic_queries.items()
+            if field_name in state.__fields__
+            and getattr(state, field_name) is not None
+        }
+    )
+
+
+class Projection(BaseModel):
+    """
+    Selection of the fields of the states returned by a store.
+
+    Fields that are not selected are not loaded and are left unset in the
+    returned states. `model_name` is always selected.
+
+    Attributes:
+        include: Names of the fields to return. All fields if not given.
+        exclude: Names of the fields not to return.
+        include_dynamic: Whether to return dynamic properties.
+        include_relationships: Whether to return relationships and
+            backrefs.
+    """
+    include: Optional[List[str]] = None
+    exclude: Optional[List[str]] = None
+    include_dynamic: bool = True
+    include_relationships: bool = True
+
+    def field_names(self, model_type: Type[StateModel]) -> Set[str]:
+        """Returns names of the selected fields of the model.
+        """
+        field_names = set()
+        for field_plan in InspectionPlan.for_model(model_type).fields:
+            field_name = field_plan.field_name
+            if field_name == 'model_name':
+                field_names.add(field_name)
+            elif (
+                (self.include is None or field_name in self.include)
+                and (self.exclude is None or field_name not in self.exclude)
+                and (self.include_dynamic or field_plan.kind != 'dynamic')
+                and (
+                    self.include_relationships
+                    or field_plan.kind in ('static', 'dynamic')
+                )
+            ):
+                field_names.add(field_name)
+        return field_names
+
+    def select_values(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        """Removes values of the fields that are not selected from the raw
+        values of a state.
+
+        Lets stores skip validation of the unselected fields. Values of an
+        unknown model are returned unchanged.
+        """
+        model_type = get_auto_resolve_model(
+            model_name=values.get('model_name', None),
+            root_cls=StateModel
+        )
+        if model_type is None:
+            return values
+
+        field_names = self.field_names(model_type)
+        return {
+            key: value for key, value in values.items()
+            if key in field_names
+        }
+
+    def apply(self, state: StateModel) -> StateModel:
+        """Returns a state with only the selected fields set.
+        """
+        field_names = self.field_names(type(state))
+        if len(field_names) == len(state.__fields__):
+            return state
+
+        return type(state).construct(
+            _fields_set=state.__fields_set__ & field_names,
+            **{
+                field_name: getattr(state, field_name)
+                for field_name in field_names
+            }
+        )
+
+
+def apply_projection(
+        state: StateModel,
+        projection: Optional[Projection]) -> StateModel:
+    """Returns the state with only the fields selected by the projection.
+    """
+    if projection is None:
+        return state
+
+    return projection.apply(state)
@@ -0,0 +1,414 @@
+from typing import Optional, Type, Dict, List, Tuple, NamedTuple, Iterator
+
+import asyncio
+import mmap
+import os
+import struct
+import zlib
+
+from pydantic.v1 import Field, PrivateAttr
+from loguru import logger
+
+from constelite.models import (
+    StateModel, UID
+)
+
+from constelite.store.uid_key_base import (
+    UIDKeyStoreBase
+)
+from constelite.store.queries import (
+    DynamicQuery, Projection, apply_dynamic_queries
+)
+from constelite.utils import iter_chunks
+
+# Entry header: crc32 of uid and payload, payload length, flags, uid length
+_HEADER = struct.Struct('<IIBH')
+
+_PUT = 0
+_TOMBSTONE = 1
+
+_SEGMENT_SUFFIX = '.seg'
+
+
+class _Location(NamedTuple):
+    segment: int
+    offset: int
+    length: int
+    size: int
+
+
+class _Entry(NamedTuple):
+    uid: UID
+    flags: int
+    offset: int
+    payload_offset: int
+    length: int
+    size: int
+
+
+class SegmentStore(UIDKeyStoreBase):
+    """
+    Store appending records to segment files.
+
+    Every write appends the record, serialised with the codec of the
+    store, to the active segment and
+    points the in-memory index of the store at it. Deletes append a
+    tombstone. Once the active segment reaches `segment_size` bytes, a new
+    one is started.
+
+    Records are read from memory maps of the segments without copying
+    them. On start the index is rebuilt from the entry headers, only the
+    entries of the last segment, which may end with a partly written
+    entry, are checked.
+
+    Segments whose superseded entries make up at least
+    `compaction_threshold` of their size are compacted in the background:
+    their live entries are appended to the active segment and the segment
+    is removed.
+
+    The store must only be used by one process at a time.
+
+    Attributes:
+        path: Directory of the segments.
+        segment_size: Size in bytes at which a new segment is started.
+        compaction_threshold: Share of superseded entries in a segment at
+            which it is compacted.
+        fsync: Whether to flush segments to disk before a write returns.
+    """
+    path: Optional[str] = Field(exclude=True)
+    segment_size: int = Field(default=64 * 1024 * 1024, exclude=True)
+    compaction_threshold: float = Field(default=0.5, exclude=True)
+    fsync: bool = Field(default=False, exclude=True)
+
+    _index: Dict[UID, _Location] = PrivateAttr(default_factory=dict)
+    _sizes: Dict[int, int] = PrivateAttr(default_factory=dict)
+    _garbage: Dict[int, int] = PrivateAttr(default_factory=dict)
+    _maps: Dict[int, mmap.mmap] = PrivateAttr(default_factory=dict)
+    _active_id: int = PrivateAttr(default=0)
+    _active_file = PrivateAttr(default=None)
+    _compaction_task: Optional[asyncio.Task] = PrivateAttr(default=None)
+    _compaction_lock: asyncio.Lock = PrivateAttr(default_factory=asyncio.Lock)
+
+    def __init__(self, **data):
+        super().__init__(**data)
+        if not os.path.isdir(self.path):
+            os.makedirs(self.path)
+        self._load_index()
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.path, f'{segment:08d}{_SEGMENT_SUFFIX}')
+
+    def _map(self, segment: int, end: int) -> mmap.mmap:
+        """Returns a memory map of the segment covering at least `end`
+        bytes.
+        """
+        segment_map = self._maps.get(segment)
+        if segment_map is None or len(segment_map) < end:
+            if segment_map is not None:
+                segment_map.close()
+            with open(self._segment_path(segment), 'rb') as f:
+                segment_map = mmap.mmap(
+                    f.fileno(), 0, access=mmap.ACCESS_READ
+                )
+            self._maps[segment] = segment_map
+        return segment_map
+
+    def _iter_entries(
+            self,
+            segment: int,
+            verify: bool = False) -> Iterator[_Entry]:
+        """
+        Yields the entries of the segment in the order they were written.
+
+        Stops at the first incomplete entry, or with `verify` at the first
+        entry whose checksum doesn't match.
+        """
+        size = self._sizes[segment]
+        if size == 0:
+            return
+        segment_map = self._map(segment, size)
+
+        offset = 0
+        while offset + _HEADER.size <= size:
+            crc, length, flags, uid_length = _HEADER.unpack_from(
+                segment_map, offset
+            )
+            uid_offset = offset + _HEADER.size
+            payload_offset = uid_offset + uid_length
+            end = payload_offset + length
+            if end > size:
+                return
+
+            with memoryview(segment_map) as view:
+                if verify and zlib.crc32(view[uid_offset:end]) != crc:
+                    return
+                uid = bytes(view[uid_offset:payload_offset]).decode()
+
+            yield _Entry(
+                uid=uid,
+                flags=flags,
+                offset=offset,
+                payload_offset=payload_offset,
+                length=length,
+                size=end - offset
+            )
+            offset = end
+
+    def _load_index(self) -> None:
+        segments = sorted(
+            int(name[:-len(_SEGMENT_SUFFIX)])
+            for name in os.listdir(self.path)
+            if name.endswith(_SEGMENT_SUFFIX)
+        )
+
+        for segment in segments:
+            self._sizes[segment] = os.path.getsize(
+                self._segment_path(segment)
+            )
+            self._garbage[segment] = 0
+
+            end = 0
+            for entry in self._iter_entries(
+                    segment, verify=segment == segments[-1]):
+                self._index_entry(segment, entry)
+                end = entry.offset + entry.size
+
+            if end < self._sizes[segment]:
+                # Drop the partly written entry at the end of the segment
+                self._close_map(segment)
+                os.truncate(self._segment_path(segment), end)
+                self._sizes[segment] = end
+
+        self._active_id = segments[-1] if segments else 0
+        self._open_active()
+
+    def _index_entry(self, segment: int, entry: _Entry) -> None:
+        old = self._index.pop(entry.uid, None)
+        if old is not None:
+            self._garbage[old.segment] += old.size
+
+        if entry.flags == _TOMBSTONE:
+            self._garbage[segment] += entry.size
+        else:
+            self._index[entry.uid] = _Location(
+                segment=segment,
+                offset=entry.payload_offset,
+                length=entry.length,
+                size=entry.size
+            )
+
+    def _open_active(self) -> None:
+        # Unbuffered, so appended entries are visible to the memory maps
+        self._active_file = open(
+            self._segment_path(self._active_id), 'ab', buffering=0
+        )
+        self._sizes.setdefault(self._active_id, 0)
+        self._garbage.setdefault(self._active_id, 0)
+
+    def _close_map(self, segment: int) -> None:
+        segment_map = self._maps.pop(segment, None)
+        if segment_map is not None:
+            segment_map.close()
+
+    def _roll(self) -> None:
+        if self.fsync:
+            os.fsync(self._active_file.fileno())
+        self._active_file.close()
+        self._active_id += 1
+        self._open_active()
+
+    def _append(self, entries: List[Tuple[UID, int, bytes]]) -> None:
+        """Appends `(uid, flags, payload)` entries to the active segment
+        and indexes them.
+        """
+        chunk = []
+        chunk_entries = []
+
+        def flush():
+            if chunk:
+                self._active_file.write(b''.join(chunk))
+                for entry in chunk_entries:
+                    self._index_entry(self._active_id, entry)
+                chunk.clear()
+                chunk_entries.clear()
+
+        for uid, flags, payload in entries:
+            uid_bytes = uid.encode()
+            body = uid_bytes + payload
+            data = _HEADER.pack(
+                zlib.crc32(body), len(payload), flags, len(uid_bytes)
+            ) + body
+
+            size = self._sizes[self._active_id]
+            if size > 0 and size + len(data) > self.segment_size:
+                flush()
+                self._roll()
+                size = 0
+
+            chunk.append(data)
+            chunk_entries.append(_Entry(
+                uid=uid,
+                flags=flags,
+                offset=size,
+                payload_offset=size + _HEADER.size + len(uid_bytes),
+                length=len(payload),
+                size=len(data)
+            ))
+            self._sizes[self._active_id] = size + len(data)
+        flush()
+
+        if self.fsync:
+            os.fsync(self._active_file.fileno())
+
+    def _read(
+            self,
+            uid: UID,
+            projection: Optional[Projection] = None) -> Optional[StateModel]:
+        location = self._index.get(uid)
+        if location is None:
+            return None
+
+        end = location.offset + location.length
+        segment_map = self._map(location.segment, end)
+        with memoryview(segment_map) as view:
+            with view[location.offset:end] as payload:
+                return self.decode_state(payload, projection=projection)
+
+    def _compactable(self) -> List[int]:
+        return [
+            segment for segment, size in self._sizes.items()
+            if segment != self._active_id and (
+                size == 0
+                or self._garbage[segment] >= self.compaction_threshold * size
+            )
+        ]
+
+    def _schedule_compaction(self) -> None:
+        if (
+            self._compaction_task is not None
+            and not self._compaction_task.done()
+        ):
+            return
+        if not self._compactable():
+            return
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+
+        self._compaction_task = loop.create_task(self.compact())
+        self._compaction_task.add_done_callback(self._log_compaction_error)
+
+    @staticmethod
+    def _log_compaction_error(task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Failed to compact segments: {task.exception()!r}")
+
+    async def compact(self) -> None:
+        """Compacts the segments with enough superseded entries, giving way
+        to other tasks between batches of moved entries.
+        """
+        async with self._compaction_lock:
+            for segment in self._compactable():
+                await self._compact_segment(segment)
+
+    async def _compact_segment(self, segment: int) -> None:
+        has_older = any(other < segment for other in self._sizes)
+
+        for entries in iter_chunks(list(self._iter_entries(segment)), 256):
+            moved = []
+            for entry in entries:
+                location = self._index.get(entry.uid)
+                if entry.flags == _TOMBSTONE:
+                    # Keep tombstones hiding entries of older segments
+                    if location is None and has_older:
+                        moved.append((entry.uid, _TOMBSTONE, b''))
+                elif (
+                    location is not None
+                    and location.segment == segment
+                    and location.offset == entry.payload_offset
+                ):
+                    end = location.offset + location.length
+                    with memoryview(self._map(segment, end)) as view:
+                        moved.append(
+                            (entry.uid, _PUT, bytes(view[location.offset:end]))
+                        )
+            self._append(moved)
+            await asyncio.sleep(0)
+
+        self._close_map(segment)
+        os.remove(self._segment_path(segment))
+        self._sizes.pop(segment)
+        self._garbage.pop(segment)
+
+    def close(self) -> None:
+        """Closes the active segment and the memory maps."""
+        if self._compaction_task is not None:
+            self._compaction_task.cancel()
+        for segment in list(self._maps):
+            self._close_map(segment)
+        if self._active_file is not None:
+            self._active_file.close()
+            self._active_file = None
+
+    async def uid_exists(self, uid: UID, model_type: Type[StateModel]) -> bool:
+        return uid in self._index
+
+    async def store(self, uid: UID, model: StateModel) -> UID:
+        await self.store_many(models={uid: model})
+        return uid
+
+    async def store_many(self, models: Dict[UID, StateModel]) -> List[UID]:
+        self._append([
+            (uid, _PUT, self.encode_state(model))
+            for uid, model in models.items()
+        ])
+        self._schedule_compaction()
+        return list(models.keys())
+
+    async def get_state_by_uid(
+            self,
+            uid: UID,
+            model_type: Type[StateModel]
+    ) -> StateModel:
+        state = self._read(uid)
+        if state is None:
+            raise ValueError(f"Model with reference '{uid}' cannot be found")
+        return state
+
+    async def get_states_by_uids(
+            self,
+            uids: List[UID],
+            model_type: Type[StateModel],
+            dynamic_queries: Optional[Dict[str, DynamicQuery]] = None,
+            projection: Optional[Projection] = None
+    ) -> Dict[UID, StateModel]:
+        states = {}
+        for uid in uids:
+            state = self._read(uid, projection=projection)
+            if state is None:
+                continue
+
+            states[uid] = apply_dynamic_queries(
+                state=state,
+                dynamic_queries=dynamic_queries
+            )
+        return states
+
+    async def delete_model(
+            self,
+            model_type: Type[StateModel],
+            uid: UID) -> None:
+        await self.delete_models(model_type=model_type, uids=[uid])
+
+    async def delete_models(
+            self,
+            model_type: Type[StateModel],
+            uids: List[UID]) -> None:
+        self._append([
+            (uid, _TOMBSTONE, b'')
+            for uid in dict.fromkeys(uids)
+            if uid in self._index
+        ])
+        self._schedule_compaction()
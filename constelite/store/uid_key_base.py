@@ -1,23 +1,191 @@
-from typing import List, Dict, Optional, Type
+from typing import Any, List, Dict, Optional, Type, Union
 
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
 from uuid import uuid4
 
+from pydantic.v1 import Field, PrivateAttr
+
 from constelite.models import (
     StateModel, UID, TimePoint, Dynamic,
-    StaticTypes, RelInspector
+    StaticTypes, RelInspector, Ref
 )
 
 from constelite.store.base_async import (
     AsyncBaseStore
 )
+from constelite.store.codecs import StateCodec, get_codec
+from constelite.store.queries import Projection
+
+
+class _WriteBatch:
+    """States loaded and changed during a write batch of a store."""
+    def __init__(self, store: "UIDKeyStoreBase"):
+        self.store = store
+        self.states: Dict[UID, StateModel] = {}
+        self.dirty: Dict[UID, None] = {}
+
+
+_write_batch: ContextVar[Optional[_WriteBatch]] = ContextVar(
+    'uid_key_write_batch',
+    default=None
+)
+
 
 class UIDKeyStoreBase(AsyncBaseStore):
     """
     Base for the pickle and memcached stores where the objects are
-    stored with the uid as the key
+    stored with the uid as the key.
+
+    Puts and patches run in a write batch: every record is loaded at most
+    once, changed in memory and stored once at the end of the operation
+    with `store_many`.
+
+    Stores that serialise records use `encode_state` and `decode_state`,
+    with the codec named by `codec`. See `get_codec` for the names. The
+    codec of a store with records can't be changed.
     """
     _allowed_methods = ["PUT", "GET", "PATCH", "DELETE"]
 
+    codec: str = Field(default='pickle', exclude=True)
+    _state_codec: Optional[StateCodec] = PrivateAttr(default=None)
+
+    @property
+    def state_codec(self) -> StateCodec:
+        if self._state_codec is None:
+            self._state_codec = get_codec(self.codec)
+        return self._state_codec
+
+    def encode_state(self, model: StateModel) -> bytes:
+        return self.state_codec.encode(model)
+
+    def decode_state(
+            self,
+            data: Union[bytes, memoryview, Dict[str, Any]],
+            projection: Optional[Projection] = None) -> StateModel:
+        return self.state_codec.decode(data, projection=projection)
+
+    @property
+    def _batch(self) -> Optional[_WriteBatch]:
+        batch = _write_batch.get()
+        if batch is not None and batch.store is self:
+            return batch
+        return None
+
+    @asynccontextmanager
+    async def write_batch(self):
+        """
+        Keeps the records changed in the block in memory and stores them
+        together with `store_many` at the end of the block.
+
+        Records are loaded once per block, so the changes of one block to
+        a record are applied to the same state. Nothing is stored if the
+        block raises. Nested blocks, including those of the concurrent
+        writes of related records, join the outer block.
+
+        Deletes are not part of the batch.
+        """
+        if self._batch is not None:
+            yield
+            return
+
+        batch = _WriteBatch(store=self)
+        token = _write_batch.set(batch)
+        try:
+            yield
+        finally:
+            _write_batch.reset(token)
+
+        if batch.dirty:
+            await self.store_many(
+                models={uid: batch.states[uid] for uid in batch.dirty}
+            )
+
+    async def load_state(
+            self,
+            uid: UID,
+            model_type: Type[StateModel]) -> StateModel:
+        """Returns the state of the record to change, from the current
+        write batch if there is one.
+
+        States are copied when loaded, as stores such as `MemoryStore`
+        return the stored objects, which must not change before the batch
+        is stored.
+        """
+        batch = self._batch
+        if batch is None:
+            state = await self.get_state_by_uid(uid=uid, model_type=model_type)
+            return state.copy(deep=True)
+
+        state = batch.states.get(uid)
+        if state is None:
+            state = (await self.get_state_by_uid(
+                uid=uid,
+                model_type=model_type
+            )).copy(deep=True)
+            # Another task of the batch may have loaded it meanwhile
+            state = batch.states.setdefault(uid, state)
+        return state
+
+    async def load_states(
+            self,
+            uids: List[UID],
+            model_type: Type[StateModel]) -> Dict[UID, StateModel]:
+        """Returns the states of several records to change, loading the
+        ones missing from the current write batch with one
+        `get_states_by_uids` call. States are copied when loaded, see
+        `load_state()`.
+        """
+        batch = self._batch
+        states = {} if batch is None else {
+            uid: batch.states[uid] for uid in uids if uid in batch.states
+        }
+
+        missing = [uid for uid in dict.fromkeys(uids) if uid not in states]
+        if missing:
+            loaded = await self.get_states_by_uids(
+                uids=missing,
+                model_type=model_type
+            )
+            for uid in missing:
+                if uid not in loaded:
+                    raise ValueError(
+                        f"Model with reference '{uid}' cannot be found"
+                    )
+                state = loaded[uid].copy(deep=True)
+                states[uid] = (
+                    state if batch is None
+                    else batch.states.setdefault(uid, state)
+                )
+        return states
+
+    async def save_state(self, uid: UID, model: StateModel) -> None:
+        """Stores the state of the record, at the end of the current write
+        batch if there is one.
+        """
+        batch = self._batch
+        if batch is None:
+            await self.store(uid=uid, model=model)
+        else:
+            batch.states[uid] = model
+            batch.dirty[uid] = None
+
+    async def put(self, ref: Ref) -> Ref:
+        async with self.write_batch():
+            return await super().put(ref)
+
+    async def patch(self, ref: Ref) -> Ref:
+        async with self.write_batch():
+            return await super().patch(ref)
+
+    async def bulk_put(self, refs: List[Ref]) -> List[Ref]:
+        async with self.write_batch():
+            return await super().bulk_put(refs)
+
+    async def bulk_patch(self, refs: List[Ref]) -> List[Ref]:
+        async with self.write_batch():
+            return await super().bulk_patch(refs)
+
     async def create_model(
             self,
             model_type: StateModel,
@@ -27,62 +195,75 @@ class UIDKeyStoreBase(AsyncBaseStore):
             **(static_props | dynamic_props)
         )
         uid = str(uuid4())
+        if self._batch is not None:
+            await self.save_state(uid=uid, model=model)
+            return uid
         uid = await self.store(uid=uid, model=model)
         return uid
 
+    async def create_models(
+            self,
+            model_type: Type[StateModel],
+            static_props: List[Dict[str, StaticTypes]],
+            dynamic_props: List[Dict[str, Optional[Dynamic]]]) -> List[UID]:
+        models = {
+            str(uuid4()): model_type(**(static | dynamic))
+            for static, dynamic in zip(static_props, dynamic_props)
+        }
+        return await self.store_many(models=models)
+
+    async def store_many(self, models: Dict[UID, StateModel]) -> List[UID]:
+        """
+        Stores several models under the given uids.
+
+        Falls back to `store` per model. Stores that can write many
+        records in one operation should override it.
+        """
+        return [
+            await self.store(uid=uid, model=model)
+            for uid, model in models.items()
+        ]
+
     async def overwrite_static_props(
             self,
             uid: UID,
             model_type: Type[StateModel],
             props: Dict[str, StaticTypes]) -> None:
+        model = await self.load_state(uid=uid, model_type=model_type)
 
-        model = await self.get_state_by_uid(
-            uid=uid,
-            model_type=model_type
-        )
-        data = model.dict()
-        data.update(props)
-
-        new_model = model.__class__(
-            **data
-        )
+        for prop_name, value in props.items():
+            setattr(model, prop_name, value)
 
-        await self.store(uid=uid, model=new_model)
+        await self.save_state(uid=uid, model=model)
 
     async def overwrite_dynamic_props(
             self,
             uid: UID,
             model_type: Type[StateModel],
             props: Dict[str, List[TimePoint]]) -> None:
-        model = await self.get_state_by_uid(
-            uid=uid,
-            model_type=model_type
-        )
-        data = model.dict()
-        data.update(props)
+        model = await self.load_state(uid=uid, model_type=model_type)
 
-        new_model = model.__class__(
-            **data
-        )
-        await self.store(uid=uid, model=new_model)
+        for prop_name, value in props.items():
+            setattr(model, prop_name, value)
+
+        await self.save_state(uid=uid, model=model)
 
     async def extend_dynamic_props(
             self,
             uid: UID,
             model_type: Type[StateModel],
             props: Dict[str, Optional[Dynamic]]) -> None:
-        model = await self.get_state_by_uid(
-            uid=uid,
-            model_type=model_type
-        )
+        model = await self.load_state(uid=uid, model_type=model_type)
 
         for prop_name, prop in props.items():
             point_type = prop._get_point_type()
-            points = getattr(
-                model,
-                prop_name,
-                Dynamic[point_type](points=[])
-            ).points
+            points = list(
+                getattr(
+                    model,
+                    prop_name,
+                    Dynamic[point_type](points=[])
+                ).points
+            )
 
             points.extend(prop.points)
             setattr(
@@ -90,7 +271,7 @@ class UIDKeyStoreBase(AsyncBaseStore):
                 prop_name,
                 Dynamic[point_type](points=points)
             )
-        await self.store(uid=uid, model=model)
+        await self.save_state(uid=uid, model=model)
 
     async def delete_all_relationships(
             self,
@@ -99,15 +280,15 @@ class UIDKeyStoreBase(AsyncBaseStore):
             rel_from_name: str,
             ) -> List[UID]:
 
-        model = await self.get_state_by_uid(
+        model = await self.load_state(
             uid=from_uid,
             model_type=from_model_type
         )
 
-        orphan_refs = getattr(model, rel_from_name, [])
+        orphan_refs = getattr(model, rel_from_name, None) or []
         setattr(model, rel_from_name, [])
 
-        await self.store(uid=from_uid, model=model)
+        await self.save_state(uid=from_uid, model=model)
 
         return [orphan_ref.record.uid for orphan_ref in orphan_refs]
 
@@ -116,36 +297,39 @@ class UIDKeyStoreBase(AsyncBaseStore):
             from_uid: UID,
             from_model_type: Type[StateModel],
             inspector: RelInspector) -> None:
-        from_model = await self.get_state_by_uid(
-            uid=from_uid,
-            model_type=inspector.to_model
-        )
-
-        to_refs = getattr(from_model, inspector.from_field_name, [])
-        if to_refs is None:
-            to_refs = []
-
         new_to_refs = (
             inspector.to_refs
             if inspector.to_refs is not None
             else []
         )
 
-        for to_ref in new_to_refs:
-            to_uid = to_ref.uid
-            to_refs.append(to_ref)
-            if inspector.to_field_name is not None:
-                to_model = await self.get_state_by_uid(
-                    uid=to_uid,
-                    model_type=inspector.to_model
-                )
+        if inspector.to_field_name is not None and new_to_refs:
+            from_ref = await self.generate_ref(uid=from_uid)
+            to_models = await self.load_states(
+                uids=[to_ref.uid for to_ref in new_to_refs],
+                model_type=inspector.to_model
+            )
+
+            for to_uid, to_model in to_models.items():
                 backref_list = getattr(to_model, inspector.to_field_name)
-                from_ref = await self.generate_ref(uid=from_uid)
                 if backref_list is None:
-                    backref_list = [from_ref]
-                else:
-                    backref_list.append(from_ref)
+                    backref_list = []
+                backref_list.extend(
+                    from_ref for to_ref in new_to_refs
+                    if to_ref.uid == to_uid
+                )
                 setattr(to_model, inspector.to_field_name, backref_list)
-                await self.store(uid=to_uid, model=to_model)
+                await self.save_state(uid=to_uid, model=to_model)
+
+        from_model = await self.load_state(
+            uid=from_uid,
+            model_type=from_model_type
+        )
+
+        to_refs = getattr(from_model, inspector.from_field_name, [])
+        if to_refs is None:
+            to_refs = []
+        to_refs.extend(new_to_refs)
+
         setattr(from_model, inspector.from_field_name, to_refs)
-        await self.store(uid=from_uid, model=from_model)
\ No newline at end of file
+        await self.save_state(uid=from_uid, model=from_model)
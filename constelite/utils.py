@@ -6,28 +6,106 @@ from functools import wraps
 import asyncio
 import datetime
 import re
+import weakref
 
 import pkgutil
 import importlib
 import inspect
 
 from types import ModuleType
-from typing import Type, Literal, Union,  Callable, Any
+from typing import Type, Literal, Union,  Callable, Any, Optional, List
 from typing import get_origin, get_args
 from typing_extensions import Annotated
 from loguru import logger
 
+from constelite.executor import BoundedExecutor, default_executor
 
-def resolve_forward_ref(forward_ref, root_cls):
+
+class SubclassRegistry:
+    """
+    Name to class index of the subclasses of the tracked root classes.
+
+    Classes are held by weak references, so dynamically created classes
+    (e.g. parametrised generic models) drop out of the registry once they
+    are garbage collected, the same way they drop out of
+    `cls.__subclasses__()`. When several classes share a name, the one
+    registered first wins.
+    """
+    def __init__(self):
+        self._roots: list[weakref.ref] = []
+        self._classes: dict[str, list[weakref.ref]] = {}
+
+    def track(self, root_cls: Type) -> None:
+        """Marks `root_cls` as a root whose subclasses register themselves.
+        """
+        self._roots.append(weakref.ref(root_cls))
+
+    def tracks(self, cls: Type) -> bool:
+        """Checks whether subclasses of `cls` are indexed by the registry.
+        """
+        return any(
+            (root := root_ref()) is not None and issubclass(cls, root)
+            for root_ref in self._roots
+        )
+
+    def register(self, cls: Type) -> None:
+        name = cls.__name__
+        refs = self._classes.setdefault(name, [])
+        refs.append(weakref.ref(cls, self._make_callback(name)))
+
+    def _make_callback(self, name: str) -> Callable:
+        registry_ref = weakref.ref(self)
+
+        def remove(cls_ref):
+            registry = registry_ref()
+            if registry is None:
+                return
+            refs = registry._classes.get(name, [])
+            if cls_ref in refs:
+                refs.remove(cls_ref)
+            if not refs:
+                registry._classes.pop(name, None)
+        return remove
+
+    def get(self, name: str, root_cls: Type) -> Optional[Type]:
+        """Returns a subclass of `root_cls` (excluding `root_cls` itself)
+        with the given name or `None` if there is no such class.
+        """
+        for cls_ref in self._classes.get(name, ()):
+            cls = cls_ref()
+            if (
+                cls is not None
+                and cls is not root_cls
+                and issubclass(cls, root_cls)
+            ):
+                return cls
+        return None
+
+
+subclass_registry = SubclassRegistry()
+
+
+def find_subclass(root_cls: Type, name: str) -> Optional[Type]:
+    """Finds a subclass of `root_cls` by its name.
+
+    Uses `subclass_registry` if `root_cls` is tracked by it and falls back
+    to scanning the subclass tree otherwise.
+    """
+    if subclass_registry.tracks(root_cls):
+        return subclass_registry.get(name, root_cls)
     return next(
         (
             cls for cls in all_subclasses(root_cls)
-            if cls.__name__ == forward_ref.__forward_arg__
+            if cls.__name__ == name
         ),
         None
     )
 
 
+def resolve_forward_ref(forward_ref, root_cls):
+    return find_subclass(root_cls, forward_ref.__forward_arg__)
+
+
 def get_method_name(cls: Type, method_type: Literal['get', 'set']):
     pattern = re.compile(r'(?<!^)(?=[A-Z])')
     name = pattern.sub('_', cls.__name__).lower()
@@ -51,13 +129,31 @@ def is_annotated(field):
 
 
 def to_thread(fn):
+    """Turns a blocking method into a coroutine run in a worker thread.
+
+    Calls run in the `thread_executor` of the object the method is
+    called on, if it has one, and in the shared default executor
+    otherwise.
+    """
     async def wrapper(*args, **kwargs):
-        return await asyncio.to_thread(fn, *args, **kwargs)
-    
+        executor = None
+        if len(args) > 0:
+            executor = getattr(args[0], 'thread_executor', None)
+        if executor is None:
+            executor = default_executor()
+        return await executor.run(fn, *args, **kwargs)
+
     wrapper._sync_fn = fn
 
     return wrapper
 
+def iter_chunks(items: list, size: int):
+    """Yields consecutive slices of `items` of at most `size` elements.
+    """
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
 async def async_map(fn, iterable):
     tasks = []
     async with asyncio.TaskGroup() as tg:
@@ -69,6 +165,87 @@ async def async_map(fn, iterable):
     return [task.result() for task in tasks]
 
 
+async def bounded_async_map(
+        fn: Callable[[Any], Awaitable],
+        items,
+        limit: int,
+        message: str = "Failed to process some of the items"):
+    """Awaits `fn(item)` for every item, running at most `limit` calls at
+    a time.
+
+    All calls run to completion even if some of them fail. A single
+    failure is then raised as it is, several are raised together in an
+    `ExceptionGroup`, in the order of `items`, so the error does not
+    depend on which call finished first.
+
+    Returns:
+        Results in the order of `items`.
+    """
+    items = list(items)
+    semaphore = asyncio.Semaphore(max(limit, 1))
+
+    async def call(item):
+        async with semaphore:
+            return await fn(item)
+
+    results = await asyncio.gather(
+        *[call(item) for item in items],
+        return_exceptions=True
+    )
+    raise_errors(
+        [result for result in results if isinstance(result, BaseException)],
+        message=message
+    )
+    return results
+
+
+def thread_map(
+        fn: Callable,
+        items,
+        max_workers: int,
+        message: str = "Failed to process some of the items",
+        executor: Optional[BoundedExecutor] = None):
+    """Calls `fn(item)` for every item, `max_workers` at a time.
+
+    Items are processed by the calling thread with the help of the workers
+    of `executor`, or of the default executor, see
+    `BoundedExecutor.map_blocking`. With a single worker, items are
+    processed in the calling thread only. Failures are raised as
+    `bounded_async_map` raises them.
+
+    Returns:
+        Results in the order of `items`.
+    """
+    items = list(items)
+    if max_workers <= 1 or len(items) <= 1:
+        results = []
+        for item in items:
+            try:
+                results.append(fn(item))
+            except Exception as e:
+                results.append(e)
+    else:
+        results = (executor or default_executor()).map_blocking(
+            fn, items, limit=max_workers
+        )
+
+    raise_errors(
+        [result for result in results if isinstance(result, Exception)],
+        message=message
+    )
+    return results
+
+
+def raise_errors(errors: List[BaseException], message: str) -> None:
+    """Raises a single error as it is and several errors in an
+    `ExceptionGroup` with the given message.
+    """
+    if len(errors) == 1:
+        raise errors[0]
+    if errors:
+        raise ExceptionGroup(message, errors)
+
+
 def get_field_extra(field, key_name):
     """
     Get a value from a Pydantic field json schema extra dict
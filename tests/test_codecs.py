@@ -0,0 +1,194 @@
+import pickle
+import unittest
+
+from datetime import datetime, timezone
+from typing import Optional, List
+from uuid import uuid4
+
+import pandera as pa
+import pytest
+
+from pydantic.v1 import root_validator, validator
+
+from constelite.models import (
+    StateModel, Dynamic, TimePoint, Tensor, TensorSchema, Association,
+    StoreModel, StoreRecordModel, Ref, resolve_model
+)
+from constelite.store import Projection
+from constelite.store.codecs import get_codec, to_document
+
+
+class CodecSchema(TensorSchema):
+    pa_schema = pa.SeriesSchema(
+        'float64',
+        name='absorbance',
+        index=pa.MultiIndex([
+            pa.Index('int', name='wavelength')
+        ])
+    )
+
+
+class CodecChild(StateModel):
+    name: str
+
+
+class CodecState(StateModel):
+    name: Optional[str]
+    count: Optional[int]
+    ratio: Optional[float]
+    created: Optional[datetime]
+    tags: Optional[List[str]]
+    child: Optional[CodecChild]
+    children: Optional[Association[CodecChild]]
+    readings: Optional[Dynamic[float]]
+    counts: Optional[Dynamic[int]]
+    spectra: Optional[Dynamic[Tensor[CodecSchema]]]
+
+
+class ValidatedState(StateModel):
+    name: Optional[str]
+    label: Optional[str]
+    count: Optional[int]
+
+    @validator('name')
+    def strip_name(cls, v):
+        return v.strip()
+
+    @validator('count', always=True)
+    def default_count(cls, v):
+        return 0 if v is None else v
+
+    @root_validator
+    def derive_label(cls, values):
+        values['label'] = f"{values.get('name')}-{values.get('count')}"
+        return values
+
+
+def make_state() -> CodecState:
+    store = StoreModel(uid=uuid4(), name='Store')
+    return CodecState(
+        name='state',
+        count=3,
+        ratio=1,
+        created=datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+        tags=['a', 'b'],
+        child=CodecChild(name='child'),
+        children=[
+            Ref[CodecChild](
+                record=StoreRecordModel(store=store, uid=f'uid{idx}'),
+                guid=uuid4(),
+                state_model_name='CodecChild'
+            )
+            for idx in range(3)
+        ],
+        readings=Dynamic[float](points=[
+            TimePoint(timestamp=t, value=t / 2) for t in range(1000)
+        ]),
+        counts=Dynamic[int].from_columns(
+            timestamps=[0, 1, 2],
+            values=[1, 2, 3]
+        ),
+        spectra=Dynamic[Tensor[CodecSchema]](points=[
+            TimePoint(
+                timestamp=t,
+                value=Tensor[CodecSchema](
+                    data=[1.0 * t, 2.0 * t],
+                    index=[[220, 230]]
+                )
+            )
+            for t in (0, 10)
+        ])
+    )
+
+
+class TestCodecs(unittest.TestCase):
+    def assert_round_trip(self, name: str):
+        state = make_state()
+        codec = get_codec(name)
+        decoded = codec.decode(codec.encode(state))
+
+        self.assertIsInstance(decoded, CodecState)
+        self.assertEqual(decoded, state)
+        self.assertIsInstance(decoded.child, CodecChild)
+        self.assertIsInstance(decoded.children[0], Ref)
+        self.assertEqual(decoded.children[0].guid, state.children[0].guid)
+        self.assertEqual(decoded.created, state.created)
+        self.assertIsInstance(decoded.ratio, float)
+
+    def test_round_trip_pickle(self):
+        self.assert_round_trip('pickle')
+
+    def test_round_trip_orjson(self):
+        pytest.importorskip('orjson')
+        self.assert_round_trip('orjson')
+
+    def test_round_trip_msgpack(self):
+        pytest.importorskip('msgpack')
+        self.assert_round_trip('msgpack')
+
+    def test_round_trip_zstd(self):
+        pytest.importorskip('zstandard')
+        self.assert_round_trip('pickle+zstd')
+
+    def test_round_trip_msgpack_zstd(self):
+        pytest.importorskip('msgpack')
+        pytest.importorskip('zstandard')
+        self.assert_round_trip('msgpack+zstd')
+
+    def test_validators(self):
+        codec = get_codec('pickle')
+        document = to_document(ValidatedState(name='a'))
+        document['name'] = ' b '
+        document['count'] = None
+
+        decoded = codec.decode(document)
+
+        self.assertIsInstance(decoded, ValidatedState)
+        self.assertEqual(decoded.name, 'b')
+        self.assertEqual(decoded.count, 0)
+        self.assertEqual(decoded.label, 'b-0')
+        self.assertEqual(decoded.model_name, 'ValidatedState')
+
+        state = ValidatedState(name='c', count=2)
+        self.assertEqual(codec.decode(codec.encode(state)), state)
+
+    def test_dynamic_columns(self):
+        codec = get_codec('pickle')
+        decoded = codec.decode(codec.encode(make_state()))
+
+        self.assertTrue(decoded.readings.points.is_columnar)
+        self.assertEqual(decoded.readings.points[10].value, 5.0)
+
+    def test_legacy_values(self):
+        state = make_state()
+        codec = get_codec('pickle')
+
+        self.assertEqual(codec.decode(pickle.dumps(state.dict())), state)
+        self.assertEqual(codec.decode(state.dict()), state)
+
+    def test_projection(self):
+        codec = get_codec('pickle')
+        decoded = codec.decode(
+            codec.encode(make_state()),
+            projection=Projection(include=['name'])
+        )
+
+        self.assertEqual(decoded.name, 'state')
+        self.assertIsNone(decoded.readings)
+
+    def test_nested_document(self):
+        state = make_state()
+        document = to_document(state)
+
+        self.assertEqual(document['model_name'], 'CodecState')
+        self.assertEqual(document['child']['model_name'], 'CodecChild')
+        self.assertEqual(
+            resolve_model(values=state.dict()),
+            get_codec('pickle').decode(document)
+        )
+
+    def test_unknown_codec(self):
+        with self.assertRaises(ValueError):
+            get_codec('yaml')
+        with self.assertRaises(ValueError):
+            get_codec('pickle+lz4')
@@ -0,0 +1,88 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+import pandera as pa
+
+from constelite.models import Dynamic, TimePoint, Tensor, TensorSchema
+
+
+class AbsorbanceSchema(TensorSchema):
+    pa_schema = pa.SeriesSchema(
+        'float64',
+        name='absorbance',
+        index=pa.MultiIndex([
+            pa.Index('int', name='wavelength')
+        ])
+    )
+
+
+class TestDynamic(unittest.TestCase):
+    def test_columns_match_points(self):
+        columnar = Dynamic[int].from_columns(
+            timestamps=[0, 1, 2],
+            values=np.array([10, 20, 30])
+        )
+        points = Dynamic[int](
+            points=[
+                TimePoint[int](timestamp=0, value=10),
+                TimePoint[int](timestamp=1, value=20),
+                TimePoint[int](timestamp=2, value=30),
+            ]
+        )
+
+        self.assertEqual(len(columnar), 3)
+        self.assertTrue(columnar.points.is_columnar)
+        self.assertEqual(columnar.points[-1], points.points[-1])
+        self.assertEqual(columnar, points)
+        self.assertEqual(
+            Dynamic[int].parse_raw(columnar.json()), points
+        )
+
+    def test_append_materialises_points(self):
+        dynamic = Dynamic[int].from_columns(timestamps=[0], values=[10])
+
+        dynamic.points.append(TimePoint[int](timestamp=1, value=20))
+
+        self.assertFalse(dynamic.points.is_columnar)
+        self.assertEqual(dynamic.values, [10, 20])
+
+    def test_mismatched_columns(self):
+        with self.assertRaises(ValueError):
+            Dynamic[int].from_columns(timestamps=[0, 1], values=[10])
+
+    def test_series_round_trip(self):
+        series = pd.Series(
+            index=pd.DatetimeIndex(
+                ['2024-01-01', '2024-01-02'], name='timestamp'
+            ),
+            data=[1.5, 2.5]
+        )
+
+        dynamic = Dynamic[float].from_series(series)
+
+        np.testing.assert_array_equal(
+            dynamic.timestamps, [1704067200, 1704153600]
+        )
+        pd.testing.assert_series_equal(
+            dynamic.to_series(), series, check_index_type=False
+        )
+
+    def test_tensor_series_round_trip(self):
+        tensors = [
+            Tensor[AbsorbanceSchema](index=[[400, 500]], data=[0.1, 0.2]),
+            Tensor[AbsorbanceSchema](index=[[400, 500]], data=[0.3, 0.4]),
+        ]
+        dynamic = Dynamic[Tensor[AbsorbanceSchema]](
+            points=[
+                TimePoint[Tensor[AbsorbanceSchema]](timestamp=t, value=v)
+                for t, v in zip([0, 60], tensors)
+            ]
+        )
+
+        self.assertEqual(
+            Dynamic[Tensor[AbsorbanceSchema]].from_series(
+                dynamic.to_series()
+            ),
+            dynamic
+        )
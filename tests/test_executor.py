@@ -0,0 +1,162 @@
+import asyncio
+import threading
+import time
+import unittest
+
+from contextvars import ContextVar
+from uuid import uuid4
+
+from constelite.executor import BoundedExecutor, ExecutorConfig
+from constelite.store import BaseStore
+from constelite.utils import to_thread, thread_map, bounded_async_map
+
+
+current_value: ContextVar[str] = ContextVar('current_value', default='')
+
+
+class SyncStore(BaseStore):
+    @to_thread
+    def thread_name(self) -> str:
+        return threading.current_thread().name
+
+
+def fail_odd(item: int) -> int:
+    if item % 2 == 1:
+        raise ValueError(f'odd {item}')
+    return item
+
+
+class TestBoundedExecutor(unittest.IsolatedAsyncioTestCase):
+    async def test_back_pressure(self):
+        executor = BoundedExecutor(
+            ExecutorConfig(name='test', max_workers=1, max_queue_size=1)
+        )
+        release = threading.Event()
+
+        def blocked():
+            release.wait()
+            return 1
+
+        tasks = [
+            asyncio.create_task(executor.run(blocked)) for _ in range(4)
+        ]
+        await asyncio.sleep(0.05)
+
+        self.assertEqual(executor.metrics.queue_depth, 1)
+        self.assertEqual(executor.metrics.submitted, 2)
+        self.assertEqual(executor.metrics.waiting, 2)
+
+        release.set()
+        self.assertEqual(await asyncio.gather(*tasks), [1, 1, 1, 1])
+
+        self.assertEqual(executor.metrics.completed, 4)
+        self.assertEqual(executor.metrics.throttled, 2)
+        self.assertEqual(executor.metrics.waiting, 0)
+        self.assertEqual(executor.metrics.queue_depth, 0)
+        self.assertGreater(executor.metrics.max_wait_time, 0)
+        executor.shutdown()
+
+    async def test_context_and_thread_name(self):
+        executor = BoundedExecutor(ExecutorConfig(name='ctx'))
+        current_value.set('caller')
+
+        value, thread_name = await executor.run(
+            lambda: (current_value.get(), threading.current_thread().name)
+        )
+
+        self.assertEqual(value, 'caller')
+        self.assertTrue(thread_name.startswith('ctx'))
+        executor.shutdown()
+
+    async def test_exception_frees_place(self):
+        executor = BoundedExecutor(
+            ExecutorConfig(max_workers=1, max_queue_size=0)
+        )
+
+        def fail():
+            raise KeyError('missing')
+
+        with self.assertRaises(KeyError):
+            await executor.run(fail)
+        self.assertGreater(await executor.run(time.monotonic), 0)
+        self.assertEqual(executor.metrics.completed, 2)
+        executor.shutdown()
+
+    async def test_store_executor(self):
+        store = SyncStore(
+            uid=uuid4(),
+            executor_config=ExecutorConfig(name='sync-store')
+        )
+
+        thread_name = await store.thread_name()
+
+        self.assertTrue(thread_name.startswith('sync-store'))
+        self.assertEqual(store.thread_executor.metrics.completed, 1)
+        self.assertNotIn('executor_config', store.dict())
+
+    def test_map_blocking(self):
+        executor = BoundedExecutor(ExecutorConfig(name='map', max_workers=2))
+        current_value.set('caller')
+
+        results = executor.map_blocking(
+            lambda item: (fail_odd(item), current_value.get()),
+            range(6),
+            limit=3
+        )
+
+        self.assertEqual(
+            [result for result in results if isinstance(result, tuple)],
+            [(0, 'caller'), (2, 'caller'), (4, 'caller')]
+        )
+        self.assertEqual(
+            [str(result) for result in results[1::2]],
+            ['odd 1', 'odd 3', 'odd 5']
+        )
+        executor.shutdown()
+
+    async def test_map_blocking_in_worker(self):
+        # Maps run by every worker must not wait for a free worker
+        executor = BoundedExecutor(
+            ExecutorConfig(max_workers=2, max_queue_size=0)
+        )
+
+        def nested(item):
+            return sum(executor.map_blocking(
+                lambda n: time.sleep(0.001) or n, range(item), limit=4
+            ))
+
+        results = await asyncio.wait_for(
+            asyncio.gather(*[executor.run(nested, 10) for _ in range(2)]),
+            timeout=5
+        )
+
+        self.assertEqual(results, [45, 45])
+        self.assertEqual(executor.metrics.queue_depth, 0)
+        executor.shutdown()
+
+
+class TestMapErrors(unittest.IsolatedAsyncioTestCase):
+    def test_thread_map(self):
+        self.assertEqual(thread_map(fail_odd, [0, 2], max_workers=2), [0, 2])
+
+        with self.assertRaisesRegex(ValueError, 'odd 1'):
+            thread_map(fail_odd, [0, 1, 2], max_workers=2)
+
+        with self.assertRaises(ExceptionGroup) as cm:
+            thread_map(fail_odd, [1, 2, 3], max_workers=2, message='failed')
+        self.assertEqual(
+            [str(e) for e in cm.exception.exceptions], ['odd 1', 'odd 3']
+        )
+
+    async def test_bounded_async_map(self):
+        async def afail_odd(item):
+            return fail_odd(item)
+
+        with self.assertRaisesRegex(ValueError, 'odd 1'):
+            await bounded_async_map(afail_odd, [0, 1, 2], limit=2)
+
+        with self.assertRaises(ExceptionGroup) as cm:
+            await bounded_async_map(afail_odd, [3, 2, 1], limit=2)
+        self.assertEqual(
+            [str(e) for e in cm.exception.exceptions], ['odd 3', 'odd 1']
+        )
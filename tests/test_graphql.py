@@ -117,3 +117,28 @@ def test_query_string_creation():
     # Standardise all whitespace for the comparisons
     assert ' '.join(q.query_string.split()) == \
            ' '.join(expected_query_string.split())
+
+
+def test_projections():
+    schema_manager = GraphQLSchemaManager()
+    schema_manager.schema = schema_manager.create_graphql_schema(
+        root_cls=FooGraphQL
+    )
+
+    projections = schema_manager.get_projections("""
+        query {
+          foographqls(int_field: 1) {
+            guid
+            state {
+              int_field
+              association {
+                state { name }
+              }
+            }
+          }
+        }
+    """)
+
+    assert projections['FooGraphQL'].include == ['association', 'int_field']
+    assert projections['BarGraphQL'].include == ['name']
+    assert projections['BazGraphQL'].include == []
@@ -1,9 +1,13 @@
+import asyncio
+import threading
 import unittest
 
-from uuid import uuid4
+from uuid import UUID, uuid4
 
 from constelite.store.memory import MemoryStore
 from constelite.guid_map.memory import MemoryGUID
+from constelite.guid_map import AsyncCachedGUIDMap
+from constelite.guid_map.cached import GUIDCache, MISSING
 from constelite.models import StateModel, ref
 
 
@@ -118,3 +122,173 @@ class TestGUID(unittest.IsolatedAsyncioTestCase):
 
         self.assertIsNotNone(r_foo_b)
         self.assertEqual(uid, r_foo_b.uid)
+
+    async def test_bulk_get_keeps_guids(self):
+        refs = [
+            await self.context.store.put(ref(FooGUID())) for _ in range(3)
+        ]
+        guids = [r.guid for r in refs]
+        for r in refs:
+            r.guid = None
+
+        got_refs = await self.context.store.bulk_get(refs)
+
+        self.assertEqual([r.guid for r in got_refs], guids)
+
+    async def test_delete_unlinks_uid(self):
+        r_foo = await self.context.store.put(ref(FooGUID()))
+
+        await self.context.store.delete(r_foo)
+
+        guids = await self.context.guid_map.get_guids(
+            uids=[r_foo.uid],
+            store=self.context.store
+        )
+        self.assertEqual(guids, {r_foo.uid: None})
+
+    async def test_get_or_create_guids(self):
+        r_foo = await self.context.store.put(ref(FooGUID()))
+
+        guids = await self.context.guid_map.get_or_create_guids(
+            uids=[r_foo.uid, 'new_uid'],
+            store=self.context.store
+        )
+
+        self.assertEqual(guids[r_foo.uid], r_foo.guid)
+        self.assertIsNotNone(guids['new_uid'])
+
+        uids = await self.context.guid_map.get_uids(
+            guids=list(guids.values()),
+            store=self.context.store
+        )
+        self.assertEqual(set(uids.values()), {r_foo.uid, 'new_uid'})
+
+
+class TestCachedGUID(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.store = MemoryStore(uid=uuid4(), name="MemoryStore")
+        self.guid_map = MemoryGUID()
+        self.cached_map = AsyncCachedGUIDMap(
+            guid_map=self.guid_map,
+            max_entries=6
+        )
+        self.store.set_guid_map(guid_map=self.cached_map)
+
+    async def test_get_guid_from_cache(self):
+        r_foo = await self.store.put(ref(FooGUID()))
+        self.guid_map.guid_map.clear()
+
+        guid = await self.cached_map.get_guid(uid=r_foo.uid, store=self.store)
+        uid = await self.cached_map.get_uid(guid=guid, store=self.store)
+
+        self.assertEqual(guid, r_foo.guid)
+        self.assertEqual(uid, r_foo.uid)
+        self.assertEqual(self.cached_map.metrics.misses, 1)
+
+    async def test_negative_entry_expires(self):
+        self.cached_map._cache.negative_ttl = 0.01
+
+        guid = await self.cached_map.get_guid(uid='foo', store=self.store)
+        self.assertIsNone(guid)
+
+        new_guid = await self.guid_map.create_guid(uid='foo', store=self.store)
+        self.assertIsNone(
+            await self.cached_map.get_guid(uid='foo', store=self.store)
+        )
+
+        await asyncio.sleep(0.02)
+        self.assertEqual(
+            await self.cached_map.get_guid(uid='foo', store=self.store),
+            new_guid
+        )
+
+    async def test_delete_uid_invalidates(self):
+        r_foo = await self.store.put(ref(FooGUID()))
+
+        await self.store.delete(r_foo)
+
+        self.assertIsNone(
+            await self.cached_map.get_guid(uid=r_foo.uid, store=self.store)
+        )
+        self.assertIsNone(
+            await self.cached_map.get_uid(guid=r_foo.guid, store=self.store)
+        )
+
+    async def test_link_uid_invalidates(self):
+        r_foo = await self.store.put(ref(FooGUID()))
+
+        await self.cached_map.link_uid(
+            uid='bar', guid=r_foo.guid, store=self.store
+        )
+
+        self.assertEqual(
+            await self.cached_map.get_uid(guid=r_foo.guid, store=self.store),
+            'bar'
+        )
+
+    async def test_evicts_in_pairs(self):
+        refs = [await self.store.put(ref(FooGUID())) for _ in range(3)]
+
+        self.assertLessEqual(len(self.cached_map._cache._entries), 6)
+        self.assertGreater(self.cached_map.metrics.evictions, 0)
+        keys = set(self.cached_map._cache._entries)
+        store_uid = str(self.store.uid)
+        for r in refs:
+            self.assertEqual(
+                ('guid', store_uid, r.uid) in keys,
+                ('uid', store_uid, str(r.guid)) in keys
+            )
+
+    async def test_guid_forms_share_entry(self):
+        r_foo = await self.store.put(ref(FooGUID()))
+        misses = self.cached_map.metrics.misses
+
+        for guid in (UUID(str(r_foo.guid)), str(r_foo.guid)):
+            self.assertEqual(
+                await self.cached_map.get_uid(guid=guid, store=self.store),
+                r_foo.uid
+            )
+            self.assertTrue(await self.cached_map.guid_exists(guid=guid))
+        self.assertEqual(self.cached_map.metrics.misses, misses)
+
+
+class TestGUIDCache(unittest.TestCase):
+    def test_threads(self):
+        cache = GUIDCache(max_entries=30, negative_ttl=5.0)
+        store_uid = uuid4()
+        errors = []
+
+        def work():
+            try:
+                for idx in range(2000):
+                    guid = uuid4()
+                    cache.set_link(store_uid, f'uid{idx}', guid)
+                    cache.get(('uid', store_uid, str(guid)))
+                    cache.drop_guid(store_uid, guid)
+                    cache.get(('guid', store_uid, f'uid{idx}'))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertLessEqual(len(cache._entries), 30)
+        metrics = cache.metrics
+        self.assertEqual(metrics.hits + metrics.misses, 8 * 2000 * 2)
+
+    def test_uuid_keys(self):
+        cache = GUIDCache(max_entries=10, negative_ttl=5.0)
+        store_uid = uuid4()
+        guid = uuid4()
+
+        cache.set_link(store_uid, 'uid', guid)
+
+        self.assertEqual(cache.get(('uid', str(store_uid), str(guid))), 'uid')
+        self.assertEqual(cache.get(('guid', store_uid, 'uid')), guid)
+        cache.drop_uid(str(store_uid), 'uid', None)
+        self.assertIs(cache.get(('uid', store_uid, guid)), MISSING)
@@ -9,7 +9,7 @@ from constelite.models import (
     Association, Composition, Aggregation,
     backref
 )
-from constelite.models import StateInspector
+from constelite.models import StateInspector, InspectionPlan
 
 
 class AbsorbanceSchema(TensorSchema):
@@ -70,6 +70,11 @@ BazInspector.fix_backrefs()
 # Not fixing backrefs for BazUnfixedBackrefs
 
 
+class UnresolvedInspector(StateModel):
+    name: Optional[str]
+    missing: Optional[Association[ForwardRef("MissingInspector")]]
+
+
 class TestInspector(unittest.TestCase):
 
     def test_rel_inspection(self):
@@ -211,6 +216,56 @@ class TestInspector(unittest.TestCase):
 
         self.assertEqual(inspector.dynamic_props['dynamic_int'], value)
 
+    def test_inspection_plan_is_cached(self):
+        plan = InspectionPlan.for_model(FooInspector)
+
+        self.assertIs(InspectionPlan.for_model(FooInspector), plan)
+        self.assertIsNot(InspectionPlan.for_model(QuxInspector), plan)
+
+        kinds = {f.field_name: f.kind for f in plan.fields}
+        self.assertEqual(kinds['int_field'], 'static')
+        self.assertEqual(kinds['dynamic_int'], 'dynamic')
+        self.assertEqual(kinds['association'], 'association')
+        self.assertEqual(kinds['aggregation'], 'aggregation')
+        self.assertEqual(kinds['composition'], 'composition')
+
+    def test_inspection_plan_invalidated_by_fix_backrefs(self):
+        plan = InspectionPlan.for_model(BazInspector)
+
+        BazInspector.fix_backrefs()
+
+        self.assertIsNot(InspectionPlan.for_model(BazInspector), plan)
+
+    def test_unresolved_forward_ref(self):
+        inspector = StateInspector.from_state(
+            UnresolvedInspector(name='unresolved')
+        )
+
+        self.assertEqual(inspector.static_props['name'], 'unresolved')
+        self.assertEqual(inspector.associations, {})
+
+        with self.assertRaises(ValueError):
+            StateInspector.from_state(
+                UnresolvedInspector(missing=[ref(BarInspector(name='bar'))])
+            )
+
+    def test_inspection_plan_rel_is_reused(self):
+        foo = FooInspector(association=[ref(BarInspector(name='bar'))])
+        StateInspector.from_state(foo)
+        plan = InspectionPlan.for_model(FooInspector)
+        field_plan = next(
+            f for f in plan.fields if f.field_name == 'association'
+        )
+        rel = field_plan.rel
+
+        inspector = StateInspector.from_state(foo)
+
+        self.assertIsNotNone(rel)
+        self.assertIs(field_plan.rel, rel)
+        self.assertEqual(inspector.associations['association'].to_refs,
+                         foo.association)
+        self.assertEqual(rel.to_refs, [])
+
 
 if __name__ == '__main__':
     unittest.main()
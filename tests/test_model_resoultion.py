@@ -1,7 +1,8 @@
+import gc
 import json
 from unittest import TestCase
 
-from constelite.models import StateModel, resolve_model
+from constelite.models import StateModel, resolve_model, get_auto_resolve_model
 
 class Character(StateModel):
     name: str
@@ -27,3 +28,17 @@ class TestModelResolution(TestCase):
 
         self.assertEqual(hero.__class__, Hero)
         self.assertEqual(hero.power, "magic")
+
+    def test_resolve_respects_root_cls(self):
+        self.assertIs(get_auto_resolve_model('Hero', Character), Hero)
+        self.assertIsNone(get_auto_resolve_model('Character', Hero))
+        self.assertIsNone(get_auto_resolve_model('Character', Character))
+
+    def test_dynamic_model_is_unregistered(self):
+        DynamicHero = type('DynamicHero', (Character,), {})
+        self.assertIs(get_auto_resolve_model('DynamicHero'), DynamicHero)
+
+        del DynamicHero
+        gc.collect()
+
+        self.assertIsNone(get_auto_resolve_model('DynamicHero'))
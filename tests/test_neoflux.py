@@ -0,0 +1,713 @@
+import threading
+import unittest
+
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+
+import pandera as pa
+
+from pydantic.v1 import BaseModel
+from influxdb_client.client.flux_table import FluxRecord
+
+from constelite.models import (
+    StateModel, Dynamic, Association, Tensor, TensorSchema, Ref, backref, ref
+)
+from constelite.store import DynamicQuery, Projection
+from constelite.store.cypher import (
+    UID_FIELD, LIVE_LABEL, get_states_statement, create_nodes_statement,
+    create_relationships_statement, match_nodes_statement
+)
+from constelite.store.neoflux import NeofluxStore, NeoConfig, InfluxConfig
+from constelite.utils import to_thread
+
+
+class FluxSchema(TensorSchema):
+    pa_schema = pa.SeriesSchema(
+        'float64',
+        name='absorbance',
+        index=pa.MultiIndex([
+            pa.Index('int', name='wavelength')
+        ])
+    )
+
+
+class FluxSettings(BaseModel):
+    speed: int
+
+
+class FluxChild(StateModel):
+    name: Optional[str]
+    parent: backref(model="FluxReactor", from_field="children")
+
+
+class FluxReactor(StateModel):
+    name: Optional[str]
+    settings: Optional[FluxSettings]
+    children: Optional[Association[FluxChild]]
+    temperature: Optional[Dynamic[float]]
+    spectra: Optional[Dynamic[Tensor[FluxSchema]]]
+
+
+FluxChild.update_forward_refs(FluxReactor=FluxReactor)
+
+
+def utc(timestamp: float) -> datetime:
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc)
+
+
+def flux_record(field: str, timestamp: int, value, **values):
+    return FluxRecord(table=0, values={
+        'result': '_result',
+        'table': 0,
+        '_start': utc(0),
+        '_stop': utc(3600),
+        '_measurement': 'FluxReactor',
+        '_time': utc(timestamp),
+        '_field': field,
+        '_value': value,
+        UID_FIELD: 'r1',
+        **values
+    })
+
+
+class TestNeofluxHydration(unittest.TestCase):
+    def test_flux_any(self):
+        self.assertEqual(
+            NeofluxStore.flux_any('_field', ['a', 'b']),
+            '(r._field == "a" or r._field == "b")'
+        )
+        # Values are quoted as JSON strings
+        self.assertEqual(
+            NeofluxStore.flux_any(UID_FIELD, ['a"b']),
+            f'(r.{UID_FIELD} == "a\\"b")'
+        )
+
+    def test_records_to_dynamic(self):
+        dynamic = NeofluxStore.records_to_dynamic(
+            points=[
+                flux_record('temperature', 0, 30.0),
+                flux_record('temperature', 60, 31.5)
+            ],
+            field_name='temperature',
+            point_type=float
+        )
+
+        self.assertEqual(list(dynamic.timestamps), [0, 60])
+        self.assertEqual(list(dynamic.values), [30.0, 31.5])
+
+    def test_records_to_dynamic_tensor(self):
+        dynamic = NeofluxStore.records_to_dynamic(
+            points=[
+                flux_record(
+                    'spectra', timestamp, value,
+                    **{'spectra.wavelength': wavelength}
+                )
+                for timestamp, value, wavelength in (
+                    (0, 0.1, '220'), (0, 0.2, '230'), (60, 0.3, '220')
+                )
+            ],
+            field_name='spectra',
+            point_type=Tensor[FluxSchema]
+        )
+
+        self.assertEqual(list(dynamic.timestamps), [0, 60])
+        first = dynamic.values[0].to_series()
+        self.assertEqual(
+            list(first.index.get_level_values('wavelength')), [220, 230]
+        )
+        self.assertEqual(list(first), [0.1, 0.2])
+        self.assertEqual(list(dynamic.values[1].to_series()), [0.3])
+
+    def test_records_to_dynamic_empty(self):
+        for point_type in (float, Tensor[FluxSchema]):
+            self.assertIsNone(
+                NeofluxStore.records_to_dynamic(
+                    points=[],
+                    field_name='spectra',
+                    point_type=point_type
+                )
+            )
+
+    def test_projection_fields(self):
+        self.assertEqual(
+            NeofluxStore.projection_fields(model_type=FluxReactor),
+            (
+                None,
+                None,
+                {'temperature': float, 'spectra': Tensor[FluxSchema]}
+            )
+        )
+        self.assertEqual(
+            NeofluxStore.projection_fields(
+                model_type=FluxReactor,
+                projection=Projection(
+                    include=['name', 'children', 'temperature']
+                )
+            ),
+            (('model_name', 'name'), ['children'], {'temperature': float})
+        )
+        self.assertEqual(
+            NeofluxStore.projection_fields(
+                model_type=FluxReactor,
+                projection=Projection(
+                    include_dynamic=False,
+                    include_relationships=False
+                )
+            ),
+            (('model_name', 'name', 'settings'), [], {})
+        )
+        # Backrefs are fetched as relationships
+        self.assertEqual(
+            NeofluxStore.projection_fields(
+                model_type=FluxChild,
+                projection=Projection(exclude=['name'])
+            ),
+            (('model_name',), ['parent'], {})
+        )
+
+    def test_group_dynamic_queries(self):
+        self.assertEqual(
+            NeofluxStore.group_dynamic_queries(field_names=['a', 'b']),
+            [(None, ['a', 'b'])]
+        )
+        self.assertEqual(
+            NeofluxStore.group_dynamic_queries(field_names=[]),
+            []
+        )
+
+        last = DynamicQuery(last=1)
+        self.assertEqual(
+            NeofluxStore.group_dynamic_queries(
+                field_names=['a', 'b', 'c', 'd'],
+                dynamic_queries={
+                    'a': last,
+                    'c': DynamicQuery(last=1),
+                    'd': DynamicQuery(last=2)
+                }
+            ),
+            [
+                (last, ['a', 'c']),
+                (None, ['b']),
+                (DynamicQuery(last=2), ['d'])
+            ]
+        )
+
+    def test_hydrate_state(self):
+        r_child = Ref[FluxChild](state_model_name='FluxChild')
+        temperature = Dynamic[float].from_columns(
+            timestamps=[0], values=[30.0]
+        )
+
+        state = NeofluxStore.hydrate_state(
+            model_type=FluxReactor,
+            data={
+                UID_FIELD: 'r1',
+                'name': 'reactor',
+                'settings': FluxSettings(speed=200).json()
+            },
+            rels={'children': [r_child]},
+            dynamic_props={'temperature': temperature, 'spectra': None}
+        )
+
+        self.assertIsInstance(state, FluxReactor)
+        self.assertEqual(state.name, 'reactor')
+        self.assertEqual(state.settings, FluxSettings(speed=200))
+        self.assertEqual(state.children, [r_child])
+        self.assertEqual(list(state.temperature.values), [30.0])
+        self.assertIsNone(state.spectra)
+        self.assertNotIn(UID_FIELD, state.__fields_set__)
+
+
+class TestNeofluxPoints(unittest.TestCase):
+    def to_points(self, prop_name: str, prop, uid: str = 'r1'):
+        return NeofluxStore.dynamic_to_points(
+            uid=uid,
+            model_type_name='FluxReactor',
+            prop_name=prop_name,
+            prop=prop
+        )
+
+    def make_spectra(self) -> Dynamic[Tensor[FluxSchema]]:
+        return Dynamic[Tensor[FluxSchema]].from_columns(
+            timestamps=[0, 60],
+            values=[
+                Tensor[FluxSchema](data=[0.1, 0.2], index=[[220, 230]]),
+                Tensor[FluxSchema](data=[0.3], index=[[220]])
+            ]
+        )
+
+    def test_dynamic_to_frame(self):
+        df = NeofluxStore.dynamic_to_frame(
+            prop_name='temperature',
+            prop=Dynamic[float].from_columns(
+                timestamps=[0, 1.5], values=[30.0, 31.25]
+            )
+        )
+
+        self.assertEqual(list(df.columns), ['temperature'])
+        self.assertEqual(list(df['temperature']), [30.0, 31.25])
+        self.assertEqual(list(df.index), [utc(0), utc(1.5)])
+
+    def test_dynamic_to_frame_tensor(self):
+        df = NeofluxStore.dynamic_to_frame(
+            prop_name='spectra',
+            prop=self.make_spectra()
+        )
+
+        # One row per tensor element, repeating the time of the point
+        self.assertEqual(
+            sorted(df.columns), ['spectra', 'spectra.wavelength']
+        )
+        self.assertEqual(list(df['spectra']), [0.1, 0.2, 0.3])
+        self.assertEqual(list(df['spectra.wavelength']), [220, 230, 220])
+        self.assertEqual(list(df.index), [utc(0), utc(0), utc(60)])
+
+    def test_dynamic_to_points(self):
+        self.assertEqual(
+            self.to_points(
+                'temperature',
+                Dynamic[float].from_columns(
+                    timestamps=[0, 1.5], values=[30.0, 31.25]
+                )
+            ),
+            [
+                f'FluxReactor,{UID_FIELD}=r1 temperature=30.0 0',
+                f'FluxReactor,{UID_FIELD}=r1 temperature=31.25 1500000000'
+            ]
+        )
+        # Integers keep their type and times are rounded to microseconds
+        self.assertEqual(
+            self.to_points(
+                'stirring',
+                Dynamic[int].from_columns(
+                    timestamps=[1.0000004], values=[200]
+                )
+            ),
+            [f'FluxReactor,{UID_FIELD}=r1 stirring=200i 1000000000']
+        )
+
+    def test_dynamic_to_points_tensor(self):
+        self.assertEqual(
+            self.to_points('spectra', self.make_spectra()),
+            [
+                f'FluxReactor,{UID_FIELD}=r1,spectra.wavelength=220'
+                ' spectra=0.1 0',
+                f'FluxReactor,{UID_FIELD}=r1,spectra.wavelength=230'
+                ' spectra=0.2 0',
+                f'FluxReactor,{UID_FIELD}=r1,spectra.wavelength=220'
+                ' spectra=0.3 60000000000'
+            ]
+        )
+
+    def test_tag_escaping(self):
+        self.assertEqual(
+            self.to_points(
+                'temperature',
+                Dynamic[float].from_columns(timestamps=[0], values=[1.0]),
+                uid='a b,c=d'
+            ),
+            [f'FluxReactor,{UID_FIELD}=a\\ b\\,c\\=d temperature=1.0 0']
+        )
+
+    def test_empty(self):
+        self.assertEqual(self.to_points('temperature', None), [])
+        self.assertEqual(
+            self.to_points('temperature', Dynamic[float](points=[])), []
+        )
+
+
+class TestNeofluxFluxQueries(unittest.TestCase):
+    filters = (
+        ' |>filter(fn:(r) => r._measurement == "FluxReactor")'
+        ' |>filter(fn:(r) => (r._field == "temperature"))'
+        f' |>filter(fn:(r) => (r.{UID_FIELD} == "r1"))'
+    )
+
+    def query(self, dynamic_query=None) -> str:
+        return NeofluxStore.dynamic_records_query(
+            bucket='bucket',
+            uids=['r1'],
+            model_type=FluxReactor,
+            field_names=['temperature'],
+            dynamic_query=dynamic_query
+        )
+
+    def test_flux_time(self):
+        self.assertEqual(
+            NeofluxStore.flux_time(datetime(2024, 1, 2, 3, 4, 5, 6)),
+            '2024-01-02T03:04:05.000006Z'
+        )
+        self.assertEqual(
+            NeofluxStore.flux_time(datetime(
+                2024, 1, 2, 3, tzinfo=timezone(timedelta(hours=2))
+            )),
+            '2024-01-02T01:00:00.000000Z'
+        )
+
+    def test_all_points(self):
+        expected = (
+            'from(bucket: "bucket") |>range(start: 0)' + self.filters
+        )
+        self.assertEqual(self.query(), expected)
+        self.assertEqual(self.query(DynamicQuery()), expected)
+
+    def test_several_records_and_fields(self):
+        query = NeofluxStore.dynamic_records_query(
+            bucket='bucket',
+            uids=['r1', 'r2'],
+            model_type=FluxReactor,
+            field_names=['temperature', 'spectra']
+        )
+
+        self.assertIn(
+            '|>filter(fn:(r) =>'
+            ' (r._field == "temperature" or r._field == "spectra"))',
+            query
+        )
+        self.assertIn(
+            f'|>filter(fn:(r) => (r.{UID_FIELD} == "r1"'
+            f' or r.{UID_FIELD} == "r2"))',
+            query
+        )
+
+    def test_range(self):
+        self.assertEqual(
+            self.query(DynamicQuery(start=datetime(2024, 1, 1))),
+            'from(bucket: "bucket")'
+            ' |>range(start: 2024-01-01T00:00:00.000000Z)' + self.filters
+        )
+        self.assertEqual(
+            self.query(DynamicQuery(stop=datetime(2024, 1, 2))),
+            'from(bucket: "bucket")'
+            ' |>range(start: 0, stop: 2024-01-02T00:00:00.000000Z)'
+            + self.filters
+        )
+
+    def test_aggregate_window_and_tail(self):
+        self.assertEqual(
+            self.query(DynamicQuery(
+                start=datetime(2024, 1, 1),
+                stop=datetime(2024, 1, 2),
+                every=timedelta(minutes=5),
+                aggregate='max',
+                last=10
+            )),
+            'from(bucket: "bucket")'
+            ' |>range(start: 2024-01-01T00:00:00.000000Z,'
+            ' stop: 2024-01-02T00:00:00.000000Z)' + self.filters +
+            ' |>aggregateWindow(every: 300000000us, fn: max,'
+            ' createEmpty: false, timeSrc: "_start")'
+            ' |>tail(n: 10)'
+        )
+
+    def test_tail(self):
+        self.assertEqual(
+            self.query(DynamicQuery(last=1)),
+            'from(bucket: "bucket") |>range(start: 0)' + self.filters
+            + ' |>tail(n: 1)'
+        )
+
+
+class TestCypherStatements(unittest.TestCase):
+    def test_get_states_statement(self):
+        statement = get_states_statement()
+        self.assertTrue(statement.startswith(
+            "UNWIND $uids AS uid"
+            f" MATCH (n:{LIVE_LABEL} {{{UID_FIELD}: uid}})"
+            " RETURN uid, properties(n) AS data, [(n)-[r]->(m)"
+        ))
+        self.assertIn("$rel_fields IS NULL", statement)
+        self.assertTrue(statement.endswith("] AS incoming"))
+
+        self.assertEqual(
+            get_states_statement(
+                prop_names=('name', 'odd name'),
+                with_relationships=False
+            ),
+            "UNWIND $uids AS uid"
+            f" MATCH (n:{LIVE_LABEL} {{{UID_FIELD}: uid}})"
+            " RETURN uid, n {.`name`, .`odd name`} AS data,"
+            " [] AS outgoing, [] AS incoming"
+        )
+
+    def test_create_nodes_statement(self):
+        self.assertEqual(
+            create_nodes_statement(('FluxReactor', 'StateModel')),
+            "UNWIND $rows AS row"
+            " CREATE (n:`FluxReactor`:`StateModel`)"
+            " SET n = row"
+        )
+
+    def test_create_relationships_statement(self):
+        self.assertEqual(
+            create_relationships_statement(
+                rel_type='Association', with_to_field=False
+            ),
+            f"MATCH (a:{LIVE_LABEL} {{{UID_FIELD}: $from_uid}})"
+            " UNWIND $to_uids AS to_uid"
+            f" MATCH (b:{LIVE_LABEL} {{{UID_FIELD}: to_uid}})"
+            " MERGE (a)-[r:`Association` {from_field: $from_field}]->(b)"
+        )
+        self.assertIn(
+            "{from_field: $from_field, to_field: $to_field}",
+            create_relationships_statement(
+                rel_type='Composition', with_to_field=True
+            )
+        )
+        with self.assertRaises(ValueError):
+            create_relationships_statement(
+                rel_type='Friendship', with_to_field=False
+            )
+
+    def test_match_nodes_statement(self):
+        self.assertEqual(
+            match_nodes_statement(label='FluxReactor', prop_names=()),
+            f"MATCH (n:`FluxReactor`) RETURN n.{UID_FIELD} AS uid"
+        )
+        self.assertEqual(
+            match_nodes_statement(
+                label='FluxReactor', prop_names=('name', 'volume')
+            ),
+            "MATCH (n:`FluxReactor`)"
+            " WHERE n.`name` = $props.`name`"
+            " AND n.`volume` = $props.`volume`"
+            f" RETURN n.{UID_FIELD} AS uid"
+        )
+
+    def test_statements_are_cached(self):
+        # Equal arguments give the same text, so Neo4j reuses the plan
+        self.assertIs(
+            get_states_statement(('name',), True),
+            get_states_statement(('name',), True)
+        )
+        self.assertIs(
+            create_nodes_statement(('A', 'B')),
+            create_nodes_statement(('A', 'B'))
+        )
+        self.assertIs(
+            match_nodes_statement('A', ('name',)),
+            match_nodes_statement('A', ('name',))
+        )
+
+
+def mock_store():
+    """Returns a NeofluxStore with a mocked graph and Influx client."""
+    with patch('constelite.store.neoflux.Graph') as graph, \
+            patch('constelite.store.neoflux.InfluxDBClient') as influx:
+        store = NeofluxStore(
+            uid=uuid4(),
+            name="Neoflux",
+            neo_config=NeoConfig(
+                url="bolt://localhost",
+                auth=("neo4j", "password"),
+                bootstrap_schema=False
+            ),
+            influx_config=InfluxConfig(
+                url="http://localhost:8086",
+                token="token",
+                org="org",
+                bucket="bucket"
+            )
+        )
+    return store, graph.return_value, influx.return_value
+
+
+class TestNeofluxRelatedRefs(unittest.TestCase):
+    def setUp(self):
+        self.store, self.graph, _ = mock_store()
+        self.guid_map = MagicMock()
+        self.guid_map.get_or_create_guids.side_effect = (
+            lambda uids, store: {uid: uuid4() for uid in uids}
+        )
+        self.store.set_guid_map(self.guid_map)
+
+    def test_get_states_by_uids(self):
+        self.graph.run.return_value.data.return_value = [
+            {
+                'uid': uid,
+                'data': {UID_FIELD: uid, 'name': uid},
+                'outgoing': [
+                    {'field': 'children', 'uid': f'{uid}c{idx}',
+                     'model_name': 'FluxChild'}
+                    for idx in range(3)
+                ],
+                'incoming': []
+            }
+            for uid in ('r1', 'r2')
+        ]
+
+        states = self.store.get_states_by_uids(
+            uids=['r1', 'r2'],
+            model_type=FluxReactor,
+            projection=Projection(include=['name', 'children'])
+        )
+
+        self.guid_map.get_or_create_guids.assert_called_once()
+        self.guid_map.get_guid.assert_not_called()
+        self.assertEqual(
+            [r_child.uid for r_child in states['r2'].children],
+            ['r2c0', 'r2c1', 'r2c2']
+        )
+        self.assertEqual(
+            states['r1'].children[0].state_model_name, 'FluxChild'
+        )
+        self.assertIsNotNone(states['r1'].children[0].guid)
+
+    def test_get_relations(self):
+        self.graph.run.return_value.data.side_effect = [
+            [{'field': 'children', 'uid': 'c1', 'model_name': 'FluxChild'}],
+            [{'field': 'parent', 'uid': 'r1', 'model_name': 'FluxReactor'}]
+        ]
+
+        rels = self.store.get_relations({UID_FIELD: 'c1'})
+
+        self.guid_map.get_or_create_guids.assert_called_once()
+        self.assertEqual(rels['children'][0].uid, 'c1')
+        self.assertEqual(rels['parent'][0].state_model_name, 'FluxReactor')
+
+
+class TestNeofluxWriteTransaction(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.store, self.graph, influx = mock_store()
+        self.transaction = self.graph.begin.return_value
+        self.write_api = influx.write_api.return_value
+        self.delete_api = influx.delete_api.return_value
+
+        # Order of the calls to Neo4j and Influx
+        self.calls = []
+        self.graph.commit.side_effect = lambda tx: self.calls.append('commit')
+        self.graph.rollback.side_effect = (
+            lambda tx: self.calls.append('rollback')
+        )
+
+        def write(bucket, org, points):
+            self.calls.append(('write', points))
+            return MagicMock()
+
+        self.write_api.write.side_effect = write
+        self.delete_api.delete.side_effect = (
+            lambda predicate, **kwargs: self.calls.append(
+                ('delete', predicate)
+            )
+        )
+
+    def test_influx_ops_after_commit(self):
+        with self.store.write_transaction():
+            self.store.run('RETURN 1')
+            self.store.write_points(['p1'])
+            self.store.write_points(['p2'])
+            self.store.delete_points(model_type=FluxReactor, uid='r1')
+            self.store.write_points(['p3'])
+            # Nested blocks join the outer transaction
+            with self.store.write_transaction():
+                self.store.run('RETURN 2')
+            self.assertEqual(self.calls, [])
+
+        self.graph.begin.assert_called_once()
+        self.assertEqual(
+            [c.args[0] for c in self.transaction.run.call_args_list],
+            ['RETURN 1', 'RETURN 2']
+        )
+        self.graph.run.assert_not_called()
+        self.assertEqual(
+            self.calls,
+            [
+                'commit',
+                ('write', ['p1', 'p2']),
+                ('delete', '_measurement="FluxReactor" AND _uid="r1"'),
+                ('write', ['p3'])
+            ]
+        )
+        self.assertIsNone(self.store.transaction)
+
+    def test_rollback(self):
+        with self.assertRaises(RuntimeError):
+            with self.store.write_transaction():
+                self.store.write_points(['p1'])
+                self.store.delete_points(model_type=FluxReactor, uid='r1')
+                raise RuntimeError('fail')
+
+        self.assertEqual(self.calls, ['rollback'])
+        self.graph.commit.assert_not_called()
+        self.assertIsNone(self.store.transaction)
+
+    def test_without_transaction(self):
+        self.store.run('RETURN 1')
+        self.store.write_points(['p1'])
+
+        self.graph.run.assert_called_once_with('RETURN 1')
+        self.graph.begin.assert_not_called()
+        self.assertEqual(self.calls, [('write', ['p1'])])
+
+    def test_related_writes_in_transaction_thread(self):
+        with self.store.write_transaction():
+            threads = self.store._map_related(
+                lambda item: threading.current_thread(),
+                range(4),
+                message='fail'
+            )
+
+        self.assertEqual(set(threads), {threading.current_thread()})
+
+    async def test_failed_put_rolls_back(self):
+        self.store.relationship_concurrency = 1
+
+        def run(query, **parameters):
+            if 'MERGE (a)-[r:' in query:
+                raise RuntimeError('fail')
+            return MagicMock()
+
+        self.transaction.run.side_effect = run
+
+        with self.assertRaises(RuntimeError):
+            await self.store.put(ref(FluxReactor(
+                name='reactor',
+                temperature=Dynamic[float].from_columns(
+                    timestamps=[0], values=[30.0]
+                ),
+                children=[ref(FluxChild(name='child'))]
+            )))
+
+        # Nodes were created in the transaction, but nothing was committed
+        # or written to Influx
+        self.assertTrue(any(
+            'CREATE (n:' in c.args[0]
+            for c in self.transaction.run.call_args_list
+        ))
+        self.assertEqual(self.calls, ['rollback'])
+
+    async def test_bulk_writes_dispatch_to_overrides(self):
+        calls = []
+
+        @to_thread
+        def put(store, ref):
+            calls.append(('put', ref.state.name, store.transaction))
+            return ref
+
+        @to_thread
+        def patch_(store, ref):
+            calls.append(('patch', ref.state.name, store.transaction))
+            return ref
+
+        with (
+            patch.object(NeofluxStore, 'put', put),
+            patch.object(NeofluxStore, 'patch', patch_)
+        ):
+            await self.store.bulk_put([
+                ref(FluxReactor(
+                    name='reactor', children=[ref(FluxChild(name='child'))]
+                ))
+            ])
+            await self.store.bulk_patch([
+                ref(FluxReactor(name='reactor'), uid='r1')
+            ])
+
+        self.assertEqual(
+            calls,
+            [
+                ('put', 'reactor', self.transaction),
+                ('patch', 'reactor', self.transaction)
+            ]
+        )
@@ -0,0 +1,337 @@
+import asyncio
+import unittest
+
+from datetime import datetime, timezone
+from typing import Optional
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+import pytest
+
+from constelite.models import (
+    StateModel, Dynamic, Association, backref, Ref
+)
+from constelite.store import DynamicQuery
+
+pytest.importorskip('neo4j')
+pytest.importorskip('aiohttp')
+
+from neo4j import Record  # noqa: E402
+from influxdb_client.client.flux_table import FluxRecord  # noqa: E402
+
+from constelite.store.cypher import UID_FIELD  # noqa: E402
+from constelite.store.neoflux import NeoConfig, InfluxConfig  # noqa: E402
+from constelite.store.neoflux_async import AsyncNeofluxStore  # noqa: E402
+from constelite.guid_map import AsyncNeoDriverGUIDMap  # noqa: E402
+
+
+class NeoSample(StateModel):
+    name: Optional[str]
+    reactor: backref(model="NeoReactor", from_field="samples")
+
+
+class NeoReactor(StateModel):
+    name: Optional[str]
+    volume: Optional[float]
+    samples: Optional[Association[NeoSample]]
+    temperature: Optional[Dynamic[float]]
+    stirring: Optional[Dynamic[float]]
+
+
+NeoSample.update_forward_refs(NeoReactor=NeoReactor)
+
+
+def flux_record(uid: str, field: str, timestamp: int, value: float):
+    return FluxRecord(table=0, values={
+        '_time': datetime.fromtimestamp(timestamp, tz=timezone.utc),
+        '_field': field,
+        '_value': value,
+        UID_FIELD: uid
+    })
+
+
+def rel(field: str, uid: str, model_name: str):
+    return {'field': field, 'uid': uid, 'model_name': model_name}
+
+
+async def stream(records):
+    for record in records:
+        yield record
+
+
+class TestAsyncNeofluxStore(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        with patch(
+            'constelite.store.neoflux_async.AsyncGraphDatabase'
+        ) as graph_database:
+            self.store = AsyncNeofluxStore(
+                uid=uuid4(),
+                name="Neoflux",
+                neo_config=NeoConfig(
+                    url="neo4j://localhost",
+                    auth=("neo4j", "password"),
+                    bootstrap_schema=False
+                ),
+                influx_config=InfluxConfig(
+                    url="http://localhost:8086",
+                    token="token",
+                    org="org",
+                    bucket="bucket"
+                )
+            )
+        self.driver = graph_database.driver.return_value
+        self.influx = MagicMock()
+        self.store._influx = self.influx
+
+        self.flux_queries = []
+        self.flux_records = []
+
+        async def query_stream(query, org):
+            self.flux_queries.append(query)
+            return stream(self.flux_records)
+
+        self.influx.query_api.return_value.query_stream = AsyncMock(
+            side_effect=query_stream
+        )
+
+    def set_rows(self, rows):
+        self.driver.execute_query = AsyncMock(
+            return_value=([Record(row.items()) for row in rows], None, None)
+        )
+
+    async def test_get_states_by_uids(self):
+        self.set_rows([
+            {
+                'uid': 'r1',
+                'data': {UID_FIELD: 'r1', 'name': 'reactor 1', 'volume': 2.5},
+                'outgoing': [
+                    rel('samples', 's1', 'NeoSample'),
+                    rel('samples', 's2', 'NeoSample')
+                ],
+                'incoming': []
+            },
+            {
+                'uid': 'r2',
+                'data': {UID_FIELD: 'r2', 'name': 'reactor 2'},
+                'outgoing': [],
+                'incoming': []
+            }
+        ])
+        self.flux_records = [
+            flux_record('r1', 'temperature', 0, 30.0),
+            flux_record('r1', 'temperature', 60, 31.0),
+            flux_record('r2', 'stirring', 0, 200.0)
+        ]
+
+        states = await self.store.get_states_by_uids(
+            uids=['r1', 'r2', 'missing'],
+            model_type=NeoReactor
+        )
+
+        self.assertEqual(set(states), {'r1', 'r2'})
+
+        reactor = states['r1']
+        self.assertIsInstance(reactor, NeoReactor)
+        self.assertEqual(reactor.name, 'reactor 1')
+        self.assertEqual(reactor.volume, 2.5)
+        self.assertEqual([r.uid for r in reactor.samples], ['s1', 's2'])
+        self.assertIsInstance(reactor.samples[0], Ref)
+        self.assertEqual(reactor.samples[0].state_model_name, 'NeoSample')
+        self.assertEqual(
+            reactor.samples[0].record.store.uid, self.store.uid
+        )
+        self.assertEqual(list(reactor.temperature.timestamps), [0, 60])
+        self.assertEqual(list(reactor.temperature.values), [30.0, 31.0])
+        self.assertIsNone(reactor.stirring)
+
+        self.assertIsNone(states['r2'].samples)
+        self.assertIsNone(states['r2'].temperature)
+        self.assertEqual(list(states['r2'].stirring.values), [200.0])
+
+        # One Cypher query for all records
+        self.driver.execute_query.assert_awaited_once()
+        self.assertEqual(
+            self.driver.execute_query.await_args.kwargs['parameters_'],
+            {'uids': ['r1', 'r2', 'missing'], 'rel_fields': None}
+        )
+        # One Flux query for all dynamic fields without a dynamic query
+        self.assertEqual(len(self.flux_queries), 1)
+
+    async def test_get_states_by_uids_incoming(self):
+        self.set_rows([
+            {
+                'uid': 's1',
+                'data': {UID_FIELD: 's1', 'name': 'sample'},
+                'outgoing': [],
+                'incoming': [
+                    rel('reactor', 'r1', 'NeoReactor')
+                ]
+            }
+        ])
+
+        states = await self.store.get_states_by_uids(
+            uids=['s1'],
+            model_type=NeoSample
+        )
+
+        self.assertEqual(states['s1'].name, 'sample')
+        self.assertEqual([r.uid for r in states['s1'].reactor], ['r1'])
+        self.assertEqual(
+            states['s1'].reactor[0].state_model_name, 'NeoReactor'
+        )
+        # No dynamic fields, so no Flux query
+        self.assertEqual(self.flux_queries, [])
+
+    async def test_get_states_by_uids_dynamic_queries(self):
+        self.set_rows([
+            {
+                'uid': 'r1',
+                'data': {UID_FIELD: 'r1'},
+                'outgoing': [],
+                'incoming': []
+            }
+        ])
+
+        await self.store.get_states_by_uids(
+            uids=['r1'],
+            model_type=NeoReactor,
+            dynamic_queries={'temperature': DynamicQuery(last=1)}
+        )
+
+        # Fields with different dynamic queries are fetched separately
+        self.assertEqual(len(self.flux_queries), 2)
+        self.assertIn('|>tail(n: 1)', self.flux_queries[0])
+        self.assertIn('"temperature"', self.flux_queries[0])
+        self.assertNotIn('"stirring"', self.flux_queries[0])
+        self.assertIn('"stirring"', self.flux_queries[1])
+        self.assertNotIn('|>tail', self.flux_queries[1])
+
+    async def test_get_state_by_uid_missing(self):
+        self.set_rows([])
+
+        with self.assertRaises(KeyError):
+            await self.store.get_state_by_uid(
+                uid='r1', model_type=NeoReactor
+            )
+
+    async def test_query_dynamic_records(self):
+        self.flux_records = [
+            flux_record('r1', 'temperature', 0, 30.0),
+            flux_record('r2', 'temperature', 0, 20.0),
+            flux_record('r1', 'stirring', 0, 200.0),
+            flux_record('r1', 'temperature', 60, 31.0)
+        ]
+
+        records = await self.store.query_dynamic_records(
+            uids=['r1', 'r2'],
+            model_type=NeoReactor,
+            field_names=['temperature', 'stirring']
+        )
+
+        self.assertEqual(
+            set(records),
+            {('r1', 'temperature'), ('r2', 'temperature'), ('r1', 'stirring')}
+        )
+        self.assertEqual(
+            [r.get_value() for r in records[('r1', 'temperature')]],
+            [30.0, 31.0]
+        )
+        self.assertEqual(len(self.flux_queries), 1)
+        self.assertIn('from(bucket: "bucket")', self.flux_queries[0])
+
+    async def test_query_dynamic_records_empty(self):
+        self.assertEqual(
+            await self.store.query_dynamic_records(
+                uids=[],
+                model_type=NeoReactor,
+                field_names=['temperature']
+            ),
+            {}
+        )
+        self.assertEqual(
+            await self.store.query_dynamic_records(
+                uids=['r1'],
+                model_type=NeoReactor,
+                field_names=[]
+            ),
+            {}
+        )
+        self.assertEqual(self.flux_queries, [])
+
+
+class TestAsyncSchemaBootstrap(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        config = NeoConfig(
+            url="neo4j://localhost",
+            auth=("neo4j", "password")
+        )
+        with patch(
+            'constelite.store.neoflux_async.AsyncGraphDatabase'
+        ), patch(
+            'constelite.guid_map.async_neo4j_driver.AsyncGraphDatabase'
+        ):
+            self.store = AsyncNeofluxStore(
+                uid=uuid4(),
+                name="Neoflux",
+                neo_config=config,
+                influx_config=InfluxConfig(
+                    url="http://localhost:8086",
+                    token="token",
+                    org="org",
+                    bucket="bucket"
+                )
+            )
+            self.guid_map = AsyncNeoDriverGUIDMap(config=config)
+
+        for client in (self.store, self.guid_map):
+            client.driver.execute_query = AsyncMock(
+                return_value=([], None, None)
+            )
+
+    async def assert_bootstrapped_once(self, client, module: str):
+        async def bootstrap(driver):
+            await asyncio.sleep(0.01)
+
+        with patch(
+            f'{module}.async_bootstrap_schema',
+            AsyncMock(side_effect=bootstrap)
+        ) as bootstrap_schema:
+            await asyncio.gather(*(client.run('RETURN 1') for _ in range(3)))
+            await client.run('RETURN 1')
+
+        bootstrap_schema.assert_awaited_once_with(client.driver)
+        self.assertEqual(client.driver.execute_query.await_count, 4)
+
+    async def assert_retried(self, client, module: str):
+        with patch(
+            f'{module}.async_bootstrap_schema',
+            AsyncMock(side_effect=[RuntimeError('fail'), None])
+        ) as bootstrap_schema:
+            with self.assertRaises(RuntimeError):
+                await client.run('RETURN 1')
+            client.driver.execute_query.assert_not_awaited()
+
+            await client.run('RETURN 1')
+
+        self.assertEqual(bootstrap_schema.await_count, 2)
+        client.driver.execute_query.assert_awaited_once()
+
+    async def test_store_bootstrap_once(self):
+        await self.assert_bootstrapped_once(
+            self.store, 'constelite.store.neoflux_async'
+        )
+
+    async def test_store_bootstrap_retried(self):
+        await self.assert_retried(
+            self.store, 'constelite.store.neoflux_async'
+        )
+
+    async def test_guid_map_bootstrap_once(self):
+        await self.assert_bootstrapped_once(
+            self.guid_map, 'constelite.guid_map.async_neo4j_driver'
+        )
+
+    async def test_guid_map_bootstrap_retried(self):
+        await self.assert_retried(
+            self.guid_map, 'constelite.guid_map.async_neo4j_driver'
+        )
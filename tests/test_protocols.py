@@ -1,6 +1,15 @@
+import asyncio
+import shutil
+import tempfile
+from uuid import uuid4
+
 import pytest
 
+from pydantic.v1 import Field
+
 from constelite.api import ConsteliteAPI
+from constelite.models import StateModel, Ref, ref
+from constelite.store import MemoryStore, PickleStore
 
 from constelite.protocol import protocol, Protocol
 from constelite.loggers import Logger
@@ -48,4 +57,183 @@ async def test_class_protocol(api, logger):
 @pytest.mark.asyncio
 async def test_exception_protocol(api, logger):
     with pytest.raises(RuntimeError):
-        await api.run_protocol(slug="exception_class_protocol", logger=logger, a=10)
\ No newline at end of file
+        await api.run_protocol(slug="exception_class_protocol", logger=logger, a=10)
+
+class CountingMemoryStore(MemoryStore):
+    loads: int = Field(default=0, exclude=True)
+
+    async def get_states_by_uids(self, uids, model_type, **kwargs):
+        self.loads += 1
+        return await super().get_states_by_uids(uids, model_type, **kwargs)
+
+
+class Cat(StateModel):
+    name: str
+
+
+class LoadTwiceProtocol(Protocol):
+    use_unit_of_work = True
+
+    cat: Ref[Cat]
+
+    async def run(self, api: ConsteliteAPI, logger: Logger) -> str:
+        states = await asyncio.gather(
+            api.get_state(self.cat.copy_ref(), refresh=False),
+            api.get_state(self.cat.copy_ref(), refresh=False)
+        )
+        state = await api.get_state(self.cat.copy_ref(), refresh=False)
+        assert states[0] is states[1] is state
+        return state.name
+
+
+class LoadDefaultProtocol(Protocol):
+    use_unit_of_work = True
+
+    cat: Ref[Cat]
+
+    async def run(self, api: ConsteliteAPI, logger: Logger) -> str:
+        first = await api.get_state(self.cat.copy_ref())
+        second = await api.get_state(self.cat.copy_ref())
+        assert first is second
+        return second.name
+
+
+class WriteThenReadProtocol(Protocol):
+    use_unit_of_work = True
+
+    cat: Ref[Cat]
+
+    async def run(self, api: ConsteliteAPI, logger: Logger) -> str:
+        async def read(refresh: bool = False) -> str:
+            state = await api.get_state(self.cat.copy_ref(), refresh=refresh)
+            return state.name
+
+        store = api.get_store(self.cat.record.store.uid)
+        names = [await read()]
+
+        await store.patch(ref(
+            Cat(name="new"), uid=self.cat.uid, store=self.cat.record.store
+        ))
+        names.append(await read())
+
+        await api.stores[0].patch(ref(
+            Cat(name="newer"), uid=self.cat.uid, store=self.cat.record.store
+        ))
+        names.append(await read())
+        names.append(await read(refresh=True))
+        return " -> ".join(names)
+
+
+class QueuedWriteProtocol(Protocol):
+    use_unit_of_work = True
+
+    name: str
+
+    async def run(self, api: ConsteliteAPI, logger: Logger) -> Ref[Cat]:
+        r_cat = ref(Cat(name=self.name))
+        api.unit_of_work.put(r_cat, store_uid=api.stores[0].uid)
+        return r_cat
+
+
+@pytest.fixture
+def store_api():
+    api = ConsteliteAPI(
+        name="Test API",
+        stores=[CountingMemoryStore(uid=uuid4(), name="Memory store")]
+    )
+    api.add_protocol(LoadTwiceProtocol, "load_twice_protocol")
+    api.add_protocol(LoadDefaultProtocol, "load_default_protocol")
+    api.add_protocol(QueuedWriteProtocol, "queued_write_protocol")
+    return api
+
+
+@pytest.mark.asyncio
+async def test_unit_of_work_loads_once(store_api, logger):
+    store = store_api.stores[0]
+    r_cat = await store.put(ref(Cat(name="Snowball")))
+
+    ret = await store_api.run_protocol(
+        slug="load_twice_protocol", logger=logger, cat=r_cat
+    )
+
+    assert ret == "Snowball"
+    assert store.loads == 1
+
+
+@pytest.mark.asyncio
+async def test_unit_of_work_loads_once_by_default(store_api, logger):
+    store = store_api.stores[0]
+    r_cat = await store.put(ref(Cat(name="Snowball")))
+
+    ret = await store_api.run_protocol(
+        slug="load_default_protocol", logger=logger, cat=r_cat
+    )
+
+    assert ret == "Snowball"
+    assert store.loads == 1
+
+    # Outside of a unit of work, states are loaded every time
+    await store_api.get_state(r_cat)
+    await store_api.get_state(r_cat)
+    assert store.loads == 3
+
+
+@pytest.mark.asyncio
+async def test_unit_of_work_flushes_writes(store_api, logger):
+    r_cat = await store_api.run_protocol(
+        slug="queued_write_protocol", logger=logger, name="Snowball II"
+    )
+
+    assert r_cat.record is not None
+    assert store_api.unit_of_work is None
+
+    r_cat = await store_api.stores[0].get(r_cat)
+    assert r_cat.state.name == "Snowball II"
+
+
+@pytest.mark.asyncio
+async def test_unit_of_work_is_opt_in(store_api, logger):
+    @protocol(name="Store protocol")
+    async def store_protocol(api: ConsteliteAPI, logger: Logger) -> bool:
+        store = api.get_store(api.stores[0].uid)
+        return api.unit_of_work is None and store is api.stores[0]
+
+    store_api.add_protocol(store_protocol, "store_protocol")
+
+    assert await store_api.run_protocol(slug="store_protocol", logger=logger)
+
+
+@pytest.mark.asyncio
+async def test_unit_of_work_write_then_refresh(logger):
+    path = tempfile.mkdtemp()
+    try:
+        api = ConsteliteAPI(
+            name="Test API",
+            stores=[PickleStore(uid=uuid4(), name="Pickle store", path=path)]
+        )
+        api.add_protocol(WriteThenReadProtocol, "write_then_read_protocol")
+        r_cat = await api.stores[0].put(ref(Cat(name="old")))
+
+        names = await api.run_protocol(
+            slug="write_then_read_protocol", logger=logger, cat=r_cat
+        )
+    finally:
+        shutil.rmtree(path)
+
+    # Writes through `api.get_store` clear the identity map, writes through
+    # other store objects are seen with `refresh=True` only
+    assert names == "old -> new -> new -> newer"
+
+
+def test_registries(store_api):
+    store = store_api.stores[0]
+    store_api.add_protocol(ClassProtocol, "class_protocol")
+
+    assert store_api.get_store(store.uid) is store
+    assert store_api.get_protocol("class_protocol").path == "class_protocol"
+    assert store_api.get_protocol("unknown") is None
+    with pytest.raises(ValueError):
+        store_api.get_store(uuid4())
+
+    store_api.add_protocol(ClassProtocol, "class_protocol_copy")
+    assert len(store_api.protocols) == 4
@@ -1,8 +1,17 @@
+import asyncio
+import json
+import os
+import shutil
 import unittest
+import tempfile
+
+from importlib.util import find_spec
 
 from uuid import uuid4
+from datetime import datetime, timedelta, timezone
 
 from typing import Optional, ForwardRef, List, Type
+from unittest.mock import patch
 
 import pandera as pa
 
@@ -14,10 +23,25 @@ from constelite.models import (
 )
 from constelite.store import (
     MemoryStore,
+    PickleStore,
+    SegmentStore,
     PropertyQuery,
-    BaseStore
+    DynamicQuery,
+    Projection,
+    BaseStore,
+    CachedStore,
+    MemcachedStore
+)
+from constelite.executor import BoundedExecutor, ExecutorConfig
+from constelite.guid_map.memory import MemoryGUID
+from constelite.api.starlite.api import StarliteAPI
+from constelite.api.starlite.client import resolve_return_value
+from constelite.api.starlite.controllers.models import (
+    BulkPutRequest, BulkGetRequest
 )
 
+from litestar.testing import TestClient
+
 
 class AbsorbanceSchema(TensorSchema):
     pa_schema = pa.SeriesSchema(
@@ -748,9 +772,991 @@ class StoreTestMixIn():
         except NotImplementedError:
             pass
 
+    async def test_get_dynamic_query(self):
+        value = Dynamic[int](
+            points=[
+                TimePoint(timestamp=t, value=t)
+                for t in range(0, 7200, 600)
+            ]
+        )
+        r_foo = await self.store.put(ref=ref(Foo(dynamic_int=value)))
+
+        r_foo = await self.store.get(
+            ref=r_foo,
+            dynamic_queries={
+                'dynamic_int': DynamicQuery(
+                    start=datetime.fromtimestamp(1200, timezone.utc),
+                    every=timedelta(hours=1),
+                    last=1
+                )
+            }
+        )
+
+        self.assertEqual(
+            r_foo.state.dynamic_int,
+            Dynamic[int](points=[TimePoint(timestamp=3600, value=5100)])
+        )
+
+    async def test_get_dynamic_query_tensor(self):
+        value = Dynamic[Tensor[AbsorbanceSchema]](
+            points=[
+                TimePoint(
+                    timestamp=t,
+                    value=Tensor[AbsorbanceSchema](
+                        data=[1.0 * t, 2.0 * t],
+                        index=[[220, 230]]
+                    )
+                )
+                for t in (0, 10, 20)
+            ]
+        )
+        r_foo = await self.store.put(ref=ref(Foo(dynamic_tensor=value)))
+
+        r_foo = await self.store.get(
+            ref=r_foo,
+            dynamic_queries={
+                'dynamic_tensor': DynamicQuery(
+                    stop=datetime.fromtimestamp(20, timezone.utc),
+                    every=timedelta(minutes=1)
+                )
+            }
+        )
+
+        self.assertEqual(
+            r_foo.state.dynamic_tensor,
+            Dynamic[Tensor[AbsorbanceSchema]](
+                points=[
+                    TimePoint(
+                        timestamp=0,
+                        value=Tensor[AbsorbanceSchema](
+                            data=[5.0, 10.0],
+                            index=[[220, 230]]
+                        )
+                    )
+                ]
+            )
+        )
+
+    async def test_get_projection(self):
+        r_bar = await self.store.put(ref=ref(Bar(name='bar')))
+        r_foo = await self.store.put(
+            ref=ref(
+                Foo(
+                    int_field=1,
+                    str_field='foo',
+                    dynamic_int=Dynamic[int](
+                        points=[TimePoint(timestamp=0, value=1)]
+                    ),
+                    association=[r_bar]
+                )
+            )
+        )
+
+        r_foo = await self.store.get(
+            ref=r_foo,
+            projection=Projection(include=['int_field', 'association'])
+        )
+
+        self.assertEqual(r_foo.state.int_field, 1)
+        self.assertEqual(len(r_foo.state.association), 1)
+        self.assertIsNone(r_foo.state.str_field)
+        self.assertIsNone(r_foo.state.dynamic_int)
+        self.assertNotIn('str_field', r_foo.state.__fields_set__)
+
+    async def test_bulk_get_projection(self):
+        r_bar = await self.store.put(ref=ref(Bar(name='bar')))
+        r_foo = await self.store.put(
+            ref=ref(
+                Foo(
+                    int_field=1,
+                    dynamic_int=Dynamic[int](
+                        points=[TimePoint(timestamp=0, value=1)]
+                    ),
+                    association=[r_bar]
+                )
+            )
+        )
+
+        r_foo, r_bar = await self.store.bulk_get(
+            [r_foo, r_bar],
+            projection=Projection(
+                exclude=['str_field'],
+                include_dynamic=False,
+                include_relationships=False
+            )
+        )
+
+        self.assertEqual(r_foo.state.int_field, 1)
+        self.assertIsNone(r_foo.state.dynamic_int)
+        self.assertIsNone(r_foo.state.association)
+        self.assertEqual(r_bar.state.name, 'bar')
+
+    async def test_bulk_get_missing(self):
+        ref1 = await self.store.put(ref=ref(Qux(name="Qux1")))
+        await self.store.delete(ref1)
+
+        with self.assertRaises(KeyError):
+            await self.store.bulk_get([ref1])
+
+    async def test_bulk_put(self):
+        r_bar = await self.store.put(ref=ref(Bar(name='bar')))
+
+        r_foo, r_bar, r_qux = await self.store.bulk_put([
+            ref(Foo(int_field=1, association=[r_bar])),
+            ref(Bar(name='barbar')),
+            ref(Qux(name='Qux1'))
+        ])
+
+        r_foo, r_bar, r_qux = await self.store.bulk_get(
+            [r_foo, r_bar, r_qux]
+        )
+
+        self.assertEqual(r_foo.state.int_field, 1)
+        self.assertEqual(len(r_foo.state.association), 1)
+        self.assertEqual(r_bar.state.name, 'barbar')
+        self.assertEqual(r_qux.state.name, 'Qux1')
+
+        await self.store.bulk_delete([r_foo, r_bar, r_qux])
+
+    async def test_bulk_delete(self):
+        r_bar = await self.store.put(ref=ref(Bar(name='bar')))
+        r_foo, r_qux = await self.store.bulk_put([
+            ref(Foo(composition=[r_bar])),
+            ref(Qux(name='Qux1'))
+        ])
+
+        await self.store.bulk_delete([r_foo, r_qux])
+
+        for r, model_type in ((r_foo, Foo), (r_bar, Bar), (r_qux, Qux)):
+            self.assertFalse(
+                await self.uid_exists(uid=r.uid, model_type=model_type)
+            )
+
 
 class TestMemoryStore(unittest.IsolatedAsyncioTestCase, StoreTestMixIn):
     store = MemoryStore(
         uid=uuid4(),
         name="MemoryStore",
     )
+
+
+class TestPickleStore(unittest.IsolatedAsyncioTestCase, StoreTestMixIn):
+    @classmethod
+    def setUpClass(cls):
+        cls.path = tempfile.mkdtemp()
+        cls.store = PickleStore(
+            uid=uuid4(),
+            name="PickleStore",
+            path=cls.path
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.path)
+
+
+class TestSegmentStore(unittest.IsolatedAsyncioTestCase, StoreTestMixIn):
+    @classmethod
+    def setUpClass(cls):
+        cls.path = tempfile.mkdtemp()
+        cls.store = SegmentStore(
+            uid=uuid4(),
+            name="SegmentStore",
+            path=cls.path
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.store.close()
+        shutil.rmtree(cls.path)
+
+
+@unittest.skipUnless(find_spec('orjson'), "orjson is not installed")
+class TestPickleStoreOrjson(unittest.IsolatedAsyncioTestCase, StoreTestMixIn):
+    @classmethod
+    def setUpClass(cls):
+        cls.path = tempfile.mkdtemp()
+        cls.store = PickleStore(
+            uid=uuid4(),
+            name="PickleStore",
+            path=cls.path,
+            codec='orjson'
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.path)
+
+
+@unittest.skipUnless(find_spec('orjson'), "orjson is not installed")
+class TestSegmentStoreOrjson(
+        unittest.IsolatedAsyncioTestCase, StoreTestMixIn):
+    @classmethod
+    def setUpClass(cls):
+        cls.path = tempfile.mkdtemp()
+        cls.store = SegmentStore(
+            uid=uuid4(),
+            name="SegmentStore",
+            path=cls.path,
+            codec='orjson'
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.store.close()
+        shutil.rmtree(cls.path)
+
+
+class TestCachedMemoryStore(unittest.IsolatedAsyncioTestCase, StoreTestMixIn):
+    store = CachedStore(
+        MemoryStore(
+            uid=uuid4(),
+            name="MemoryStore",
+        )
+    )
+
+
+class TestCachedPickleStore(unittest.IsolatedAsyncioTestCase, StoreTestMixIn):
+    @classmethod
+    def setUpClass(cls):
+        cls.path = tempfile.mkdtemp()
+        cls.store = CachedStore(
+            PickleStore(
+                uid=uuid4(),
+                name="PickleStore",
+                path=cls.path
+            )
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.path)
+
+
+class TestCachedStore(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.store = CachedStore(
+            PickleStore(
+                uid=uuid4(),
+                name="PickleStore",
+                path=self.path
+            )
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    async def test_hit(self):
+        r_bar = await self.store.put(ref=ref(Bar(name='bar')))
+
+        await self.store.get(ref=r_bar)
+        r_bar = await self.store.get(ref=r_bar)
+        r_bar.state.name = 'changed'
+
+        self.assertEqual((await self.store.get(ref=r_bar)).state.name, 'bar')
+        self.assertEqual(self.store.metrics.hits, 2)
+        self.assertEqual(self.store.metrics.misses, 1)
+
+    async def test_bulk_get_fetches_missing(self):
+        r_bar1, r_bar2 = await self.store.bulk_put(
+            [ref(Bar(name='bar1')), ref(Bar(name='bar2'))]
+        )
+        await self.store.get(ref=r_bar1)
+
+        r_bar1, r_bar2 = await self.store.bulk_get([r_bar1, r_bar2])
+
+        self.assertEqual(r_bar1.state.name, 'bar1')
+        self.assertEqual(r_bar2.state.name, 'bar2')
+        self.assertEqual(self.store.metrics.hits, 1)
+        self.assertEqual(self.store.metrics.entries, 2)
+
+    async def test_patch_invalidates(self):
+        r_bar = await self.store.put(ref=ref(Bar(name='bar')))
+        await self.store.get(ref=r_bar)
+
+        r_bar.state = Bar(name='barbar')
+        await self.store.patch(ref=r_bar)
+
+        self.assertEqual(
+            (await self.store.get(ref=r_bar)).state.name, 'barbar'
+        )
+
+    async def test_put_invalidates_backrefs(self):
+        r_baz = await self.store.put(ref=ref(Baz(name='baz')))
+        await self.store.get(ref=r_baz)
+
+        await self.store.put(ref=ref(Foo(baz=[r_baz])))
+
+        r_baz = await self.store.get(ref=r_baz)
+        self.assertEqual(len(r_baz.state.foo), 1)
+
+    async def test_delete_invalidates(self):
+        r_bar = await self.store.put(ref=ref(Bar(name='bar')))
+        await self.store.get(ref=r_bar)
+
+        await self.store.delete(ref=r_bar)
+
+        with self.assertRaises(KeyError):
+            await self.store.get(ref=r_bar)
+
+    async def test_ttl(self):
+        self.store.ttl = 0
+        r_bar = await self.store.put(ref=ref(Bar(name='bar')))
+
+        await self.store.get(ref=r_bar)
+        await self.store.get(ref=r_bar)
+
+        self.assertEqual(self.store.metrics.hits, 0)
+        self.assertEqual(self.store.metrics.expirations, 1)
+
+    async def test_size_limit(self):
+        r_bars = await self.store.bulk_put(
+            [ref(Bar(name=f'bar{idx}')) for idx in range(3)]
+        )
+        await self.store.get(ref=r_bars[0])
+        self.store.max_size = self.store.metrics.size * 2
+
+        for r_bar in r_bars:
+            await self.store.get(ref=r_bar)
+
+        self.assertEqual(self.store.metrics.entries, 2)
+        self.assertEqual(self.store.metrics.evictions, 1)
+
+
+class TestCachedStoreGUID(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.store = CachedStore(MemoryStore(uid=uuid4(), name="MemoryStore"))
+        self.store.set_guid_map(MemoryGUID())
+
+    def no_guid_map_calls(self):
+        """Makes every guid map lookup fail."""
+        patchers = [
+            patch.object(
+                MemoryGUID, name, side_effect=AssertionError(name)
+            )
+            for name in (
+                'get_guid', 'get_guids', 'get_uid', 'get_uids',
+                'get_or_create_guids', 'create_guid', 'link_uid'
+            )
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def test_hits_without_guid_map_calls(self):
+        r_bars = await self.store.bulk_put(
+            [ref(Bar(name='bar1')), ref(Bar(name='bar2'))]
+        )
+        await self.store.bulk_get(r_bars)
+
+        self.no_guid_map_calls()
+
+        r_bar = await self.store.get(r_bars[0].copy_ref())
+        self.assertEqual(r_bar.state.name, 'bar1')
+        self.assertEqual(r_bar.guid, r_bars[0].guid)
+        self.assertEqual(r_bar.uid, r_bars[0].uid)
+
+        # By guid only
+        r_bar = await self.store.get(ref(Bar(name='bar2')).copy(update={
+            'state': None,
+            'guid': r_bars[1].guid
+        }))
+        self.assertEqual(r_bar.state.name, 'bar2')
+        self.assertEqual(r_bar.uid, r_bars[1].uid)
+
+        fetched = await self.store.bulk_get(
+            [r_bar.copy_ref() for r_bar in r_bars]
+        )
+        self.assertEqual(
+            [r_bar.guid for r_bar in fetched],
+            [r_bar.guid for r_bar in r_bars]
+        )
+        self.assertEqual(self.store.metrics.misses, 2)
+        self.assertEqual(self.store.metrics.hits, 4)
+
+
+class FanOutMemoryStore(MemoryStore):
+    """Memory store recording the number of concurrent record creations,
+    patches and deletions."""
+    running: int = 0
+    max_running: int = 0
+
+    async def track(self):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await asyncio.sleep(0.001)
+        self.running -= 1
+
+    async def create_model(self, model_type, static_props, dynamic_props):
+        name = static_props.get('name', None)
+        if name in ('fail1', 'fail2'):
+            # Fail in the reverse order of the refs
+            await asyncio.sleep(0.01 if name == 'fail1' else 0)
+            raise ValueError(name)
+
+        await self.track()
+        return await super().create_model(
+            model_type, static_props, dynamic_props
+        )
+
+    async def overwrite_static_props(self, uid, model_type, props):
+        await self.track()
+        return await super().overwrite_static_props(uid, model_type, props)
+
+    async def delete_model(self, model_type, uid):
+        await self.track()
+        return await super().delete_model(model_type, uid)
+
+
+class TestRelationshipFanOut(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.store = FanOutMemoryStore(
+            uid=uuid4(),
+            name="MemoryStore",
+            relationship_concurrency=3
+        )
+
+    async def test_bounded_concurrency(self):
+        r_foo = await self.store.put(
+            ref(Foo(composition=[
+                ref(Bar(name=f'bar{idx}')) for idx in range(20)
+            ]))
+        )
+
+        r_foo = await self.store.get(r_foo)
+
+        self.assertEqual(len(r_foo.state.composition), 20)
+        self.assertEqual(self.store.max_running, 3)
+
+    async def test_bounded_delete(self):
+        r_foo = await self.store.put(
+            ref(Foo(composition=[
+                ref(Bar(name=f'bar{idx}')) for idx in range(20)
+            ]))
+        )
+        r_foo = await self.store.get(r_foo)
+        self.store.max_running = 0
+
+        await self.store.delete(r_foo)
+
+        self.assertEqual(self.store.max_running, 3)
+        for r_bar in r_foo.state.composition:
+            self.assertFalse(await self.store.uid_exists(r_bar.uid, Bar))
+
+    async def test_bounded_bulk_writes(self):
+        store = FanOutMemoryStore(
+            uid=uuid4(),
+            name="MemoryStore",
+            relationship_concurrency=1,
+            bulk_concurrency=2
+        )
+
+        r_foos = await store.bulk_put([
+            ref(Foo(association=[ref(Bar(name=f'bar{idx}'))]))
+            for idx in range(10)
+        ])
+        self.assertEqual(store.max_running, 2)
+
+        store.max_running = 0
+        await store.bulk_patch([
+            r_foo.copy(update={'state': Foo(int_field=idx)})
+            for idx, r_foo in enumerate(r_foos)
+        ])
+        self.assertEqual(store.max_running, 2)
+
+        r_foos = await store.bulk_get(r_foos)
+        self.assertEqual(
+            [r_foo.state.int_field for r_foo in r_foos], list(range(10))
+        )
+
+    async def test_errors_in_ref_order(self):
+        with self.assertRaises(ExceptionGroup) as cm:
+            await self.store.put(
+                ref(Foo(composition=[
+                    ref(Bar(name='fail1')),
+                    ref(Bar(name='ok')),
+                    ref(Bar(name='fail2'))
+                ]))
+            )
+
+        # Unwrap the groups of the task groups writing the fields
+        errors = cm.exception
+        while isinstance(errors.exceptions[0], ExceptionGroup):
+            errors = errors.exceptions[0]
+
+        self.assertEqual(
+            [str(e) for e in errors.exceptions], ['fail1', 'fail2']
+        )
+
+
+class CountingPickleStore(PickleStore):
+    """Pickle store counting the reads and writes of every record."""
+    reads: dict = {}
+    writes: dict = {}
+    store_many_calls: int = 0
+
+    async def get_state_by_uid(self, uid, model_type):
+        self.reads[uid] = self.reads.get(uid, 0) + 1
+        return await super().get_state_by_uid(uid, model_type)
+
+    async def store(self, uid, model):
+        self.writes[uid] = self.writes.get(uid, 0) + 1
+        return await super().store(uid, model)
+
+    async def store_many(self, models):
+        self.store_many_calls += 1
+        return await super().store_many(models)
+
+
+class TestWriteBatch(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.store = CountingPickleStore(
+            uid=uuid4(),
+            name="PickleStore",
+            path=self.tmp_dir.name,
+            reads={},
+            writes={}
+        )
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    async def test_patch_loads_and_stores_once(self):
+        r_bazs = [
+            await self.store.put(ref(Baz(name=f'baz{idx}')))
+            for idx in range(20)
+        ]
+        r_foo = await self.store.put(ref(Foo(int_field=1)))
+
+        self.store.reads.clear()
+        self.store.writes.clear()
+        self.store.store_many_calls = 0
+
+        r_foo.state = Foo(int_field=2, baz=r_bazs)
+        await self.store.patch(r_foo)
+
+        self.assertEqual(self.store.store_many_calls, 1)
+        self.assertEqual(len(self.store.writes), 21)
+        self.assertTrue(
+            all(n == 1 for n in self.store.reads.values())
+        )
+        self.assertTrue(
+            all(n == 1 for n in self.store.writes.values())
+        )
+
+        r_foo = await self.store.get(r_foo)
+        self.assertEqual(r_foo.state.int_field, 2)
+        self.assertEqual(len(r_foo.state.baz), 20)
+
+        r_baz = await self.store.get(r_bazs[0])
+        self.assertEqual(r_baz.state.foo[0].uid, r_foo.uid)
+
+    async def test_nothing_stored_on_error(self):
+        r_foo = await self.store.put(ref(Foo(int_field=1)))
+
+        async def create_model(model_type, static_props, dynamic_props):
+            raise ValueError('fail')
+
+        # Fails writing the related record after the static props changed
+        object.__setattr__(self.store, 'create_model', create_model)
+        r_foo.state = Foo(int_field=2, association=[ref(Bar(name='bar'))])
+        with self.assertRaises(ExceptionGroup):
+            await self.store.patch(r_foo)
+
+        r_foo = await self.store.get(r_foo)
+        self.assertEqual(r_foo.state.int_field, 1)
+
+
+class TestMemoryStoreWriteBatch(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.store = MemoryStore(uid=uuid4(), name="MemoryStore")
+
+    async def test_patch_keeps_returned_states(self):
+        r_foo = await self.store.put(ref(Foo(int_field=1)))
+        state = (await self.store.get(r_foo)).state
+
+        r_foo.state = Foo(int_field=2)
+        await self.store.patch(r_foo)
+
+        self.assertEqual(state.int_field, 1)
+        r_foo = await self.store.get(r_foo)
+        self.assertEqual(r_foo.state.int_field, 2)
+
+    async def test_failed_patch_keeps_record(self):
+        r_foo = await self.store.put(ref(Foo(int_field=1)))
+
+        async def create_model(model_type, static_props, dynamic_props):
+            raise ValueError('fail')
+
+        object.__setattr__(self.store, 'create_model', create_model)
+        r_foo.state = Foo(int_field=2, association=[ref(Bar(name='bar'))])
+        with self.assertRaises(ExceptionGroup):
+            await self.store.patch(r_foo)
+
+        r_foo = await self.store.get(r_foo)
+        self.assertEqual(r_foo.state.int_field, 1)
+        self.assertIsNone(r_foo.state.association)
+
+
+class SlowReadPickleStore(PickleStore):
+    """Pickle store giving way to other tasks on every read."""
+    async def get_state_by_uid(self, uid, model_type):
+        state = await super().get_state_by_uid(uid, model_type)
+        await asyncio.sleep(0.001)
+        return state
+
+
+class TestPickleStoreFiles(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.store = SlowReadPickleStore(
+            uid=uuid4(),
+            name="PickleStore",
+            path=self.tmp_dir.name
+        )
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    async def test_sharded_layout(self):
+        r_bar = await self.store.put(ref(Bar(name='bar')))
+
+        shard_dir = os.path.join(self.tmp_dir.name, r_bar.uid[:2])
+        self.assertEqual(os.listdir(shard_dir), [r_bar.uid])
+
+    async def test_legacy_record(self):
+        r_bar = await self.store.put(ref(Bar(name='bar')))
+        os.replace(
+            self.store._file_path(r_bar.uid),
+            os.path.join(self.tmp_dir.name, r_bar.uid)
+        )
+
+        r_bar = await self.store.get(r_bar)
+        self.assertEqual(r_bar.state.name, 'bar')
+
+        r_bar.state = Bar(name='baz')
+        await self.store.put(r_bar)
+
+        self.assertFalse(
+            os.path.exists(os.path.join(self.tmp_dir.name, r_bar.uid))
+        )
+        r_bar = await self.store.get(r_bar)
+        self.assertEqual(r_bar.state.name, 'baz')
+
+    async def test_failed_write_keeps_record(self):
+        r_foo = await self.store.put(ref(Foo(int_field=1)))
+
+        with self.assertRaises(Exception):
+            await self.store.store(
+                uid=r_foo.uid,
+                model=Foo(int_field=2, list_field=[lambda: None])
+            )
+
+        r_foo = await self.store.get(r_foo)
+        self.assertEqual(r_foo.state.int_field, 1)
+        self.assertEqual(
+            os.listdir(os.path.dirname(self.store._file_path(r_foo.uid))),
+            [r_foo.uid]
+        )
+
+    async def test_concurrent_patches(self):
+        r_foo = await self.store.put(ref(Foo(dynamic_int=Dynamic[int](
+            points=[]
+        ))))
+
+        async def patch(timestamp):
+            return await self.store.patch(r_foo.copy(update={
+                'state': Foo(dynamic_int=Dynamic[int](points=[
+                    TimePoint(timestamp=timestamp, value=timestamp)
+                ]))
+            }))
+
+        await asyncio.gather(*(patch(t) for t in range(5)))
+
+        r_foo = await self.store.get(r_foo)
+        self.assertEqual(len(r_foo.state.dynamic_int.points), 5)
+
+    async def test_concurrent_backrefs(self):
+        r_baz = await self.store.put(ref(Baz(name='baz')))
+        r_baz.state = None
+
+        r_foos = await asyncio.gather(*(
+            self.store.put(ref(Foo(baz=[r_baz.copy()])))
+            for _ in range(5)
+        ))
+
+        r_baz = await self.store.get(r_baz)
+        self.assertEqual(
+            {r_foo.uid for r_foo in r_baz.state.foo},
+            {r_foo.uid for r_foo in r_foos}
+        )
+
+    async def test_delete_waits_for_lock(self):
+        r_bar = await self.store.put(ref(Bar(name='bar')))
+
+        async with self.store.lock_records([r_bar.uid]):
+            task = asyncio.create_task(self.store.delete(r_bar))
+            await asyncio.sleep(0.01)
+            self.assertFalse(task.done())
+            self.assertTrue(await self.store.uid_exists(r_bar.uid, Bar))
+
+        await task
+        self.assertFalse(await self.store.uid_exists(r_bar.uid, Bar))
+
+    async def test_fsync(self):
+        self.store.fsync = True
+        r_bar = await self.store.put(ref(Bar(name='bar')))
+        await self.store.delete(r_bar)
+
+        self.assertFalse(await self.store.uid_exists(r_bar.uid, Bar))
+
+
+class TestSegmentStoreFiles(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.store_uid = uuid4()
+        self.store = self.open_store()
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp_dir.cleanup()
+
+    def open_store(self):
+        return SegmentStore(
+            uid=self.store_uid,
+            name="SegmentStore",
+            path=self.tmp_dir.name,
+            segment_size=1024
+        )
+
+    def reopen(self):
+        self.store.close()
+        self.store = self.open_store()
+
+    async def test_rebuild_index(self):
+        r_bars = [
+            await self.store.put(ref(Bar(name=f'bar{idx}')))
+            for idx in range(50)
+        ]
+        r_bars[0].state = Bar(name='changed')
+        await self.store.put(r_bars[0])
+        await self.store.delete(r_bars[1])
+
+        self.reopen()
+
+        self.assertGreater(len(self.store._sizes), 1)
+        r_bar = await self.store.get(r_bars[0])
+        self.assertEqual(r_bar.state.name, 'changed')
+        self.assertFalse(await self.store.uid_exists(r_bars[1].uid, Bar))
+        r_bar = await self.store.get(r_bars[49])
+        self.assertEqual(r_bar.state.name, 'bar49')
+
+    async def test_partly_written_entry(self):
+        r_bar = await self.store.put(ref(Bar(name='bar')))
+        r_baz = await self.store.put(ref(Bar(name='baz')))
+
+        path = self.store._segment_path(self.store._active_id)
+        size = os.path.getsize(path)
+        self.store.close()
+        os.truncate(path, size - 3)
+
+        self.store = self.open_store()
+
+        self.assertTrue(await self.store.uid_exists(r_bar.uid, Bar))
+        self.assertFalse(await self.store.uid_exists(r_baz.uid, Bar))
+
+        r_baz = await self.store.put(ref(Bar(name='baz')))
+        self.reopen()
+        r_baz = await self.store.get(r_baz)
+        self.assertEqual(r_baz.state.name, 'baz')
+
+    async def test_compaction(self):
+        names = [f'bar{idx}' for idx in range(20)]
+        r_bars = [await self.store.put(ref(Bar(name=name))) for name in names]
+        for _ in range(10):
+            for idx, r_bar in enumerate(r_bars[:10]):
+                names[idx] += '!'
+                r_bar.state = Bar(name=names[idx])
+                await self.store.put(r_bar)
+        await self.store.delete(r_bars[10])
+        await self.store.compact()
+
+        for segment in self.store._sizes:
+            if segment != self.store._active_id:
+                self.assertLess(
+                    self.store._garbage[segment],
+                    0.5 * self.store._sizes[segment]
+                )
+
+        self.reopen()
+
+        self.assertFalse(await self.store.uid_exists(r_bars[10].uid, Bar))
+        for idx, r_bar in enumerate(r_bars):
+            if idx != 10:
+                r_bar = await self.store.get(r_bar)
+                self.assertEqual(r_bar.state.name, names[idx])
+
+
+class TestMemcachedStore(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        patcher = patch(
+            'constelite.store.memcached.PooledClient', autospec=True
+        )
+        self.pooled_client = patcher.start()
+        self.addCleanup(patcher.stop)
+
+        patcher = patch(
+            'constelite.store.memcached.HashClient', autospec=True
+        )
+        self.hash_client = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_pooled_client(self):
+        store = MemcachedStore(
+            uid=uuid4(),
+            name='Memcached',
+            host='localhost:11211',
+            max_pool_size=4
+        )
+
+        self.assertIs(store.client, self.pooled_client.return_value)
+        self.pooled_client.assert_called_once()
+        self.assertEqual(
+            self.pooled_client.call_args.args[0], 'localhost:11211'
+        )
+        self.assertEqual(
+            self.pooled_client.call_args.kwargs['max_pool_size'], 4
+        )
+        self.hash_client.assert_not_called()
+
+    def test_hash_client(self):
+        servers = ['cache1:11211', 'cache2:11211']
+        store = MemcachedStore(
+            uid=uuid4(),
+            name='Memcached',
+            servers=servers,
+            max_pool_size=4
+        )
+
+        self.assertIs(store.client, self.hash_client.return_value)
+        self.hash_client.assert_called_once()
+        self.assertEqual(self.hash_client.call_args.args[0], servers)
+        self.assertTrue(self.hash_client.call_args.kwargs['use_pooling'])
+        self.assertEqual(
+            self.hash_client.call_args.kwargs['max_pool_size'], 4
+        )
+        self.pooled_client.assert_not_called()
+
+    async def test_calls_in_executor(self):
+        store = MemcachedStore(
+            uid=uuid4(),
+            name='Memcached',
+            host='localhost:11211',
+            executor_config=ExecutorConfig(name='memcached')
+        )
+        client = store.client
+        client.get.return_value = None
+
+        self.assertFalse(await store.uid_exists('uid', Bar))
+
+        client.get.assert_called_once_with('uid')
+        self.assertEqual(store.thread_executor.metrics.completed, 1)
+        self.assertIs(store.thread_executor, store.thread_executor)
+
+        executor = BoundedExecutor(ExecutorConfig(name='shared'))
+        store.set_executor(executor)
+        await store.delete_model(Bar, 'uid')
+
+        client.delete.assert_called_once_with('uid')
+        self.assertEqual(executor.metrics.completed, 1)
+        executor.shutdown()
+
+    async def test_failed_store_many(self):
+        store = MemcachedStore(
+            uid=uuid4(),
+            name='Memcached',
+            host='localhost:11211'
+        )
+        store.client.set_many.return_value = ['uid2']
+
+        with self.assertRaises(ValueError) as cm:
+            await store.store_many({
+                'uid1': Bar(name='bar1'),
+                'uid2': Bar(name='bar2')
+            })
+
+        self.assertEqual(
+            str(cm.exception), "Failed to store models ['uid2']"
+        )
+        self.assertEqual(
+            set(store.client.set_many.call_args.args[0]), {'uid1', 'uid2'}
+        )
+
+
+class TestStoreController(unittest.TestCase):
+    def setUp(self):
+        self.api = StarliteAPI(name="Test API")
+        self.store = MemoryStore(uid=uuid4(), name="MemoryStore")
+        self.api.add_store(self.store)
+
+        self.client = TestClient(app=self.api.generate_app())
+        self.client.__enter__()
+        self.addCleanup(self.client.__exit__, None, None, None)
+
+    def post(self, path: str, request):
+        return self.client.post(path, content=request.json())
+
+    def test_bulk_put_and_get(self):
+        response = self.post('/store/bulk_put', BulkPutRequest(
+            refs=[ref(Bar(name='bar1')), ref(Bar(name='bar2'))],
+            store=self.store
+        ))
+
+        self.assertEqual(response.status_code, 201)
+        r_bars = resolve_return_value(response.json())
+        self.assertEqual(len(r_bars), 2)
+        for r_bar in r_bars:
+            self.assertIsNone(r_bar.state)
+            self.assertEqual(r_bar.record.store.uid, self.store.uid)
+            self.assertIn(r_bar.uid, self.store.memory)
+
+        response = self.post('/store/bulk_get', BulkGetRequest(
+            refs=r_bars,
+            store=self.store
+        ))
+
+        self.assertEqual(response.status_code, 201)
+        r_bars = resolve_return_value(response.json())
+        self.assertEqual(
+            [r_bar.state.name for r_bar in r_bars], ['bar1', 'bar2']
+        )
+
+    def test_bulk_get_projection(self):
+        r_foo = asyncio.run(self.store.put(ref(Foo(
+            int_field=1,
+            str_field='foo'
+        ))))
+
+        response = self.post('/store/bulk_get', BulkGetRequest(
+            refs=[r_foo],
+            store=self.store,
+            projection=Projection(include=['str_field'])
+        ))
+
+        self.assertEqual(response.status_code, 201)
+        r_foo, = resolve_return_value(response.json())
+        self.assertEqual(r_foo.state.str_field, 'foo')
+        self.assertIsNone(r_foo.state.int_field)
+
+    def test_unknown_store(self):
+        response = self.client.post('/store/bulk_get', content=json.dumps({
+            'refs': [],
+            'store': {'uid': str(uuid4()), 'name': 'Unknown'}
+        }))
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(
+            'does not exist', response.json()['extra']['error_message']
+        )
@@ -0,0 +1,87 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+import pandera as pa
+
+from constelite.models import Tensor, TensorSchema, TimePoint
+
+
+class PlateSchema(TensorSchema):
+    pa_schema = pa.SeriesSchema(
+        'float64',
+        name='absorbance',
+        index=pa.MultiIndex([
+            pa.Index('int', name='row'),
+            pa.Index('int', name='col')
+        ])
+    )
+
+
+class TestTensor(unittest.TestCase):
+    def setUp(self):
+        self.series = pd.Series(
+            index=pd.MultiIndex.from_product(
+                [[1, 2], [1, 2, 3]], names=['row', 'col']
+            ),
+            data=np.arange(6, dtype='float64'),
+            name='absorbance'
+        )
+
+    def test_from_series_list(self):
+        tensor = Tensor[PlateSchema].from_series(self.series)
+
+        self.assertEqual(
+            tensor,
+            Tensor[PlateSchema](
+                index=[[1, 2], [1, 2, 3]],
+                data=[0.0, 1.0, 2.0, 3.0, 4.0, 5.0]
+            )
+        )
+        self.assertIsInstance(tensor.data, list)
+
+    def test_from_series_array_is_zero_copy(self):
+        tensor = Tensor[PlateSchema].from_series(self.series, as_array=True)
+
+        self.assertIsInstance(tensor.data, np.ndarray)
+        self.assertTrue(
+            np.shares_memory(tensor.data, self.series.to_numpy())
+        )
+        self.assertTrue(
+            np.shares_memory(tensor.data, tensor.to_series().to_numpy())
+        )
+
+    def test_from_series_reorders_data(self):
+        tensor = Tensor[PlateSchema].from_series(
+            self.series.iloc[::-1].copy()
+        )
+        pd.testing.assert_series_equal(tensor.to_series(), self.series)
+
+    def test_from_series_incomplete_index(self):
+        with self.assertRaises(ValueError):
+            Tensor[PlateSchema].from_series(self.series.iloc[:-1].copy())
+
+    def test_array_json_round_trip(self):
+        tensor = Tensor[PlateSchema](
+            index=[[1, 2], [1, 2, 3]],
+            data=np.arange(6, dtype='float64')
+        )
+        point = TimePoint[Tensor[PlateSchema]](timestamp=0, value=tensor)
+
+        parsed = TimePoint[Tensor[PlateSchema]].parse_raw(point.json())
+
+        self.assertIsInstance(parsed.value.data, np.ndarray)
+        np.testing.assert_array_equal(parsed.value.data, tensor.data)
+        self.assertEqual(parsed, point)
+
+    def test_cached_index_invalidated(self):
+        tensor = Tensor[PlateSchema](
+            index=[[1, 2], [1, 2, 3]],
+            data=np.arange(6, dtype='float64')
+        )
+        tensor.to_series()
+        tensor.index = [[3, 4], [1, 2, 3]]
+
+        self.assertEqual(
+            tensor.to_series().index.levels[0].tolist(), [3, 4]
+        )